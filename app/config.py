@@ -23,6 +23,23 @@ class Settings(BaseSettings):
     # 文件存储配置
     upload_dir: str = "./uploads"
     max_file_size: int = 104857600  # 100MB
+    blob_orphan_grace_seconds: int = 86400  # 无记录的存储文件超过该时长才被回收（避开进行中的上传）
+    
+    # 断点续传配置
+    upload_chunk_size: int = 5242880  # 5MB
+    upload_session_expire_hours: int = 24
+    
+    # 批量导出配置
+    export_workers: int = 0  # 压缩线程数，0 表示使用CPU核心数，1 表示不并行
+    export_job_workers: int = 2  # 同时执行的后台导出任务数
+    export_job_expire_hours: int = 24  # 后台导出文件保留时长
+    export_cache_max_bytes: int = 2147483648  # 导出缓存容量上限 2GB，0 表示不缓存
+    
+    # 提交页名单缓存配置
+    roster_cache_ttl_seconds: int = 60  # 进程内名单快照的兜底过期时间
+    
+    # 仪表板汇总缓存配置
+    dashboard_cache_ttl_seconds: int = 30  # 汇总结果的缓存时长，0 表示不缓存
     
     # QQ邮箱SMTP配置
     smtp_host: str = "smtp.qq.com"
@@ -30,6 +47,23 @@ class Settings(BaseSettings):
     smtp_user: str = ""
     smtp_password: str = ""
     smtp_use_ssl: bool = True
+    smtp_max_messages_per_connection: int = 50  # 单个SMTP连接最多发送的邮件数，0 表示不限制
+    smtp_concurrency: int = 5  # 批量提醒时的最大并发连接数
+    smtp_rate_per_second: float = 5.0  # 每个SMTP服务器每秒最多发送的邮件数，0 表示不限速
+    smtp_rate_burst: int = 10  # 限速令牌桶容量（允许的瞬时突发数）
+    smtp_breaker_failure_threshold: int = 3  # 连续连接失败多少次后熔断（认证失败立即熔断）
+    smtp_breaker_recovery_seconds: int = 300  # 熔断后多久进行一次恢复探测
+    
+    # 提醒邮件发送队列配置
+    mail_queue_batch_size: int = 100  # 每轮从队列取出的邮件数
+    mail_queue_max_attempts: int = 5  # 最多尝试次数，超过后进入死信状态
+    mail_queue_retry_base_seconds: int = 60  # 首次重试间隔，之后每次翻倍
+    mail_queue_poll_seconds: int = 30  # 后台检查到期重试的间隔
+    mail_queue_claim_timeout_seconds: int = 300  # 取出后超过该时间仍为 sending 的记录视为发送进程已退出，重新排队
+    
+    # 多进程部署时的定时任务领导权租约
+    scheduler_lease_ttl_seconds: int = 30  # 租约有效期，持有者失联超过该时间后由其他进程接管
+    scheduler_lease_heartbeat_seconds: int = 10  # 续约/抢占的间隔
     
     # 系统URL
     site_url: str = "http://localhost:8000"
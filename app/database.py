@@ -1,7 +1,8 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, func, select
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from typing import Any, Callable, Generator, Iterator
+from datetime import datetime
 
 from app.config import settings
 
@@ -29,11 +30,35 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+def db_now(db: Session) -> datetime:
+    """
+    获取数据库服务器的当前时间
+
+    多个应用主机之间需要比较的时间（如租约到期）统一使用数据库时钟，避免主机间时钟偏差。
+    """
+    return db.execute(select(func.now())).scalar()
+
+
+def iter_in_session(iter_rows: Callable[..., Iterator[Any]], *args, **kwargs) -> Generator[Any, None, None]:
+    """
+    在独立会话中逐项生成 iter_rows(db, *args, **kwargs) 的结果
+
+    用于 StreamingResponse：请求的 get_db 会话在响应体发送前就已关闭，
+    流式生成的内容必须使用自己的会话，并在生成结束（或客户端断开）时关闭。
+    """
+    db = SessionLocal()
+    try:
+        yield from iter_rows(db, *args, **kwargs)
+    finally:
+        db.close()
+
+
 def init_db() -> None:
     """初始化数据库表"""
     # 导入所有模型以确保它们被注册
     from app.models import (
         College, Grade, Class, Member, 
-        Task, Submission, Admin, Setting, ReminderLog
+        Task, Submission, Admin, Setting, ReminderLog,
+        UploadSession, FileBlob, ExportJob, SubmissionTombstone, TaskStat, SchedulerLease
     )
     Base.metadata.create_all(bind=engine)
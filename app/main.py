@@ -1,7 +1,7 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, RedirectResponse
+from fastapi.responses import FileResponse, RedirectResponse, JSONResponse
 from contextlib import asynccontextmanager
 import os
 
@@ -44,19 +44,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# multipart表单除文件内容外的额外开销（边界、字段头等）
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """根据Content-Length提前拒绝超过大小限制的上传请求（避免先落盘再校验）"""
+    if request.method in ("POST", "PUT"):
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit():
+            if int(content_length) > settings.max_file_size + UPLOAD_FORM_OVERHEAD:
+                return JSONResponse(
+                    status_code=413,
+                    content={"detail": {
+                        "error": "file_too_large",
+                        "message": f"文件大小超过限制: {settings.max_file_size // 1024 // 1024}MB"
+                    }}
+                )
+    return await call_next(request)
+
+
 # 挂载静态文件
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 # 注册路由
-from app.routers import auth, colleges, grades, classes, members, tasks, submissions, settings as settings_router
+from app.routers import auth, colleges, grades, classes, members, tasks, submissions, uploads, dashboard, organization, settings as settings_router
 
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["认证"])
 app.include_router(colleges.router, prefix="/api/v1/colleges", tags=["学院"])
 app.include_router(grades.router, prefix="/api/v1/grades", tags=["年级"])
 app.include_router(classes.router, prefix="/api/v1/classes", tags=["班级"])
+app.include_router(organization.router, prefix="/api/v1/organization", tags=["组织结构"])
 app.include_router(members.router, prefix="/api/v1/members", tags=["成员"])
 app.include_router(tasks.router, prefix="/api/v1/tasks", tags=["任务"])
 app.include_router(submissions.router, prefix="/api/v1/submissions", tags=["提交"])
+app.include_router(uploads.router, prefix="/api/v1/uploads", tags=["断点续传"])
+app.include_router(dashboard.router, prefix="/api/v1/dashboard", tags=["仪表板"])
 app.include_router(settings_router.router, prefix="/api/v1/settings", tags=["设置"])
 
 
@@ -7,6 +7,12 @@ from app.models.submission import Submission
 from app.models.admin import Admin
 from app.models.setting import Setting
 from app.models.reminder_log import ReminderLog
+from app.models.upload_session import UploadSession
+from app.models.file_blob import FileBlob
+from app.models.export_job import ExportJob
+from app.models.submission_tombstone import SubmissionTombstone
+from app.models.task_stat import TaskStat
+from app.models.scheduler_lease import SchedulerLease
 
 __all__ = [
     "College",
@@ -18,4 +24,10 @@ __all__ = [
     "Admin",
     "Setting",
     "ReminderLog",
+    "UploadSession",
+    "FileBlob",
+    "ExportJob",
+    "SubmissionTombstone",
+    "TaskStat",
+    "SchedulerLease",
 ]
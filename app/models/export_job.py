@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, BigInteger, JSON, Text
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class ExportJob(Base):
+    """后台导出任务模型"""
+    __tablename__ = "export_jobs"
+    
+    id = Column(String(32), primary_key=True, comment="导出任务ID")
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False, index=True, comment="所属任务ID")
+    
+    # 导出参数
+    member_ids = Column(JSON, nullable=True, comment="指定导出的成员ID列表")
+    naming_format = Column(String(200), nullable=True, comment="文件夹命名格式")
+    compression = Column(String(20), nullable=True, comment="压缩方式")
+    
+    # 状态: pending, running, done, failed
+    status = Column(String(20), default="pending", index=True, comment="任务状态")
+    total_files = Column(Integer, default=0, comment="文件总数")
+    processed_files = Column(Integer, default=0, comment="已处理文件数")
+    total_bytes = Column(BigInteger, default=0, comment="原始总大小(字节)")
+    processed_bytes = Column(BigInteger, default=0, comment="已处理大小(字节)")
+    
+    # 结果
+    filename = Column(String(255), nullable=True, comment="下载文件名")
+    file_path = Column(String(500), nullable=True, comment="导出文件存储路径")
+    file_size = Column(BigInteger, nullable=True, comment="导出文件大小(字节)")
+    error = Column(Text, nullable=True, comment="失败原因")
+    
+    created_at = Column(DateTime, server_default=func.now(), comment="创建时间")
+    finished_at = Column(DateTime, nullable=True, comment="完成时间")
+    expires_at = Column(DateTime, nullable=True, index=True, comment="导出文件过期时间")
+    
+    def __repr__(self):
+        return f"<ExportJob(id={self.id}, task_id={self.task_id}, status={self.status})>"
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, DateTime, BigInteger
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class FileBlob(Base):
+    """内容寻址文件存储模型（相同内容只保存一份）"""
+    __tablename__ = "file_blobs"
+    
+    sha256 = Column(String(64), primary_key=True, comment="文件内容SHA-256")
+    file_path = Column(String(500), nullable=False, comment="文件存储路径")
+    file_size = Column(BigInteger, default=0, comment="文件大小(字节)")
+    ref_count = Column(Integer, default=0, comment="引用次数")
+    created_at = Column(DateTime, server_default=func.now(), comment="创建时间")
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), comment="引用计数最后变化时间")
+    
+    def __repr__(self):
+        return f"<FileBlob(sha256={self.sha256}, size={self.file_size}, refs={self.ref_count})>"
@@ -13,9 +13,13 @@ class ReminderLog(Base):
     task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False, comment="任务ID")
     member_id = Column(Integer, ForeignKey("members.id", ondelete="CASCADE"), nullable=False, comment="成员ID")
     email = Column(String(100), nullable=False, comment="发送邮箱")
-    status = Column(String(20), nullable=False, default="pending", comment="发送状态: pending/sent/failed")
+    status = Column(String(20), nullable=False, default="pending", index=True, comment="发送状态: pending/sending/sent/failed/deferred/dead")
     error_message = Column(Text, nullable=True, comment="错误信息")
-    sent_at = Column(DateTime, server_default=func.now(), comment="发送时间")
+    batch_id = Column(String(32), nullable=True, index=True, comment="入队批次ID")
+    attempts = Column(Integer, nullable=False, default=0, comment="已尝试发送次数")
+    next_attempt_at = Column(DateTime, nullable=True, comment="下次重试时间")
+    claimed_at = Column(DateTime, nullable=True, comment="取出发送的时间（数据库时钟）")
+    sent_at = Column(DateTime, server_default=func.now(), comment="发送时间（未发送时为入队时间）")
     
     # 关联关系
     task = relationship("Task", back_populates="reminder_logs")
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, DateTime
+
+from app.database import Base
+
+
+class SchedulerLease(Base):
+    """后台任务领导权租约（多进程部署时只有持有者运行定时任务）"""
+    __tablename__ = "scheduler_leases"
+    
+    name = Column(String(50), primary_key=True, comment="租约名称")
+    holder = Column(String(100), nullable=False, comment="持有者（主机名:进程号:随机串）")
+    expires_at = Column(DateTime, nullable=False, comment="租约到期时间")
+    renewed_at = Column(DateTime, nullable=False, comment="最后续约时间")
+    
+    def __repr__(self):
+        return f"<SchedulerLease(name={self.name}, holder={self.holder}, expires_at={self.expires_at})>"
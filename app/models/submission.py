@@ -22,6 +22,8 @@ class Submission(Base):
     file_path = Column(String(500), nullable=True, comment="文件存储路径")
     file_type = Column(String(100), nullable=True, comment="文件类型/MIME类型")
     file_size = Column(BigInteger, default=0, comment="文件大小(字节)")
+    content_hash = Column(String(64), nullable=True, index=True, comment="文件内容SHA-256（对应 file_blobs）")
+    upload_id = Column(String(32), nullable=True, index=True, comment="生成该提交的断点续传会话ID")
     
     # 文本内容（text类型使用）
     text_content = Column(Text, nullable=True, comment="文本内容")
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class SubmissionTombstone(Base):
+    """提交删除/替换记录（用于增量导出的删除清单）"""
+    __tablename__ = "submission_tombstones"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False, index=True, comment="所属任务ID")
+    member_id = Column(Integer, nullable=False, comment="提交成员ID")
+    submission_type = Column(String(20), default="file", comment="提交类型")
+    item_index = Column(Integer, default=1, comment="第几项提交")
+    original_filename = Column(String(255), nullable=True, comment="被移除的原始文件名")
+    
+    # 原因: deleted（删除）, replaced（被不同文件名的新文件替换）
+    reason = Column(String(20), default="deleted", comment="移除原因")
+    removed_at = Column(DateTime, server_default=func.now(), index=True, comment="移除时间")
+    
+    def __repr__(self):
+        return f"<SubmissionTombstone(id={self.id}, task_id={self.task_id}, member_id={self.member_id}, reason={self.reason})>"
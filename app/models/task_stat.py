@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class TaskStat(Base):
+    """任务统计计数（随提交和成员变更增量维护）"""
+    __tablename__ = "task_stats"
+    
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True, comment="任务ID")
+    total_members = Column(Integer, default=0, nullable=False, comment="班级总人数")
+    submitted_count = Column(Integer, default=0, nullable=False, comment="已提交人数")
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), comment="更新时间")
+    
+    def __repr__(self):
+        return f"<TaskStat(task_id={self.task_id}, submitted={self.submitted_count}/{self.total_members})>"
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, BigInteger, Boolean
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class UploadSession(Base):
+    """断点续传上传会话模型"""
+    __tablename__ = "upload_sessions"
+    
+    id = Column(String(32), primary_key=True, comment="上传会话ID")
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False, index=True, comment="所属任务ID")
+    member_id = Column(Integer, ForeignKey("members.id", ondelete="CASCADE"), nullable=False, comment="提交成员ID")
+    
+    # 提交参数（完成时用于生成 Submission）
+    submission_type = Column(String(20), default="file", comment="提交类型")
+    item_index = Column(Integer, default=1, comment="第几项提交")
+    is_private = Column(Boolean, default=False, comment="是否仅管理员可见")
+    original_filename = Column(String(255), nullable=True, comment="原始文件名")
+    file_type = Column(String(100), nullable=True, comment="文件类型/MIME类型")
+    
+    # 分块进度
+    total_size = Column(BigInteger, nullable=False, comment="文件总大小(字节)")
+    chunk_size = Column(Integer, nullable=False, comment="分块大小(字节)")
+    received_size = Column(BigInteger, default=0, comment="已接收字节数")
+    
+    expires_at = Column(DateTime, nullable=False, index=True, comment="过期时间")
+    created_at = Column(DateTime, server_default=func.now(), comment="创建时间")
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), comment="最后更新时间")
+    
+    def __repr__(self):
+        return f"<UploadSession(id={self.id}, task_id={self.task_id}, member_id={self.member_id}, received={self.received_size}/{self.total_size})>"
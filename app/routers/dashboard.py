@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.services.dashboard import DashboardService
+from app.schemas.dashboard import DashboardSummary
+
+router = APIRouter()
+
+
+@router.get("/summary", response_model=DashboardSummary)
+def get_dashboard_summary(db: Session = Depends(get_db)):
+    """获取仪表板汇总（学院/年级/班级人数、任务数、提交率）"""
+    return DashboardService.get_summary(db)
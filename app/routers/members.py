@@ -2,8 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
+import itertools
 
-from app.database import get_db
+from app.database import get_db, iter_in_session
 from app.services.member import MemberService
 from app.services.organization import OrganizationService
 from app.schemas.member import (
@@ -11,7 +12,8 @@ from app.schemas.member import (
     MemberImportResult, MemberWithSubmissionStatus
 )
 from app.utils.excel_handler import (
-    create_member_template, parse_member_excel, export_members_to_excel
+    create_member_template, iter_member_file, stream_rows_xlsx, stream_rows_csv,
+    XLSX_MEDIA_TYPE, CSV_MEDIA_TYPE
 )
 
 router = APIRouter()
@@ -53,51 +55,59 @@ async def import_members(
         raise HTTPException(status_code=400, detail="班级不存在")
     
     # 验证文件类型
-    if not file.filename.endswith(('.xlsx', '.xls')):
-        raise HTTPException(status_code=400, detail="请上传Excel文件(.xlsx或.xls)")
+    if not file.filename.lower().endswith(('.xlsx', '.xls', '.csv')):
+        raise HTTPException(status_code=400, detail="请上传Excel文件(.xlsx或.xls)或CSV文件(.csv)")
     
-    # 解析文件
-    content = await file.read()
+    # 流式解析文件，先读取第一行以便尽早发现格式错误
     try:
-        members = parse_member_excel(content)
+        members = iter_member_file(file.file, file.filename)
+        first = next(members, None)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"文件解析失败: {str(e)}")
     
-    if not members:
+    if first is None:
         raise HTTPException(status_code=400, detail="文件中没有有效数据")
     
-    # 导入成员
-    result = MemberService.import_members(db, class_id, members, skip_duplicates)
+    # 导入成员（边解析边分批写入）
+    try:
+        result = MemberService.import_members(db, class_id, itertools.chain([first], members), skip_duplicates)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"文件解析失败（之前的行已导入）: {str(e)}")
     return result
 
 
 @router.get("/export")
 def export_members(
-    class_id: int = Query(..., description="班级ID"),
-    db: Session = Depends(get_db)
+    class_id: Optional[int] = Query(None, description="班级ID"),
+    grade_id: Optional[int] = Query(None, description="年级ID"),
+    college_id: Optional[int] = Query(None, description="学院ID"),
+    format: str = Query("xlsx", description="导出格式: xlsx, csv"),
 ):
-    """导出班级成员列表"""
-    members = MemberService.get_members(db, class_id=class_id)
-    if not members:
-        raise HTTPException(status_code=404, detail="没有成员数据")
+    """导出成员列表（按班级/年级/学院，流式生成）"""
+    if not (class_id or grade_id or college_id):
+        raise HTTPException(status_code=400, detail="请指定班级、年级或学院")
+    if format not in ("xlsx", "csv"):
+        raise HTTPException(status_code=400, detail="导出格式只支持 xlsx 或 csv")
     
-    # 转换为字典列表
-    members_data = [
-        {
-            "student_id": m.student_id,
-            "name": m.name,
-            "gender": m.gender,
-            "dormitory": m.dormitory,
-            "qq_email": m.qq_email,
-        }
-        for m in members
-    ]
+    # 响应体在请求会话关闭后才发送，逐行读取使用独立会话
+    rows = iter_in_session(
+        MemberService.iter_export_rows, class_id=class_id, grade_id=grade_id, college_id=college_id
+    )
+    first = next(rows, None)
+    if first is None:
+        raise HTTPException(status_code=404, detail="没有成员数据")
+    rows = itertools.chain([first], rows)
     
-    excel_file = export_members_to_excel(members_data)
+    if format == "csv":
+        content = stream_rows_csv(MemberService.EXPORT_HEADERS, rows)
+        media_type = CSV_MEDIA_TYPE
+    else:
+        content = stream_rows_xlsx("成员列表", MemberService.EXPORT_HEADERS, rows)
+        media_type = XLSX_MEDIA_TYPE
     return StreamingResponse(
-        excel_file,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": "attachment; filename=members.xlsx"}
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=members.{format}"}
     )
 
 
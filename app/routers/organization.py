@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.services.organization import OrganizationService
+from app.schemas.organization import OrganizationTree
+
+router = APIRouter()
+
+
+@router.get("/tree", response_model=OrganizationTree)
+def get_organization_tree(
+    member_counts: bool = Query(False, description="是否返回各班级成员数"),
+    db: Session = Depends(get_db)
+):
+    """获取完整的学院-年级-班级组织树"""
+    return OrganizationService.get_tree(db, with_member_counts=member_counts)
@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import List, Optional
 
 from app.database import get_db
 from app.models import Setting
 from app.schemas.setting import NamingFormatRequest, NamingFormatResponse
-from app.schemas.reminder import EmailConfig, EmailConfigResponse
+from app.schemas.reminder import EmailConfig, EmailConfigResponse, MailBreakerStatus
+from app.services.email import EmailService
+from app.services.mail_queue import MailQueueService
+from app.utils.circuit_breaker import all_breakers
 from app.utils.naming import validate_naming_format, AVAILABLE_VARIABLES
 
 router = APIRouter()
@@ -81,6 +84,10 @@ def set_email_config(config: EmailConfig, db: Session = Depends(get_db)):
     set_setting(db, "smtp_password", config.smtp_password)
     set_setting(db, "smtp_use_ssl", str(config.smtp_use_ssl).lower())
     
+    # 配置已修改，之前的熔断状态不再适用
+    EmailService.get_breaker(EmailService.get_smtp_config(db)).reset()
+    MailQueueService.release_deferred(db)
+    
     return EmailConfigResponse(
         smtp_host=config.smtp_host,
         smtp_port=config.smtp_port,
@@ -88,3 +95,19 @@ def set_email_config(config: EmailConfig, db: Session = Depends(get_db)):
         smtp_use_ssl=config.smtp_use_ssl,
         is_configured=True
     )
+
+
+@router.get("/email/breaker", response_model=List[MailBreakerStatus])
+def get_email_breakers():
+    """获取各SMTP服务器的熔断器状态"""
+    return [MailBreakerStatus(host=host, **breaker.snapshot()) for host, breaker in all_breakers().items()]
+
+
+@router.post("/email/breaker/reset", response_model=MailBreakerStatus)
+def reset_email_breaker(db: Session = Depends(get_db)):
+    """手动恢复当前SMTP服务器的熔断器，并立即重发延后的邮件"""
+    smtp_config = EmailService.get_smtp_config(db)
+    breaker = EmailService.get_breaker(smtp_config)
+    breaker.reset()
+    MailQueueService.release_deferred(db)
+    return MailBreakerStatus(host=smtp_config["host"], **breaker.snapshot())
@@ -8,8 +8,10 @@ import os
 from app.database import get_db
 from app.services.submission import SubmissionService, SubmissionError
 from app.services.export import ExportService
+from app.services.export_job import ExportJobService
+from app.services.export_cache import ExportCacheService
 from app.schemas.submission import (
-    SubmissionResponse, ExportRequest, 
+    SubmissionResponse, ExportRequest, ExportJobResponse,
     TextSubmissionCreate, QuestionnaireSubmissionCreate
 )
 
@@ -41,25 +43,118 @@ def get_public_submissions(
 # 导出端点 - 必须放在 /{submission_id} 之前
 @router.post("/export")
 def export_submissions(request: ExportRequest, db: Session = Depends(get_db)):
-    """批量导出提交文件（每人一个文件夹）"""
+    """批量导出提交文件（每人一个文件夹，相同内容的重复导出直接返回缓存）"""
+    if request.since or request.incremental:
+        return _export_delta(request, db)
+    
+    cache_key = None
+    if ExportCacheService.is_enabled():
+        cache_key = ExportCacheService.get_cache_key(
+            db, request.task_id, request.member_ids, request.naming_format, request.compression
+        )
+        cached = ExportCacheService.get(cache_key) if cache_key else None
+        if cached:
+            encoded_filename = quote(cached["filename"], safe='')
+            return FileResponse(
+                path=cached["path"],
+                media_type="application/zip",
+                headers={
+                    "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}",
+                    "X-File-Count": str(cached["file_count"]),
+                    "X-Total-Size": str(cached["total_size"]),
+                    "X-Export-Cache": "hit"
+                }
+            )
+    
     try:
-        zip_buffer, filename, file_count, total_size = ExportService.export_task_submissions(
-            db, task_id=request.task_id, member_ids=request.member_ids, naming_format=request.naming_format
+        zip_stream, filename, file_count, total_size = ExportService.export_task_submissions(
+            db, task_id=request.task_id, member_ids=request.member_ids,
+            naming_format=request.naming_format, compression=request.compression
         )
+        if cache_key:
+            zip_stream = ExportCacheService.store_stream(cache_key, zip_stream, filename, file_count, total_size)
         encoded_filename = quote(filename, safe='')
         return StreamingResponse(
-            zip_buffer,
+            zip_stream,
             media_type="application/zip",
             headers={
                 "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}",
                 "X-File-Count": str(file_count),
-                "X-Total-Size": str(total_size)
+                "X-Total-Size": str(total_size),
+                "X-Export-Cache": "miss" if cache_key else "off"
             }
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+def _export_delta(request: ExportRequest, db: Session):
+    """增量导出（内容随时间点变化，不使用导出缓存）"""
+    try:
+        zip_stream, filename, file_count, total_size = ExportService.export_task_delta(
+            db, task_id=request.task_id, since=request.since, member_ids=request.member_ids,
+            naming_format=request.naming_format, compression=request.compression,
+            use_watermark=request.incremental
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    encoded_filename = quote(filename, safe='')
+    return StreamingResponse(
+        zip_stream,
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}",
+            "X-File-Count": str(file_count),
+            "X-Total-Size": str(total_size)
+        }
+    )
+
+
+@router.post("/export/jobs", response_model=ExportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def create_export_job(request: ExportRequest, db: Session = Depends(get_db)):
+    """提交后台导出任务（立即返回任务ID，完成后通过下载接口获取）"""
+    if request.since or request.incremental:
+        raise HTTPException(status_code=400, detail="后台导出不支持增量模式，请直接导出")
+    try:
+        return ExportJobService.submit_job(
+            db, task_id=request.task_id, member_ids=request.member_ids,
+            naming_format=request.naming_format, compression=request.compression
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/export/jobs/{job_id}", response_model=ExportJobResponse)
+def get_export_job(job_id: str, db: Session = Depends(get_db)):
+    """查询后台导出任务进度"""
+    job = ExportJobService.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="导出任务不存在")
+    return job
+
+
+@router.get("/export/jobs/{job_id}/download")
+def download_export_job(job_id: str, db: Session = Depends(get_db)):
+    """下载后台导出的压缩包"""
+    job = ExportJobService.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="导出任务不存在")
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"导出任务尚未完成: {job.status}")
+    
+    file_path = ExportJobService.get_download_path(db, job_id)
+    if not file_path:
+        raise HTTPException(status_code=410, detail="导出文件已过期，请重新导出")
+    
+    encoded_filename = quote(job.filename, safe='')
+    return FileResponse(
+        path=file_path,
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}"}
+    )
+
+
 @router.post("/export/text")
 def export_text_submissions(
     task_id: int = Query(...),
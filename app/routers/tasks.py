@@ -1,13 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from urllib.parse import quote
 
-from app.database import get_db
+from app.database import get_db, iter_in_session
 from app.services.task import TaskService
 from app.services.organization import OrganizationService
 from app.services.member import MemberService
+from app.services.roster import RosterService
+from app.services.task_stat import TaskStatService
 from app.schemas.task import TaskCreate, TaskUpdate, TaskResponse, TaskStats, TaskWithStats
 from app.schemas.member import MemberWithSubmissionStatus
+from app.utils.excel_handler import stream_rows_xlsx, stream_rows_csv, XLSX_MEDIA_TYPE, CSV_MEDIA_TYPE
 
 router = APIRouter()
 
@@ -23,6 +28,27 @@ def get_tasks(
     return TaskService.get_tasks(db, class_id=class_id, skip=skip, limit=limit)
 
 
+# 批量统计 - 必须放在 /{task_id} 之前
+@router.get("/stats", response_model=List[TaskStats])
+def get_tasks_stats(
+    ids: str = Query(..., description="任务ID，逗号分隔"),
+    db: Session = Depends(get_db)
+):
+    """批量获取任务统计（任务列表一次加载）"""
+    try:
+        task_ids = [int(i) for i in ids.split(",") if i.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="任务ID格式错误")
+    return TaskService.get_tasks_stats(db, task_ids)
+
+
+@router.post("/stats/rebuild")
+def rebuild_tasks_stats(db: Session = Depends(get_db)):
+    """全量重算任务统计计数（修复计数偏差）"""
+    count = TaskStatService.rebuild(db)
+    return {"message": f"已重算 {count} 个任务的统计", "count": count}
+
+
 @router.get("/{task_id}", response_model=TaskWithStats)
 def get_task(task_id: int, db: Session = Depends(get_db)):
     """获取单个任务（包含统计信息）"""
@@ -59,22 +85,64 @@ def get_task_members(
         raise HTTPException(status_code=404, detail="任务不存在")
     
     members_with_status = MemberService.get_members_with_submission_status(
-        db, task.class_id, task_id
+        db, task.class_id, task_id, submitted
     )
     
     result = []
-    for member, has_submitted, submission_count in members_with_status:
-        if submitted is not None and has_submitted != submitted:
-            continue
-        
+    for member, has_submitted, submitted_items, submission_count in members_with_status:
         member_response = MemberWithSubmissionStatus.model_validate(member)
         member_response.has_submitted = has_submitted
+        member_response.submitted_items = submitted_items
         member_response.submission_count = submission_count
         result.append(member_response)
     
     return result
 
 
+@router.get("/{task_id}/roster")
+def get_task_roster(task_id: int, request: Request, db: Session = Depends(get_db)):
+    """获取任务名单及提交状态（学生提交页使用，进程内缓存，支持 If-None-Match）"""
+    roster = RosterService.get_roster(db, task_id)
+    if roster is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    
+    etag, body = roster
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/{task_id}/status-sheet")
+def export_task_status_sheet(
+    task_id: int,
+    format: str = Query("xlsx", description="导出格式: xlsx, csv"),
+    db: Session = Depends(get_db)
+):
+    """导出任务提交情况表（是否提交、最后提交时间、提交项数、文件大小，流式生成）"""
+    task = TaskService.get_task(db, task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    if format not in ("xlsx", "csv"):
+        raise HTTPException(status_code=400, detail="导出格式只支持 xlsx 或 csv")
+    
+    # 响应体在请求会话关闭后才发送，逐行读取使用独立会话
+    rows = iter_in_session(TaskService.iter_status_rows, task)
+    if format == "csv":
+        content = stream_rows_csv(TaskService.STATUS_SHEET_HEADERS, rows)
+        media_type = CSV_MEDIA_TYPE
+    else:
+        content = stream_rows_xlsx("提交情况", TaskService.STATUS_SHEET_HEADERS, rows)
+        media_type = XLSX_MEDIA_TYPE
+    
+    encoded_filename = quote(f"{task.title}_提交情况.{format}", safe='')
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}"}
+    )
+
+
 @router.get("/{task_id}/unsubmitted")
 def get_unsubmitted_members(task_id: int, db: Session = Depends(get_db)):
     """获取未提交成员名单（用于复制催交）"""
@@ -121,16 +189,17 @@ def delete_task(task_id: int, db: Session = Depends(get_db)):
 
 # 提醒相关端点
 from app.services.email import EmailService
-from app.schemas.reminder import ReminderRequest, ReminderResult, ReminderLogResponse
+from app.services.mail_queue import MailQueueService
+from app.schemas.reminder import ReminderRequest, ReminderQueued, ReminderProgress, ReminderLogResponse
 
 
-@router.post("/{task_id}/remind", response_model=ReminderResult)
+@router.post("/{task_id}/remind", response_model=ReminderQueued, status_code=status.HTTP_202_ACCEPTED)
 def send_reminder(
     task_id: int,
     request: ReminderRequest = None,
     db: Session = Depends(get_db)
 ):
-    """发送提醒邮件"""
+    """发送提醒邮件（写入发送队列后立即返回，进度见 reminder-progress）"""
     task = TaskService.get_task(db, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="任务不存在")
@@ -147,8 +216,20 @@ def send_reminder(
     if not members:
         raise HTTPException(status_code=400, detail="没有需要提醒的成员")
     
-    result = EmailService.send_reminder_to_members(db, task, members)
-    return result
+    return MailQueueService.enqueue_and_wake(db, task, members)
+
+
+@router.get("/{task_id}/reminder-progress", response_model=ReminderProgress)
+def get_reminder_progress(
+    task_id: int,
+    batch_id: Optional[str] = Query(None, description="入队批次ID，不传则统计该任务全部提醒"),
+    db: Session = Depends(get_db)
+):
+    """获取提醒邮件发送进度"""
+    task = TaskService.get_task(db, task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return MailQueueService.get_progress(db, task_id, batch_id)
 
 
 @router.get("/{task_id}/reminder-logs", response_model=List[ReminderLogResponse])
@@ -0,0 +1,71 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.services.submission import SubmissionError
+from app.services.upload import UploadService
+from app.schemas.submission import SubmissionResponse
+from app.schemas.upload import UploadSessionCreate, UploadSessionResponse
+
+router = APIRouter()
+
+
+def _raise_upload_error(e: SubmissionError):
+    """将上传错误转换为HTTP异常"""
+    if e.code == "upload_not_found":
+        status_code = 404
+    elif e.code == "chunk_out_of_order":
+        status_code = 409
+    else:
+        status_code = 400
+    raise HTTPException(status_code=status_code, detail={"error": e.code, "message": e.message})
+
+
+@router.post("/", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+def create_upload_session(data: UploadSessionCreate, db: Session = Depends(get_db)):
+    """创建断点续传会话"""
+    try:
+        session = UploadService.create_session(db, data)
+    except SubmissionError as e:
+        _raise_upload_error(e)
+    return UploadService.to_response(session)
+
+
+@router.get("/{upload_id}", response_model=UploadSessionResponse)
+def get_upload_session(upload_id: str, db: Session = Depends(get_db)):
+    """查询上传进度（已接收偏移量）"""
+    session = UploadService.get_session(db, upload_id)
+    if not session:
+        raise HTTPException(status_code=404, detail={"error": "upload_not_found", "message": "上传会话不存在或已过期"})
+    return UploadService.to_response(session)
+
+
+@router.put("/{upload_id}/chunks/{chunk_index}", response_model=UploadSessionResponse)
+async def upload_chunk(
+    upload_id: str,
+    chunk_index: int,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """上传分片（请求体为分片原始字节）"""
+    try:
+        session = await UploadService.write_chunk(db, upload_id, chunk_index, request.stream())
+    except SubmissionError as e:
+        _raise_upload_error(e)
+    return UploadService.to_response(session)
+
+
+@router.post("/{upload_id}/complete", response_model=SubmissionResponse, status_code=status.HTTP_201_CREATED)
+def complete_upload(upload_id: str, db: Session = Depends(get_db)):
+    """完成上传并生成提交记录"""
+    try:
+        return UploadService.complete_session(db, upload_id)
+    except SubmissionError as e:
+        _raise_upload_error(e)
+
+
+@router.delete("/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+def cancel_upload(upload_id: str, db: Session = Depends(get_db)):
+    """取消上传"""
+    if not UploadService.cancel_session(db, upload_id):
+        raise HTTPException(status_code=404, detail="上传会话不存在")
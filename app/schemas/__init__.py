@@ -9,11 +9,15 @@ from app.schemas.member import (
 from app.schemas.task import TaskCreate, TaskUpdate, TaskResponse, TaskStats, TaskWithStats
 from app.schemas.submission import (
     SubmissionCreate, SubmissionResponse, SubmissionWithMember,
-    ExportRequest, ExportResponse
+    ExportRequest, ExportResponse, ExportJobResponse
 )
+from app.schemas.upload import UploadSessionCreate, UploadSessionResponse
+from app.schemas.dashboard import DashboardSummary
+from app.schemas.organization import OrganizationTree
 from app.schemas.auth import AdminSetup, LoginRequest, LoginResponse, AdminResponse, TokenData
 from app.schemas.reminder import (
-    ReminderRequest, ReminderLogResponse, ReminderResult,
+    ReminderRequest, ReminderLogResponse, ReminderQueued, ReminderProgress,
+    MailBreakerStatus,
     EmailConfig, EmailConfigResponse
 )
 from app.schemas.setting import (
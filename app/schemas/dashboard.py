@@ -0,0 +1,54 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List
+
+
+class ClassSummary(BaseModel):
+    """班级汇总"""
+    id: int
+    name: str
+    member_count: int = 0
+
+
+class GradeSummary(BaseModel):
+    """年级汇总"""
+    id: int
+    name: str
+    member_count: int = 0
+    classes: List[ClassSummary] = []
+
+
+class CollegeSummary(BaseModel):
+    """学院汇总"""
+    id: int
+    name: str
+    member_count: int = 0
+    grades: List[GradeSummary] = []
+
+
+class DashboardTotals(BaseModel):
+    """全局计数"""
+    colleges: int = 0
+    grades: int = 0
+    classes: int = 0
+    members: int = 0
+    tasks: int = 0
+    active_tasks: int = 0  # 未截止（或无截止时间）的任务
+
+
+class SubmissionSummary(BaseModel):
+    """提交率汇总（按任务应交人数/已交人数累加）"""
+    expected: int = 0
+    submitted: int = 0
+    submission_rate: float = 0
+    active_expected: int = 0
+    active_submitted: int = 0
+    active_submission_rate: float = 0
+
+
+class DashboardSummary(BaseModel):
+    """仪表板汇总"""
+    totals: DashboardTotals
+    submissions: SubmissionSummary
+    colleges: List[CollegeSummary] = []
+    generated_at: datetime
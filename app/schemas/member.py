@@ -63,4 +63,5 @@ class MemberImportResult(BaseModel):
 class MemberWithSubmissionStatus(MemberResponse):
     """带提交状态的成员响应"""
     has_submitted: bool = False
-    submission_count: int = 0
+    submitted_items: int = 0  # 已提交的项数
+    submission_count: int = 0  # 各项上传次数之和
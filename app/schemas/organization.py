@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class ClassNode(BaseModel):
+    """组织树 - 班级节点"""
+    id: int
+    name: str
+    grade_id: int
+    member_count: Optional[int] = None  # 仅在请求成员数时返回
+
+
+class GradeNode(BaseModel):
+    """组织树 - 年级节点"""
+    id: int
+    name: str
+    college_id: int
+    classes: List[ClassNode] = []
+
+
+class CollegeNode(BaseModel):
+    """组织树 - 学院节点"""
+    id: int
+    name: str
+    grades: List[GradeNode] = []
+
+
+class OrganizationTree(BaseModel):
+    """完整组织树"""
+    version: int  # 组织结构版本号，增删改后递增
+    colleges: List[CollegeNode] = []
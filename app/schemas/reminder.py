@@ -16,20 +16,48 @@ class ReminderLogResponse(BaseModel):
     email: str
     status: str
     error_message: Optional[str]
+    attempts: int = 0
+    next_attempt_at: Optional[datetime] = None
     sent_at: datetime
     
     class Config:
         from_attributes = True
 
 
-class ReminderResult(BaseModel):
-    """提醒结果"""
+class ReminderQueued(BaseModel):
+    """提醒入队结果"""
+    batch_id: str
     total: int
-    success: int
-    failed: int
+    queued: int  # 已进入发送队列的人数
+    failed: int  # 无法发送（如未设置邮箱）的人数
     errors: List[str] = []
 
 
+class ReminderProgress(BaseModel):
+    """提醒发送进度"""
+    task_id: int
+    batch_id: Optional[str] = None
+    total: int = 0
+    pending: int = 0  # 等待发送或等待重试
+    retrying: int = 0  # pending 中已失败过、等待重试的数量
+    sending: int = 0
+    sent: int = 0
+    failed: int = 0
+    deferred: int = 0  # 邮件服务熔断期间延后，恢复后自动重发
+    dead: int = 0  # 重试次数用尽
+    finished: bool = True
+
+
+class MailBreakerStatus(BaseModel):
+    """SMTP熔断器状态"""
+    host: str
+    state: str  # closed / open / half_open
+    failures: int = 0  # 连续失败次数
+    last_error: Optional[str] = None
+    opened_at: Optional[datetime] = None
+    retry_at: Optional[datetime] = None  # 下一次允许探测的时间
+
+
 class EmailConfig(BaseModel):
     """邮箱配置"""
     smtp_host: str
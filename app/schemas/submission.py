@@ -47,6 +47,7 @@ class SubmissionResponse(BaseModel):
     file_path: Optional[str] = None
     file_type: Optional[str] = None
     file_size: int = 0
+    content_hash: Optional[str] = None
     text_content: Optional[str] = None
     questionnaire_answers: Optional[Dict[str, Any]] = None
     is_private: bool = False
@@ -84,6 +85,9 @@ class ExportRequest(BaseModel):
     task_id: int
     member_ids: Optional[List[int]] = None
     naming_format: Optional[str] = None
+    compression: Optional[str] = None  # auto（按文件类型）, stored, deflated
+    since: Optional[datetime] = None  # 增量导出：只导出该时间之后新增或更新的提交
+    incremental: bool = False  # 增量导出：从上次增量导出的时间点开始，并记录本次时间点
 
 
 class ExportResponse(BaseModel):
@@ -91,3 +95,23 @@ class ExportResponse(BaseModel):
     filename: str
     file_count: int
     total_size: int
+
+
+class ExportJobResponse(BaseModel):
+    """后台导出任务状态"""
+    id: str
+    task_id: int
+    status: str  # pending, running, done, failed
+    total_files: int
+    processed_files: int
+    total_bytes: int
+    processed_bytes: int
+    filename: Optional[str]
+    file_size: Optional[int]
+    error: Optional[str]
+    created_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    expires_at: Optional[datetime]
+    
+    class Config:
+        from_attributes = True
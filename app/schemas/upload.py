@@ -0,0 +1,30 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+
+class UploadSessionCreate(BaseModel):
+    """创建断点续传会话请求"""
+    task_id: int
+    member_id: int
+    filename: str
+    file_size: int
+    content_type: Optional[str] = None
+    is_private: bool = False
+    item_index: int = 1
+    submission_type: str = "file"  # file, image
+
+
+class UploadSessionResponse(BaseModel):
+    """断点续传会话状态"""
+    upload_id: str
+    task_id: int
+    member_id: int
+    filename: Optional[str]
+    total_size: int
+    chunk_size: int
+    received_size: int
+    next_chunk: int
+    total_chunks: int
+    is_complete: bool
+    expires_at: datetime
@@ -0,0 +1,120 @@
+"""仪表板汇总服务"""
+from datetime import datetime
+from typing import Optional
+import threading
+import time
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.models import College, Grade, Class, Member, Task
+from app.config import settings
+from app.schemas.dashboard import (
+    DashboardSummary, DashboardTotals, SubmissionSummary,
+    CollegeSummary, GradeSummary, ClassSummary
+)
+from app.services.task_stat import TaskStatService
+
+
+class DashboardService:
+    """
+    仪表板汇总服务
+
+    学院/年级/班级人数、任务数和提交率由几条分组查询得出，结果在进程内缓存
+    dashboard_cache_ttl_seconds 秒，管理端频繁刷新首页时不重复查询。
+    """
+
+    _lock = threading.Lock()
+    _cached: Optional[DashboardSummary] = None
+    _expires_at: float = 0
+
+    @staticmethod
+    def _rate(submitted: int, expected: int) -> float:
+        return round(submitted / expected * 100, 2) if expected > 0 else 0
+
+    @staticmethod
+    def build_summary(db: Session) -> DashboardSummary:
+        """从数据库计算汇总"""
+        now = datetime.now()
+
+        member_counts = dict(
+            db.query(Member.class_id, func.count(Member.id)).group_by(Member.class_id).all()
+        )
+        colleges = db.query(College.id, College.name).order_by(College.id).all()
+        grades = db.query(Grade.id, Grade.name, Grade.college_id).order_by(Grade.id).all()
+        classes = db.query(Class.id, Class.name, Class.grade_id).order_by(Class.id).all()
+
+        grade_summaries = {}
+        for grade_id, name, _ in grades:
+            grade_summaries[grade_id] = GradeSummary(id=grade_id, name=name)
+        for class_id, name, grade_id in classes:
+            grade = grade_summaries.get(grade_id)
+            if grade is None:
+                continue
+            summary = ClassSummary(id=class_id, name=name, member_count=member_counts.get(class_id, 0))
+            grade.classes.append(summary)
+            grade.member_count += summary.member_count
+
+        college_summaries = {college_id: CollegeSummary(id=college_id, name=name) for college_id, name in colleges}
+        for grade_id, _, college_id in grades:
+            college = college_summaries.get(college_id)
+            if college is None:
+                continue
+            college.grades.append(grade_summaries[grade_id])
+            college.member_count += grade_summaries[grade_id].member_count
+
+        # 任务提交率取自 task_stats 计数表
+        tasks = db.query(
+            Task.id,
+            or_(Task.deadline == None, Task.deadline > now)
+        ).all()
+        stats = TaskStatService.get_stats(db, [task_id for task_id, _ in tasks])
+        submissions = SubmissionSummary()
+        active_tasks = 0
+        for task_id, is_active in tasks:
+            stat = stats.get(task_id)
+            expected = stat.total_members if stat else 0
+            submitted = stat.submitted_count if stat else 0
+            submissions.expected += expected
+            submissions.submitted += submitted
+            if is_active:
+                active_tasks += 1
+                submissions.active_expected += expected
+                submissions.active_submitted += submitted
+        submissions.submission_rate = DashboardService._rate(submissions.submitted, submissions.expected)
+        submissions.active_submission_rate = DashboardService._rate(
+            submissions.active_submitted, submissions.active_expected
+        )
+
+        return DashboardSummary(
+            totals=DashboardTotals(
+                colleges=len(colleges),
+                grades=len(grades),
+                classes=len(classes),
+                members=sum(member_counts.values()),
+                tasks=len(tasks),
+                active_tasks=active_tasks
+            ),
+            submissions=submissions,
+            colleges=list(college_summaries.values()),
+            generated_at=now
+        )
+
+    @classmethod
+    def get_summary(cls, db: Session) -> DashboardSummary:
+        """获取汇总（短时缓存）"""
+        with cls._lock:
+            if cls._cached is not None and cls._expires_at > time.monotonic():
+                return cls._cached
+
+        summary = cls.build_summary(db)
+        with cls._lock:
+            cls._cached = summary
+            cls._expires_at = time.monotonic() + settings.dashboard_cache_ttl_seconds
+        return summary
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """清除缓存"""
+        with cls._lock:
+            cls._cached = None
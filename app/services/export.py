@@ -1,15 +1,20 @@
 """批量导出服务"""
-from typing import List, Optional, Tuple
+from typing import Iterator, List, Optional, Tuple
+from datetime import datetime
 from io import BytesIO
-import zipfile
 import os
 import logging
 import json
+import zlib
 
 from sqlalchemy.orm import Session
 
-from app.models import Task, Submission, Member
+from app.models import Task, Submission, Member, Setting, SubmissionTombstone
+from app.config import settings
+from app.database import SessionLocal
 from app.utils.naming import apply_naming_format
+from app.utils.zip_stream import ZipEntry, ZIP_STORED, ZIP_DEFLATED, stream_zip
+from app.services.submission import SubmissionService
 
 logger = logging.getLogger(__name__)
 
@@ -17,15 +22,92 @@ logger = logging.getLogger(__name__)
 class ExportService:
     """批量导出服务"""
     
+    # 压缩策略: auto 按文件类型选择，stored 全部仅存储，deflated 全部压缩
+    COMPRESSION_MODES = ("auto", "stored", "deflated")
+    
+    # 本身已压缩的文件类别（对应 SubmissionService.FILE_TYPE_MAP）
+    COMPRESSED_CATEGORIES = ("image", "video", "archive")
+    
+    # 基于ZIP容器的Office文档
+    COMPRESSED_EXTENSIONS = {".docx", ".xlsx", ".pptx"}
+    
+    # 已压缩的MIME类型前缀
+    COMPRESSED_MIME_PREFIXES = ("image/", "video/", "audio/")
+    
+    # 未知类型的压缩率探测：取文件开头的样本做快速压缩
+    PROBE_SIZE = 64 * 1024
+    PROBE_MIN_RATIO = 0.95
+    
     @staticmethod
-    def export_task_submissions(
+    def _probe_compressible(file_path: str) -> bool:
+        """对文件开头采样做一次快速压缩，压缩率过低则视为不可压缩"""
+        try:
+            with open(file_path, "rb") as f:
+                sample = f.read(ExportService.PROBE_SIZE)
+        except OSError:
+            return True
+        if not sample:
+            return True
+        return len(zlib.compress(sample, 1)) / len(sample) < ExportService.PROBE_MIN_RATIO
+    
+    @staticmethod
+    def choose_compress_type(
+        filename: Optional[str],
+        file_type: Optional[str] = None,
+        file_path: Optional[str] = None,
+        mode: str = "auto"
+    ) -> int:
+        """
+        选择条目的压缩方式
+        
+        已压缩的图片/视频/压缩包/Office文档使用 STORED，文本类使用 DEFLATED，
+        未知类型对文件开头采样探测压缩率。
+        """
+        if mode == "stored":
+            return ZIP_STORED
+        if mode == "deflated":
+            return ZIP_DEFLATED
+        
+        ext = os.path.splitext(filename or "")[1].lower()
+        for category in ExportService.COMPRESSED_CATEGORIES:
+            if ext in SubmissionService.FILE_TYPE_MAP[category]:
+                return ZIP_STORED
+        if ext in ExportService.COMPRESSED_EXTENSIONS:
+            return ZIP_STORED
+        if ext in SubmissionService.FILE_TYPE_MAP["document"] or ext in SubmissionService.FILE_TYPE_MAP["text"]:
+            return ZIP_DEFLATED
+        
+        if file_type and file_type.lower().startswith(ExportService.COMPRESSED_MIME_PREFIXES):
+            return ZIP_STORED
+        
+        if file_path and not ExportService._probe_compressible(file_path):
+            return ZIP_STORED
+        return ZIP_DEFLATED
+    
+    @staticmethod
+    def build_export_entries(
         db: Session,
         task_id: int,
         member_ids: Optional[List[int]] = None,
-        naming_format: Optional[str] = None
-    ) -> Tuple[BytesIO, str, int, int]:
-        """导出任务的提交文件（每人一个文件夹）"""
-        logger.info(f"[导出] 开始导出 task_id={task_id}")
+        naming_format: Optional[str] = None,
+        compression: Optional[str] = None,
+        since: Optional[datetime] = None,
+        allow_empty: bool = False
+    ) -> Tuple[Task, List[ZipEntry], int, int]:
+        """
+        构建导出条目（元数据预处理，不读取文件内容）
+        
+        Args:
+            since: 只包含该时间之后新增或更新的提交
+            allow_empty: 没有内容时返回空列表而不是报错（增量导出）
+        
+        Returns:
+            (任务, ZIP条目列表, 文件数, 总大小)
+        """
+        mode = compression or "auto"
+        if mode not in ExportService.COMPRESSION_MODES:
+            raise ValueError(f"不支持的压缩方式: {compression}，可选: {', '.join(ExportService.COMPRESSION_MODES)}")
+        text_compress_type = ZIP_STORED if mode == "stored" else ZIP_DEFLATED
         
         task = db.query(Task).filter(Task.id == task_id).first()
         if not task:
@@ -33,79 +115,264 @@ class ExportService:
         
         format_template = naming_format or task.naming_format or "{student_id}_{name}"
         
-        query = db.query(Submission).filter(Submission.task_id == task_id)
+        query = ExportService._query_with_members(db, task_id)
         if member_ids:
             query = query.filter(Submission.member_id.in_(member_ids))
+        if since:
+            query = query.filter(Submission.updated_at >= since)
         
-        submissions = query.all()
-        if not submissions:
+        rows = query.all()
+        if not rows and not allow_empty:
             raise ValueError("没有可导出的内容")
         
-        # 按成员分组
-        member_submissions = {}
-        for s in submissions:
-            if s.member_id not in member_submissions:
-                member_submissions[s.member_id] = []
-            member_submissions[s.member_id].append(s)
-        
-        zip_buffer = BytesIO()
-        file_count = 0
+        entries = []
         total_size = 0
         existing_folders = set()
         
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
-            for member_id, subs in member_submissions.items():
-                member = db.query(Member).filter(Member.id == member_id).first()
-                if not member:
-                    continue
-                
-                member_data = {
-                    "student_id": member.student_id,
-                    "name": member.name,
-                    "gender": member.gender or "",
-                    "dormitory": member.dormitory or "",
-                }
-                folder_name = apply_naming_format(format_template, member_data, "")
+        for member, subs in ExportService._group_by_member(rows):
+            folder_name = ExportService._member_folder(format_template, member)
+            
+            base_folder = folder_name
+            counter = 1
+            while folder_name in existing_folders:
+                folder_name = f"{base_folder}_{counter}"
+                counter += 1
+            existing_folders.add(folder_name)
+            
+            for idx, sub in enumerate(subs, 1):
+                mtime = sub.updated_at.timestamp() if sub.updated_at else None
                 
-                base_folder = folder_name
-                counter = 1
-                while folder_name in existing_folders:
-                    folder_name = f"{base_folder}_{counter}"
-                    counter += 1
-                existing_folders.add(folder_name)
+                if sub.submission_type == "text" and sub.text_content:
+                    fname = f"文本_{idx}.txt" if len(subs) > 1 else "文本.txt"
+                    data = sub.text_content.encode('utf-8')
+                    entries.append(ZipEntry(
+                        f"{folder_name}/{fname}", data=data, size=len(data),
+                        compress_type=text_compress_type, mtime=mtime
+                    ))
+                    total_size += len(data)
                 
-                for idx, sub in enumerate(subs, 1):
-                    if sub.submission_type == "text" and sub.text_content:
-                        fname = f"文本_{idx}.txt" if len(subs) > 1 else "文本.txt"
-                        zf.writestr(f"{folder_name}/{fname}", sub.text_content.encode('utf-8'))
-                        file_count += 1
-                        total_size += len(sub.text_content.encode('utf-8'))
+                elif sub.submission_type == "questionnaire" and sub.questionnaire_answers:
+                    answers = sub.questionnaire_answers
+                    jname = f"问卷_{idx}.json" if len(subs) > 1 else "问卷.json"
+                    jcontent = json.dumps(answers, ensure_ascii=False, indent=2).encode('utf-8')
+                    entries.append(ZipEntry(
+                        f"{folder_name}/{jname}", data=jcontent, size=len(jcontent),
+                        compress_type=text_compress_type, mtime=mtime
+                    ))
                     
-                    elif sub.submission_type == "questionnaire" and sub.questionnaire_answers:
-                        answers = sub.questionnaire_answers
-                        jname = f"问卷_{idx}.json" if len(subs) > 1 else "问卷.json"
-                        jcontent = json.dumps(answers, ensure_ascii=False, indent=2)
-                        zf.writestr(f"{folder_name}/{jname}", jcontent.encode('utf-8'))
-                        
-                        tname = f"问卷_{idx}.txt" if len(subs) > 1 else "问卷.txt"
-                        tcontent = ExportService._format_answers(task, answers)
-                        zf.writestr(f"{folder_name}/{tname}", tcontent.encode('utf-8'))
-                        
-                        file_count += 2
-                        total_size += len(jcontent) + len(tcontent)
+                    tname = f"问卷_{idx}.txt" if len(subs) > 1 else "问卷.txt"
+                    tcontent = ExportService._format_answers(task, answers).encode('utf-8')
+                    entries.append(ZipEntry(
+                        f"{folder_name}/{tname}", data=tcontent, size=len(tcontent),
+                        compress_type=text_compress_type, mtime=mtime
+                    ))
                     
-                    elif sub.file_path and os.path.exists(sub.file_path):
-                        orig = sub.original_filename or f"file_{idx}"
-                        zf.write(sub.file_path, f"{folder_name}/{orig}")
-                        file_count += 1
-                        total_size += sub.file_size or 0
-        
-        zip_buffer.seek(0)
+                    total_size += len(jcontent) + len(tcontent)
+                
+                elif sub.file_path and os.path.exists(sub.file_path):
+                    orig = sub.original_filename or f"file_{idx}"
+                    entries.append(ZipEntry(
+                        f"{folder_name}/{orig}",
+                        file_path=sub.file_path,
+                        size=sub.file_size or 0,
+                        compress_type=ExportService.choose_compress_type(
+                            orig, sub.file_type, sub.file_path, mode
+                        ),
+                        mtime=mtime
+                    ))
+                    total_size += sub.file_size or 0
         
-        if file_count == 0:
+        if not entries and not allow_empty:
             raise ValueError("没有可导出的文件")
         
-        return zip_buffer, f"{task.title}_提交文件.zip", file_count, total_size
+        return task, entries, len(entries), total_size
+    
+    @staticmethod
+    def _query_with_members(db: Session, task_id: int, submission_type: Optional[str] = None):
+        """查询任务的提交及其成员（一次JOIN，避免逐条查询成员）"""
+        query = db.query(Submission, Member).join(
+            Member, Member.id == Submission.member_id
+        ).filter(Submission.task_id == task_id)
+        if submission_type:
+            query = query.filter(Submission.submission_type == submission_type)
+        return query.order_by(Submission.id)
+    
+    @staticmethod
+    def _group_by_member(rows: List[Tuple[Submission, Member]]) -> List[Tuple[Member, List[Submission]]]:
+        """按成员分组（保持首次出现的顺序）"""
+        groups = {}
+        for submission, member in rows:
+            if member.id not in groups:
+                groups[member.id] = (member, [])
+            groups[member.id][1].append(submission)
+        return list(groups.values())
+    
+    @staticmethod
+    def _member_folder(format_template: str, member: Member) -> str:
+        """按命名格式生成成员文件夹名"""
+        member_data = {
+            "student_id": member.student_id,
+            "name": member.name,
+            "gender": member.gender or "",
+            "dormitory": member.dormitory or "",
+        }
+        return apply_naming_format(format_template, member_data, "")
+    
+    @staticmethod
+    def export_task_submissions(
+        db: Session,
+        task_id: int,
+        member_ids: Optional[List[int]] = None,
+        naming_format: Optional[str] = None,
+        compression: Optional[str] = None
+    ) -> Tuple[Iterator[bytes], str, int, int]:
+        """
+        导出任务的提交文件（每人一个文件夹）
+        
+        先完成元数据预处理（文件数、总大小），ZIP内容在响应输出时边压缩边发送。
+        
+        Returns:
+            (ZIP字节流, 文件名, 文件数, 总大小)
+        """
+        logger.info(f"[导出] 开始导出 task_id={task_id}")
+        
+        task, entries, file_count, total_size = ExportService.build_export_entries(
+            db, task_id, member_ids, naming_format, compression
+        )
+        
+        workers = ExportService.get_export_workers()
+        return stream_zip(entries, workers=workers), f"{task.title}_提交文件.zip", file_count, total_size
+    
+    @staticmethod
+    def get_export_workers() -> int:
+        """获取导出压缩线程数"""
+        if settings.export_workers > 0:
+            return settings.export_workers
+        return os.cpu_count() or 1
+    
+    @staticmethod
+    def _watermark_key(task_id: int) -> str:
+        return f"export_watermark_{task_id}"
+    
+    @staticmethod
+    def get_watermark(db: Session, task_id: int) -> Optional[datetime]:
+        """获取任务上次增量导出的时间点"""
+        setting = db.query(Setting).filter(Setting.key == ExportService._watermark_key(task_id)).first()
+        if not setting or not setting.value:
+            return None
+        return datetime.fromisoformat(setting.value)
+    
+    @staticmethod
+    def set_watermark(db: Session, task_id: int, watermark: datetime) -> None:
+        """记录任务本次增量导出的时间点"""
+        key = ExportService._watermark_key(task_id)
+        setting = db.query(Setting).filter(Setting.key == key).first()
+        if setting:
+            setting.value = watermark.isoformat()
+        else:
+            db.add(Setting(key=key, value=watermark.isoformat()))
+        db.commit()
+    
+    @staticmethod
+    def build_removed_manifest(
+        db: Session,
+        task: Task,
+        format_template: str,
+        since: Optional[datetime]
+    ) -> List[dict]:
+        """列出 since 之后被删除或被替换的提交"""
+        query = db.query(SubmissionTombstone, Member).outerjoin(
+            Member, Member.id == SubmissionTombstone.member_id
+        ).filter(SubmissionTombstone.task_id == task.id)
+        if since:
+            query = query.filter(SubmissionTombstone.removed_at >= since)
+        
+        removed = []
+        for tombstone, member in query.order_by(SubmissionTombstone.id).all():
+            folder = ExportService._member_folder(format_template, member) if member else None
+            path = None
+            if folder and tombstone.original_filename and tombstone.submission_type in ("file", "image"):
+                path = f"{folder}/{tombstone.original_filename}"
+            removed.append({
+                "member_id": tombstone.member_id,
+                "student_id": member.student_id if member else None,
+                "name": member.name if member else None,
+                "folder": folder,
+                "path": path,
+                "submission_type": tombstone.submission_type,
+                "item_index": tombstone.item_index,
+                "original_filename": tombstone.original_filename,
+                "reason": tombstone.reason,
+                "removed_at": tombstone.removed_at.isoformat() if tombstone.removed_at else None,
+            })
+        return removed
+    
+    @staticmethod
+    def export_task_delta(
+        db: Session,
+        task_id: int,
+        since: Optional[datetime] = None,
+        member_ids: Optional[List[int]] = None,
+        naming_format: Optional[str] = None,
+        compression: Optional[str] = None,
+        use_watermark: bool = False
+    ) -> Tuple[Iterator[bytes], str, int, int]:
+        """
+        增量导出：只包含 since 之后新增或更新的提交，并附带 _manifest.json 删除清单
+        
+        use_watermark 为 True 且未指定 since 时，从上次增量导出的时间点开始
+        （首次则为全量），并在压缩包完整输出后记录本次时间点。
+        
+        Returns:
+            (ZIP字节流, 文件名, 文件数, 总大小)
+        """
+        # 数据库时间精度为秒，取整并在查询时使用 >=，宁可重复也不遗漏
+        until = datetime.now().replace(microsecond=0)
+        if since is None and use_watermark:
+            since = ExportService.get_watermark(db, task_id)
+        logger.info(f"[导出] 开始增量导出 task_id={task_id}, since={since}")
+        
+        task, entries, file_count, total_size = ExportService.build_export_entries(
+            db, task_id, member_ids, naming_format, compression, since=since, allow_empty=True
+        )
+        format_template = naming_format or task.naming_format or "{student_id}_{name}"
+        
+        manifest = {
+            "task_id": task.id,
+            "task_title": task.title,
+            "mode": "delta" if since else "full",
+            "since": since.isoformat() if since else None,
+            "until": until.isoformat(),
+            "updated": [entry.arcname for entry in entries],
+            "removed": ExportService.build_removed_manifest(db, task, format_template, since),
+        }
+        manifest_data = json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8')
+        entries.append(ZipEntry("_manifest.json", data=manifest_data, size=len(manifest_data)))
+        
+        stream = stream_zip(entries, workers=ExportService.get_export_workers())
+        if use_watermark:
+            stream = ExportService._record_watermark_after(task.id, until, stream)
+        
+        filename = f"{task.title}_增量_{until.strftime('%Y%m%d%H%M%S')}.zip"
+        return stream, filename, file_count, total_size
+    
+    @staticmethod
+    def _record_watermark_after(
+        task_id: int,
+        watermark: datetime,
+        stream: Iterator[bytes]
+    ) -> Iterator[bytes]:
+        """
+        压缩包完整输出后再记录时间点，下载中断时下次仍从旧时间点开始
+
+        此时请求会话已关闭，使用独立会话写入。
+        """
+        yield from stream
+        db = SessionLocal()
+        try:
+            ExportService.set_watermark(db, task_id, watermark)
+        finally:
+            db.close()
     
     @staticmethod
     def _format_answers(task: Task, answers: dict) -> str:
@@ -129,19 +396,14 @@ class ExportService:
         if not task:
             raise ValueError("任务不存在")
         
-        subs = db.query(Submission).filter(
-            Submission.task_id == task_id,
-            Submission.submission_type == "text"
-        ).all()
+        rows = ExportService._query_with_members(db, task_id, "text").all()
         
         lines = [f"文本汇总 - {task.title}", "=" * 50, ""]
-        for s in subs:
-            m = db.query(Member).filter(Member.id == s.member_id).first()
-            if m:
-                lines.append(f"【{m.student_id} - {m.name}】")
-                lines.append(s.text_content or "(空)")
-                lines.append("-" * 30)
-                lines.append("")
+        for s, m in rows:
+            lines.append(f"【{m.student_id} - {m.name}】")
+            lines.append(s.text_content or "(空)")
+            lines.append("-" * 30)
+            lines.append("")
         
         content = "\n".join(lines)
         buf = BytesIO(content.encode('utf-8'))
@@ -155,28 +417,11 @@ class ExportService:
         if not task:
             return []
         
-        submissions = db.query(Submission).filter(Submission.task_id == task_id).all()
-        
-        # 按成员分组
-        member_submissions = {}
-        for s in submissions:
-            if s.member_id not in member_submissions:
-                member_submissions[s.member_id] = []
-            member_submissions[s.member_id].append(s)
+        rows = ExportService._query_with_members(db, task_id).all()
         
         preview = []
-        for member_id, subs in member_submissions.items():
-            member = db.query(Member).filter(Member.id == member_id).first()
-            if not member:
-                continue
-            
-            member_data = {
-                "student_id": member.student_id,
-                "name": member.name,
-                "gender": member.gender or "",
-                "dormitory": member.dormitory or "",
-            }
-            folder_name = apply_naming_format(naming_format, member_data, "")
+        for member, subs in ExportService._group_by_member(rows):
+            folder_name = ExportService._member_folder(naming_format, member)
             
             files = []
             for idx, sub in enumerate(subs, 1):
@@ -202,21 +447,16 @@ class ExportService:
         if not task:
             return []
         
-        subs = db.query(Submission).filter(
-            Submission.task_id == task_id,
-            Submission.submission_type == "text"
-        ).all()
+        rows = ExportService._query_with_members(db, task_id, "text").all()
         
         result = []
-        for s in subs:
-            m = db.query(Member).filter(Member.id == s.member_id).first()
-            if m:
-                result.append({
-                    "member_name": m.name,
-                    "student_id": m.student_id,
-                    "content": s.text_content or "",
-                    "created_at": s.created_at.isoformat() if s.created_at else None
-                })
+        for s, m in rows:
+            result.append({
+                "member_name": m.name,
+                "student_id": m.student_id,
+                "content": s.text_content or "",
+                "created_at": s.created_at.isoformat() if s.created_at else None
+            })
         
         return result
     
@@ -227,34 +467,29 @@ class ExportService:
         if not task:
             return []
         
-        subs = db.query(Submission).filter(
-            Submission.task_id == task_id,
-            Submission.submission_type == "questionnaire"
-        ).all()
+        rows = ExportService._query_with_members(db, task_id, "questionnaire").all()
         
         config = task.questionnaire_config or []
         
         result = []
-        for s in subs:
-            m = db.query(Member).filter(Member.id == s.member_id).first()
-            if m:
-                answers = s.questionnaire_answers or {}
-                # 格式化答案，添加问题标题
-                formatted_answers = []
-                for i, q in enumerate(config):
-                    ans = answers.get(str(i), answers.get(i, ""))
-                    formatted_answers.append({
-                        "question": q.get("title", f"问题{i+1}"),
-                        "answer": ans if not isinstance(ans, list) else ", ".join(ans),
-                        "type": q.get("type", "text")
-                    })
-                
-                result.append({
-                    "member_name": m.name,
-                    "student_id": m.student_id,
-                    "answers": formatted_answers,
-                    "raw_answers": answers,
-                    "created_at": s.created_at.isoformat() if s.created_at else None
+        for s, m in rows:
+            answers = s.questionnaire_answers or {}
+            # 格式化答案，添加问题标题
+            formatted_answers = []
+            for i, q in enumerate(config):
+                ans = answers.get(str(i), answers.get(i, ""))
+                formatted_answers.append({
+                    "question": q.get("title", f"问题{i+1}"),
+                    "answer": ans if not isinstance(ans, list) else ", ".join(ans),
+                    "type": q.get("type", "text")
                 })
+            
+            result.append({
+                "member_name": m.name,
+                "student_id": m.student_id,
+                "answers": formatted_answers,
+                "raw_answers": answers,
+                "created_at": s.created_at.isoformat() if s.created_at else None
+            })
         
         return result
@@ -0,0 +1,201 @@
+"""导出结果缓存服务"""
+from typing import Iterator, List, Optional
+import hashlib
+import json
+import os
+import uuid
+import logging
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models import Task, Submission, Member
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ExportCacheService:
+    """
+    导出结果缓存服务
+
+    已完成的导出压缩包保存在 upload_dir/export_cache 下，文件名为
+    <task_id>_<缓存键>.zip，缓存键由导出参数和任务内容版本共同决定，
+    内容变化后旧缓存自然失效。按最近访问时间（mtime）做容量上限内的LRU淘汰。
+    """
+
+    # 缓存目录（位于 upload_dir 下）
+    CACHE_DIR = "export_cache"
+
+    @staticmethod
+    def get_cache_dir() -> str:
+        """获取缓存目录"""
+        cache_dir = os.path.join(settings.upload_dir, ExportCacheService.CACHE_DIR)
+        os.makedirs(cache_dir, exist_ok=True)
+        return cache_dir
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """是否启用导出缓存"""
+        return settings.export_cache_max_bytes > 0
+
+    @staticmethod
+    def get_cache_key(
+        db: Session,
+        task_id: int,
+        member_ids: Optional[List[int]] = None,
+        naming_format: Optional[str] = None,
+        compression: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        计算缓存键
+
+        内容版本取提交数、提交次数之和、最大提交ID以及提交和成员的最后更新时间，
+        任何提交新增、覆盖、删除或成员改名都会得到新的键。
+
+        Returns:
+            缓存键，任务不存在时返回 None
+        """
+        task = db.query(Task).filter(Task.id == task_id).first()
+        if not task:
+            return None
+
+        query = db.query(
+            func.count(Submission.id),
+            func.sum(Submission.upload_count),
+            func.max(Submission.id),
+            func.max(Submission.updated_at),
+            func.max(Member.updated_at)
+        ).join(Member, Member.id == Submission.member_id).filter(Submission.task_id == task_id)
+        if member_ids:
+            query = query.filter(Submission.member_id.in_(member_ids))
+        count, upload_total, max_id, submission_updated, member_updated = query.one()
+
+        parts = {
+            "task_id": task_id,
+            "member_ids": sorted(set(member_ids)) if member_ids else None,
+            "naming_format": naming_format or task.naming_format or "{student_id}_{name}",
+            "compression": compression or "auto",
+            "task_updated": str(task.updated_at),
+            "version": [count, upload_total, max_id, str(submission_updated), str(member_updated)],
+        }
+        digest = hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+        return f"{task_id}_{digest[:32]}"
+
+    @staticmethod
+    def _paths(key: str):
+        base = os.path.join(ExportCacheService.get_cache_dir(), key)
+        return base + ".zip", base + ".json"
+
+    @staticmethod
+    def get(key: str) -> Optional[dict]:
+        """
+        读取缓存
+
+        Returns:
+            命中时返回 {"path", "filename", "file_count", "total_size"}，否则返回 None
+        """
+        zip_path, meta_path = ExportCacheService._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            os.utime(zip_path)
+        except (OSError, ValueError):
+            return None
+
+        meta["path"] = zip_path
+        logger.info(f"[导出缓存] 命中 {key}")
+        return meta
+
+    @staticmethod
+    def store_stream(
+        key: str,
+        chunks: Iterator[bytes],
+        filename: str,
+        file_count: int,
+        total_size: int
+    ) -> Iterator[bytes]:
+        """
+        边输出边写入缓存
+
+        完整输出后才落为正式缓存；客户端中途断开或出错时丢弃临时文件。
+        """
+        zip_path, meta_path = ExportCacheService._paths(key)
+        part_path = f"{zip_path}.{uuid.uuid4().hex}.part"
+        completed = False
+        try:
+            with open(part_path, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    yield chunk
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"filename": filename, "file_count": file_count, "total_size": total_size}, f, ensure_ascii=False)
+            os.replace(part_path, zip_path)
+            completed = True
+        finally:
+            if not completed and os.path.exists(part_path):
+                os.remove(part_path)
+
+        ExportCacheService.evict()
+
+    @staticmethod
+    def _remove(zip_path: str) -> None:
+        for path in (zip_path, os.path.splitext(zip_path)[0] + ".json"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    @staticmethod
+    def evict(max_bytes: Optional[int] = None) -> int:
+        """
+        按最近访问时间淘汰缓存，直到总大小不超过上限
+
+        Returns:
+            淘汰的缓存数量
+        """
+        if max_bytes is None:
+            max_bytes = settings.export_cache_max_bytes
+
+        cache_dir = ExportCacheService.get_cache_dir()
+        files = []
+        for name in os.listdir(cache_dir):
+            if not name.endswith(".zip"):
+                continue
+            path = os.path.join(cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= max_bytes:
+                break
+            ExportCacheService._remove(path)
+            total -= size
+            removed += 1
+
+        if removed:
+            logger.info(f"[导出缓存] 淘汰 {removed} 个缓存")
+        return removed
+
+    @staticmethod
+    def invalidate_task(task_id: int) -> int:
+        """
+        删除任务的全部导出缓存（提交变化时调用）
+
+        Returns:
+            删除的缓存数量
+        """
+        cache_dir = os.path.join(settings.upload_dir, ExportCacheService.CACHE_DIR)
+        if not os.path.isdir(cache_dir):
+            return 0
+
+        prefix = f"{task_id}_"
+        removed = 0
+        for name in os.listdir(cache_dir):
+            if name.startswith(prefix) and name.endswith(".zip"):
+                ExportCacheService._remove(os.path.join(cache_dir, name))
+                removed += 1
+        return removed
@@ -0,0 +1,206 @@
+"""后台导出任务服务"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+import os
+import time
+import uuid
+import logging
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.models import ExportJob, Task
+from app.config import settings
+from app.database import SessionLocal
+from app.services.export import ExportService
+from app.utils.zip_stream import ZipEntry, stream_zip
+
+logger = logging.getLogger(__name__)
+
+
+class ExportJobService:
+    """
+    后台导出任务服务
+
+    提交后立即返回任务ID，由后台线程复用 ExportService 的分组和命名逻辑
+    将压缩包写入 upload_dir/exports，完成后在过期前可随时下载。
+    """
+
+    # 导出文件目录（位于 upload_dir 下）
+    EXPORT_DIR = "exports"
+
+    # 进度写入数据库的最小间隔（秒）
+    PROGRESS_INTERVAL = 1.0
+
+    _executor: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def get_executor(cls) -> ThreadPoolExecutor:
+        """获取后台导出线程池"""
+        if cls._executor is None:
+            cls._executor = ThreadPoolExecutor(
+                max_workers=max(settings.export_job_workers, 1),
+                thread_name_prefix="export-job"
+            )
+        return cls._executor
+
+    @staticmethod
+    def get_export_dir() -> str:
+        """获取导出文件目录"""
+        export_dir = os.path.join(settings.upload_dir, ExportJobService.EXPORT_DIR)
+        os.makedirs(export_dir, exist_ok=True)
+        return export_dir
+
+    @staticmethod
+    def get_job(db: Session, job_id: str) -> Optional[ExportJob]:
+        """获取导出任务"""
+        return db.query(ExportJob).filter(ExportJob.id == job_id).first()
+
+    @staticmethod
+    def create_job(
+        db: Session,
+        task_id: int,
+        member_ids: Optional[List[int]] = None,
+        naming_format: Optional[str] = None,
+        compression: Optional[str] = None
+    ) -> ExportJob:
+        """创建导出任务（不立即执行）"""
+        if compression and compression not in ExportService.COMPRESSION_MODES:
+            raise ValueError(f"不支持的压缩方式: {compression}，可选: {', '.join(ExportService.COMPRESSION_MODES)}")
+        if not db.query(Task.id).filter(Task.id == task_id).first():
+            raise ValueError("任务不存在")
+
+        job = ExportJob(
+            id=uuid.uuid4().hex,
+            task_id=task_id,
+            member_ids=member_ids or None,
+            naming_format=naming_format,
+            compression=compression,
+            status="pending"
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        logger.info(f"[导出任务] 创建 {job.id}: task_id={task_id}")
+        return job
+
+    @classmethod
+    def submit_job(
+        cls,
+        db: Session,
+        task_id: int,
+        member_ids: Optional[List[int]] = None,
+        naming_format: Optional[str] = None,
+        compression: Optional[str] = None
+    ) -> ExportJob:
+        """创建导出任务并交给后台线程执行"""
+        job = cls.create_job(db, task_id, member_ids, naming_format, compression)
+        cls.get_executor().submit(cls.run_job, job.id)
+        return job
+
+    @staticmethod
+    def run_job(job_id: str, session_factory: Callable[[], Session] = SessionLocal) -> None:
+        """执行导出任务（在后台线程中调用，使用独立的数据库会话）"""
+        db = session_factory()
+        part_path = None
+        try:
+            job = ExportJobService.get_job(db, job_id)
+            if not job or job.status != "pending":
+                return
+
+            job.status = "running"
+            db.commit()
+
+            task, entries, file_count, total_size = ExportService.build_export_entries(
+                db, job.task_id, job.member_ids, job.naming_format, job.compression
+            )
+            job.filename = f"{task.title}_提交文件.zip"
+            job.total_files = file_count
+            job.total_bytes = total_size
+            db.commit()
+
+            last_commit = time.monotonic()
+
+            def on_progress(entry: ZipEntry) -> None:
+                nonlocal last_commit
+                job.processed_files += 1
+                job.processed_bytes += entry.size
+                if time.monotonic() - last_commit >= ExportJobService.PROGRESS_INTERVAL:
+                    db.commit()
+                    last_commit = time.monotonic()
+
+            file_path = os.path.join(ExportJobService.get_export_dir(), f"{job_id}.zip")
+            part_path = file_path + ".part"
+            workers = ExportService.get_export_workers()
+            with open(part_path, "wb") as f:
+                for chunk in stream_zip(entries, progress=on_progress, workers=workers):
+                    f.write(chunk)
+            os.replace(part_path, file_path)
+            part_path = None
+
+            job.status = "done"
+            job.file_path = file_path
+            job.file_size = os.path.getsize(file_path)
+            job.finished_at = datetime.now()
+            job.expires_at = job.finished_at + timedelta(hours=settings.export_job_expire_hours)
+            db.commit()
+            logger.info(f"[导出任务] 完成 {job_id}: {job.processed_files} 个文件, {job.file_size} 字节")
+
+        except Exception as e:
+            logger.error(f"[导出任务] 失败 {job_id}: {e}")
+            db.rollback()
+            job = ExportJobService.get_job(db, job_id)
+            if job:
+                job.status = "failed"
+                job.error = str(e)
+                job.finished_at = datetime.now()
+                job.expires_at = job.finished_at + timedelta(hours=settings.export_job_expire_hours)
+                db.commit()
+        finally:
+            if part_path and os.path.exists(part_path):
+                os.remove(part_path)
+            db.close()
+
+    @staticmethod
+    def get_download_path(db: Session, job_id: str) -> Optional[str]:
+        """获取已完成且未过期的导出文件路径"""
+        job = ExportJobService.get_job(db, job_id)
+        if not job or job.status != "done" or not job.file_path:
+            return None
+        if job.expires_at and job.expires_at <= datetime.now():
+            return None
+        if not os.path.exists(job.file_path):
+            return None
+        return job.file_path
+
+    @staticmethod
+    def cleanup_expired_jobs(db: Session) -> int:
+        """
+        清理过期的导出任务及其文件
+
+        创建后超过保留时长仍未结束的任务（如服务重启导致中断）一并清理。
+
+        Returns:
+            清理的任务数量
+        """
+        now = datetime.now()
+        stale_before = now - timedelta(hours=settings.export_job_expire_hours)
+        expired = db.query(ExportJob).filter(
+            or_(
+                and_(ExportJob.expires_at != None, ExportJob.expires_at <= now),
+                and_(ExportJob.status.in_(["pending", "running"]), ExportJob.created_at <= stale_before)
+            )
+        ).all()
+        for job in expired:
+            if job.file_path and os.path.exists(job.file_path):
+                os.remove(job.file_path)
+            part_path = os.path.join(ExportJobService.get_export_dir(), f"{job.id}.zip.part")
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            db.delete(job)
+        db.commit()
+
+        if expired:
+            logger.info(f"[导出任务] 清理过期任务 {len(expired)} 个")
+        return len(expired)
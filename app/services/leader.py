@@ -0,0 +1,178 @@
+"""定时任务领导权选举服务"""
+from datetime import timedelta
+from typing import Callable, Optional
+import os
+import socket
+import threading
+import time
+import uuid
+import logging
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import SchedulerLease
+from app.config import settings
+from app.database import SessionLocal, db_now
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderService:
+    """
+    定时任务领导权选举服务
+
+    多个 worker 进程通过 scheduler_leases 表中的一行租约竞争领导权：
+    持有者每 scheduler_lease_heartbeat_seconds 秒续约一次，租约过期（持有者退出或失联）后
+    其他进程在下一次心跳时接管。租约时间按数据库时钟计算和比较，不受主机间时钟偏差影响。
+    只有领导者运行定时任务和邮件队列，其余进程的调度器保持暂停。
+    未启动选举时（单进程运行、脚本、测试）视为领导者。
+    """
+
+    # 租约名称
+    LEASE_NAME = "scheduler"
+
+    holder_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    _lock = threading.Lock()
+    _thread: Optional[threading.Thread] = None
+    _stop_event: Optional[threading.Event] = None
+    _is_leader = False
+    # 本机单调时钟下租约的保守到期时间（数据库不可用时判断是否仍持有）
+    _lease_deadline: Optional[float] = None
+    _on_acquire: Optional[Callable[[], None]] = None
+    _on_lose: Optional[Callable[[], None]] = None
+
+    @classmethod
+    def is_leader(cls) -> bool:
+        """当前进程是否应运行后台任务"""
+        with cls._lock:
+            return cls._thread is None or cls._is_leader
+
+    @classmethod
+    def try_acquire(cls, db: Session, holder: Optional[str] = None) -> bool:
+        """
+        续约或抢占租约（条件更新，保证同一时刻只有一个持有者）
+
+        Returns:
+            是否持有租约
+        """
+        holder = holder or cls.holder_id
+        now = db_now(db)
+        expires_at = now + timedelta(seconds=settings.scheduler_lease_ttl_seconds)
+
+        updated = db.query(SchedulerLease).filter(
+            SchedulerLease.name == cls.LEASE_NAME,
+            or_(SchedulerLease.holder == holder, SchedulerLease.expires_at < now)
+        ).update(
+            {SchedulerLease.holder: holder, SchedulerLease.expires_at: expires_at, SchedulerLease.renewed_at: now},
+            synchronize_session=False
+        )
+        db.commit()
+        if updated:
+            return True
+
+        if db.query(SchedulerLease.name).filter(SchedulerLease.name == cls.LEASE_NAME).first():
+            return False
+        try:
+            db.add(SchedulerLease(name=cls.LEASE_NAME, holder=holder, expires_at=expires_at, renewed_at=now))
+            db.commit()
+            return True
+        except IntegrityError:
+            # 其他进程同时创建了租约
+            db.rollback()
+            return False
+
+    @classmethod
+    def release(cls, db: Session, holder: Optional[str] = None) -> None:
+        """主动释放租约，其他进程可立即接管"""
+        db.query(SchedulerLease).filter(
+            SchedulerLease.name == cls.LEASE_NAME,
+            SchedulerLease.holder == (holder or cls.holder_id)
+        ).update({SchedulerLease.expires_at: db_now(db) - timedelta(seconds=1)}, synchronize_session=False)
+        db.commit()
+
+    @classmethod
+    def heartbeat(cls, session_factory: Callable[[], Session] = SessionLocal) -> bool:
+        """执行一次续约/抢占，并在领导权变化时调用回调"""
+        db = session_factory()
+        try:
+            acquired = cls.try_acquire(db)
+        except Exception as e:
+            logger.error(f"[领导选举] 续约失败: {e}")
+            db.rollback()
+            # 无法访问数据库时，本地记录的租约到期前仍视为持有
+            with cls._lock:
+                acquired = cls._is_leader and cls._lease_deadline is not None and cls._lease_deadline > time.monotonic()
+        finally:
+            db.close()
+
+        with cls._lock:
+            was_leader = cls._is_leader
+            cls._is_leader = acquired
+            if acquired:
+                # 留出一个心跳间隔的余量，确保在其他进程可以接管之前主动放弃
+                cls._lease_deadline = time.monotonic() + (
+                    settings.scheduler_lease_ttl_seconds - settings.scheduler_lease_heartbeat_seconds
+                )
+            on_acquire, on_lose = cls._on_acquire, cls._on_lose
+
+        if acquired and not was_leader:
+            logger.info(f"[领导选举] {cls.holder_id} 成为定时任务领导者")
+            if on_acquire:
+                on_acquire()
+        elif was_leader and not acquired:
+            logger.warning(f"[领导选举] {cls.holder_id} 失去领导权")
+            if on_lose:
+                on_lose()
+        return acquired
+
+    @classmethod
+    def _run(cls, stop_event: threading.Event) -> None:
+        while not stop_event.is_set():
+            try:
+                cls.heartbeat()
+            except Exception as e:
+                logger.error(f"[领导选举] 心跳异常: {e}")
+            stop_event.wait(settings.scheduler_lease_heartbeat_seconds)
+
+    @classmethod
+    def start(cls, on_acquire: Callable[[], None], on_lose: Callable[[], None]) -> None:
+        """启动心跳线程（立即进行第一次选举）"""
+        with cls._lock:
+            if cls._thread is not None:
+                return
+            cls._on_acquire = on_acquire
+            cls._on_lose = on_lose
+            cls._stop_event = threading.Event()
+            cls._thread = threading.Thread(
+                target=cls._run, args=(cls._stop_event,), name="scheduler-leader", daemon=True
+            )
+        cls._thread.start()
+
+    @classmethod
+    def stop(cls) -> None:
+        """停止心跳并释放租约"""
+        with cls._lock:
+            thread, stop_event = cls._thread, cls._stop_event
+            was_leader = cls._is_leader
+        if thread is None:
+            return
+        stop_event.set()
+        thread.join(timeout=5)
+
+        if was_leader:
+            db = SessionLocal()
+            try:
+                cls.release(db)
+            except Exception as e:
+                logger.error(f"[领导选举] 释放租约失败: {e}")
+            finally:
+                db.close()
+
+        with cls._lock:
+            cls._thread = None
+            cls._stop_event = None
+            cls._is_leader = False
+            cls._lease_deadline = None
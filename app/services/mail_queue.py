@@ -0,0 +1,246 @@
+"""提醒邮件发送队列服务"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+import asyncio
+import threading
+import uuid
+import logging
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.models import Task, Member, ReminderLog
+from app.config import settings
+from app.database import SessionLocal, db_now
+from app.schemas.reminder import ReminderQueued, ReminderProgress
+from app.services.email import EmailService
+from app.services.leader import LeaderService
+
+logger = logging.getLogger(__name__)
+
+
+class MailQueueService:
+    """
+    提醒邮件发送队列服务
+
+    reminder_logs 表即持久化队列：入队时为每个收件人写入 pending 记录并立即返回，
+    后台线程按批取出到期的 pending 记录交给 AsyncMailer 并发发送。
+    发送失败按指数退避（mail_queue_retry_base_seconds * 2^(n-1)）重新排队，
+    尝试 mail_queue_max_attempts 次仍失败则进入死信状态 dead。
+    SMTP熔断期间未尝试的邮件记为 deferred（不计入尝试次数），熔断器允许探测时重新取出。
+
+    队列只由领导者进程（见 LeaderService）的单个后台线程消费，其他进程入队后由领导者的
+    定时任务在 mail_queue_poll_seconds 内取走。取出时记录数据库时间，超过
+    mail_queue_claim_timeout_seconds 仍为 sending 的记录（发送进程已退出）会重新排队；
+    领导权切换时旧领导者正在发送的记录不受影响，避免重复发送。
+    """
+
+    # 自动提醒批次ID的前缀（用于区分手动提醒）
+    AUTO_BATCH_PREFIX = "auto-"
+    
+    _executor: Optional[ThreadPoolExecutor] = None
+    _drain_lock = threading.Lock()
+
+    @classmethod
+    def get_executor(cls) -> ThreadPoolExecutor:
+        """获取发送线程"""
+        if cls._executor is None:
+            cls._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mail-queue")
+        return cls._executor
+
+    @staticmethod
+    def enqueue(db: Session, task: Task, members: List[Member], batch_prefix: str = "") -> ReminderQueued:
+        """
+        为成员写入待发送的提醒记录
+
+        未设置邮箱的成员直接记为 failed，不进入队列。
+
+        Args:
+            batch_prefix: 批次ID前缀（如自动提醒的 AUTO_BATCH_PREFIX）
+        """
+        batch_id = batch_prefix + uuid.uuid4().hex[:32 - len(batch_prefix)]
+        queued = 0
+        errors = []
+        for member in members:
+            if not member.qq_email:
+                db.add(ReminderLog(
+                    task_id=task.id,
+                    member_id=member.id,
+                    email="",
+                    status="failed",
+                    error_message="成员未设置QQ邮箱",
+                    batch_id=batch_id
+                ))
+                errors.append(f"{member.name}: 未设置QQ邮箱")
+                continue
+            db.add(ReminderLog(
+                task_id=task.id,
+                member_id=member.id,
+                email=member.qq_email,
+                status="pending",
+                batch_id=batch_id
+            ))
+            queued += 1
+        db.commit()
+
+        logger.info(f"[邮件队列] 任务 {task.title} 入队 {queued} 封, 批次 {batch_id}")
+        return ReminderQueued(
+            batch_id=batch_id,
+            total=len(members),
+            queued=queued,
+            failed=len(members) - queued,
+            errors=errors
+        )
+
+    @classmethod
+    def enqueue_and_wake(cls, db: Session, task: Task, members: List[Member], batch_prefix: str = "") -> ReminderQueued:
+        """入队并唤醒后台发送线程"""
+        result = cls.enqueue(db, task, members, batch_prefix)
+        if result.queued:
+            cls.wake()
+        return result
+
+    @classmethod
+    def wake(cls) -> None:
+        """在后台线程中处理队列（仅领导者进程）"""
+        if LeaderService.is_leader():
+            cls.get_executor().submit(cls.drain)
+
+    @classmethod
+    def release_deferred(cls, db: Session) -> int:
+        """熔断器恢复后让延后的邮件立即可发，并唤醒发送线程"""
+        count = db.query(ReminderLog).filter(ReminderLog.status == "deferred").update(
+            {ReminderLog.next_attempt_at: None}, synchronize_session=False
+        )
+        db.commit()
+        if count:
+            cls.wake()
+        return count
+
+    @staticmethod
+    def get_retry_delay(attempts: int) -> timedelta:
+        """第 attempts 次失败后的重试间隔"""
+        return timedelta(seconds=settings.mail_queue_retry_base_seconds * 2 ** max(attempts - 1, 0))
+
+    @staticmethod
+    def _claim(db: Session, now: datetime) -> List[ReminderLog]:
+        """取出一批到期的待发送（或延后）记录并标记为 sending"""
+        logs = db.query(ReminderLog).filter(
+            ReminderLog.status.in_(["pending", "deferred"]),
+            or_(ReminderLog.next_attempt_at == None, ReminderLog.next_attempt_at <= now)
+        ).order_by(ReminderLog.id).limit(settings.mail_queue_batch_size).all()
+        for log in logs:
+            log.status = "sending"
+            log.claimed_at = func.now()
+        db.commit()
+        return logs
+
+    @staticmethod
+    def _send_batch(db: Session, logs: List[ReminderLog]) -> None:
+        """发送一批记录并写回结果"""
+        smtp_config = EmailService.get_smtp_config(db)
+        breaker = EmailService.get_breaker(smtp_config)
+        if not smtp_config["user"] or not smtp_config["password"]:
+            results = [(False, "SMTP未配置，请在设置中配置邮箱账号和授权码")] * len(logs)
+        else:
+            task_ids = {log.task_id for log in logs}
+            member_ids = {log.member_id for log in logs}
+            tasks = {t.id: t for t in db.query(Task).filter(Task.id.in_(task_ids)).all()}
+            members = {m.id: m for m in db.query(Member).filter(Member.id.in_(member_ids)).all()}
+
+            messages = []
+            for log in logs:
+                task = tasks[log.task_id]
+                member = members[log.member_id]
+                submit_url = EmailService.get_submit_url(task)
+                messages.append((log.email, EmailService.build_reminder_message(smtp_config, task, member, submit_url)))
+            results = asyncio.run(EmailService.create_mailer(smtp_config).send_all(messages))
+
+        now = datetime.now()
+        for log, (is_success, error_msg) in zip(logs, results):
+            if is_success is None:
+                log.status = "deferred"
+                log.error_message = error_msg
+                log.next_attempt_at = breaker.retry_at()
+                continue
+            log.attempts += 1
+            if is_success:
+                log.status = "sent"
+                log.error_message = None
+                log.next_attempt_at = None
+                log.sent_at = now
+            elif log.attempts >= settings.mail_queue_max_attempts:
+                log.status = "dead"
+                log.error_message = error_msg
+                log.next_attempt_at = None
+                logger.error(f"[邮件队列] {log.email} 已失败 {log.attempts} 次，放弃发送: {error_msg}")
+            else:
+                log.status = "pending"
+                log.error_message = error_msg
+                log.next_attempt_at = now + MailQueueService.get_retry_delay(log.attempts)
+        db.commit()
+
+    @classmethod
+    def drain(cls, session_factory: Callable[[], Session] = SessionLocal) -> int:
+        """
+        处理所有到期的待发送记录
+
+        非领导者进程，或已有线程在处理时直接返回（新入队的记录会被正在运行的循环取到）。
+
+        Returns:
+            本次处理的记录数
+        """
+        if not LeaderService.is_leader() or not cls._drain_lock.acquire(blocking=False):
+            return 0
+
+        db = session_factory()
+        processed = 0
+        try:
+            # _drain_lock 只保证本进程内没有其他发送者；其他进程（如刚失去领导权的旧领导者）
+            # 可能仍在发送，只重新排队取出时间早于超时时间的记录
+            stale_before = db_now(db) - timedelta(seconds=settings.mail_queue_claim_timeout_seconds)
+            db.query(ReminderLog).filter(
+                ReminderLog.status == "sending",
+                or_(ReminderLog.claimed_at == None, ReminderLog.claimed_at < stale_before)
+            ).update({ReminderLog.status: "pending", ReminderLog.claimed_at: None}, synchronize_session=False)
+            db.commit()
+
+            # 失去领导权后不再取新的批次
+            while LeaderService.is_leader():
+                logs = cls._claim(db, datetime.now())
+                if not logs:
+                    break
+                cls._send_batch(db, logs)
+                processed += len(logs)
+
+            if processed:
+                logger.info(f"[邮件队列] 本轮处理 {processed} 封")
+        except Exception as e:
+            logger.error(f"[邮件队列] 处理失败: {e}")
+            db.rollback()
+        finally:
+            db.close()
+            cls._drain_lock.release()
+        return processed
+
+    @staticmethod
+    def get_progress(db: Session, task_id: int, batch_id: Optional[str] = None) -> ReminderProgress:
+        """按状态统计任务（或某一批次）的提醒发送进度"""
+        query = db.query(
+            ReminderLog.status,
+            ReminderLog.attempts > 0,
+            func.count(ReminderLog.id)
+        ).filter(ReminderLog.task_id == task_id)
+        if batch_id:
+            query = query.filter(ReminderLog.batch_id == batch_id)
+
+        progress = ReminderProgress(task_id=task_id, batch_id=batch_id)
+        for status, retried, count in query.group_by(ReminderLog.status, ReminderLog.attempts > 0).all():
+            progress.total += count
+            if status in ("pending", "sending", "sent", "failed", "deferred", "dead"):
+                setattr(progress, status, getattr(progress, status) + count)
+            if status == "pending" and retried:
+                progress.retrying += count
+        progress.finished = progress.pending + progress.sending + progress.deferred == 0
+        return progress
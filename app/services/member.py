@@ -1,10 +1,14 @@
-from typing import List, Optional, Tuple
+from typing import Any, Iterable, Iterator, List, Optional, Set, Tuple
+from sqlalchemy import and_, func, insert, update
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 import io
 
-from app.models import Member, Submission
+from app.models import Member, Submission, Class, Grade
 from app.schemas.member import MemberCreate, MemberUpdate, MemberImportItem, MemberImportResult
+from app.services.organization import OrganizationService
+from app.services.roster import RosterService
+from app.services.task_stat import TaskStatService
 
 
 class MemberService:
@@ -23,6 +27,34 @@ class MemberService:
             query = query.filter(Member.class_id == class_id)
         return query.offset(skip).limit(limit).all()
     
+    # 流式导出时每次从服务端游标读取的行数
+    EXPORT_FETCH_SIZE = 1000
+    
+    # 成员导出列（与导入模板一致，另加班级，重新导入时会被忽略）
+    EXPORT_HEADERS = ["学号", "姓名", "性别", "寝室号", "QQ邮箱", "班级"]
+    
+    @staticmethod
+    def iter_export_rows(
+        db: Session,
+        class_id: Optional[int] = None,
+        grade_id: Optional[int] = None,
+        college_id: Optional[int] = None
+    ) -> Iterator[Tuple[Any, ...]]:
+        """按班级/年级/学院逐行读取成员（服务端游标，内存占用与人数无关）"""
+        query = db.query(
+            Member.student_id, Member.name, Member.gender,
+            Member.dormitory, Member.qq_email, Class.name
+        ).join(Class, Class.id == Member.class_id)
+        if class_id:
+            query = query.filter(Member.class_id == class_id)
+        if grade_id:
+            query = query.filter(Class.grade_id == grade_id)
+        if college_id:
+            query = query.join(Grade, Grade.id == Class.grade_id).filter(Grade.college_id == college_id)
+        
+        for row in query.order_by(Member.class_id, Member.id).yield_per(MemberService.EXPORT_FETCH_SIZE):
+            yield tuple(row)
+    
     @staticmethod
     def get_member(db: Session, member_id: int) -> Optional[Member]:
         """获取单个成员"""
@@ -45,8 +77,11 @@ class MemberService:
             class_id=member.class_id
         )
         db.add(db_member)
+        TaskStatService.on_member_added(db, member.class_id)
+        OrganizationService.bump_version(db)
         db.commit()
         db.refresh(db_member)
+        RosterService.upsert_member(db_member)
         return db_member
     
     @staticmethod
@@ -56,12 +91,22 @@ class MemberService:
         if not db_member:
             return None
         
+        old_class_id = db_member.class_id
         update_data = member.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_member, key, value)
         
+        if db_member.class_id != old_class_id:
+            OrganizationService.bump_version(db)
         db.commit()
         db.refresh(db_member)
+        if db_member.class_id != old_class_id:
+            TaskStatService.rebuild(db, class_id=old_class_id)
+            TaskStatService.rebuild(db, class_id=db_member.class_id)
+            RosterService.invalidate_class(old_class_id)
+            RosterService.invalidate_class(db_member.class_id)
+        else:
+            RosterService.upsert_member(db_member)
         return db_member
     
     @staticmethod
@@ -71,85 +116,188 @@ class MemberService:
         if not db_member:
             return False
         
+        TaskStatService.on_member_removed(db, db_member)
         db.delete(db_member)
+        OrganizationService.bump_version(db)
         db.commit()
+        RosterService.remove_member(member_id)
         return True
     
+    # 批量导入时每批的行数（每批一个事务）
+    IMPORT_BATCH_SIZE = 500
+    
     @staticmethod
     def import_members(
         db: Session, 
         class_id: int, 
-        members: List[MemberImportItem],
+        members: Iterable[MemberImportItem],
         skip_duplicates: bool = True
     ) -> MemberImportResult:
-        """批量导入成员"""
-        success_count = 0
-        skip_count = 0
-        error_count = 0
-        errors = []
+        """
+        批量导入成员
+        
+        按批预取已存在的学号（一次 IN 查询），新增和覆盖分别用一条 executemany 写入，
+        每批提交一次；某批写入失败时回滚该批并逐行重试，只有出错的行计入 errors。
+        """
+        result = MemberImportResult(success_count=0, skip_count=0, error_count=0, errors=[])
+        # 覆盖模式下被移入本班的成员原来所在的班级
+        old_class_ids: Set[int] = set()
         
+        batch = []
         for item in members:
-            try:
-                existing = MemberService.get_member_by_student_id(db, item.student_id)
-                if existing:
-                    if skip_duplicates:
-                        skip_count += 1
-                        continue
-                    else:
-                        # 覆盖模式：更新现有记录
-                        existing.name = item.name
-                        existing.gender = item.gender
-                        existing.dormitory = item.dormitory
-                        existing.qq_email = item.qq_email
-                        existing.class_id = class_id
-                        db.commit()
-                        success_count += 1
-                        continue
-                
-                db_member = Member(
+            batch.append(item)
+            if len(batch) >= MemberService.IMPORT_BATCH_SIZE:
+                MemberService._import_batch(db, class_id, batch, skip_duplicates, result, old_class_ids)
+                batch = []
+        if batch:
+            MemberService._import_batch(db, class_id, batch, skip_duplicates, result, old_class_ids)
+        
+        # 只有本班和成员移出的班级的名单和统计会变化
+        for affected_class_id in {class_id} | old_class_ids:
+            TaskStatService.rebuild(db, class_id=affected_class_id)
+            RosterService.invalidate_class(affected_class_id)
+        
+        return result
+    
+    @staticmethod
+    def _import_batch(
+        db: Session,
+        class_id: int,
+        batch: List[MemberImportItem],
+        skip_duplicates: bool,
+        result: MemberImportResult,
+        old_class_ids: Set[int]
+    ) -> None:
+        """导入一批成员（一个事务）"""
+        student_ids = list({item.student_id for item in batch})
+        existing = {}
+        existing_class_ids = {}
+        for student_id, member_id, member_class_id in db.query(Member.student_id, Member.id, Member.class_id).filter(
+            Member.student_id.in_(student_ids)
+        ):
+            existing[student_id] = member_id
+            existing_class_ids[member_id] = member_class_id
+        
+        inserts = {}
+        updates = {}
+        accepted = []
+        for item in batch:
+            values = {
+                "name": item.name,
+                "gender": item.gender,
+                "dormitory": item.dormitory,
+                "qq_email": item.qq_email,
+                "class_id": class_id,
+            }
+            if item.student_id in existing or item.student_id in inserts:
+                if skip_duplicates:
+                    result.skip_count += 1
+                    continue
+                # 覆盖模式：同一学号以最后一行为准
+                if item.student_id in existing:
+                    member_id = existing[item.student_id]
+                    updates[member_id] = {"id": member_id, **values}
+                else:
+                    inserts[item.student_id].update(values)
+            else:
+                inserts[item.student_id] = {"student_id": item.student_id, **values}
+            accepted.append(item)
+        
+        try:
+            if inserts:
+                db.execute(insert(Member), list(inserts.values()))
+            if updates:
+                db.execute(update(Member), list(updates.values()))
+            if inserts or updates:
+                OrganizationService.bump_version(db)
+            db.commit()
+            result.success_count += len(accepted)
+            old_class_ids.update(existing_class_ids[member_id] for member_id in updates)
+        except Exception:
+            db.rollback()
+            for item in accepted:
+                MemberService._import_row(db, class_id, item, skip_duplicates, result, old_class_ids)
+    
+    @staticmethod
+    def _import_row(
+        db: Session,
+        class_id: int,
+        item: MemberImportItem,
+        skip_duplicates: bool,
+        result: MemberImportResult,
+        old_class_ids: Set[int]
+    ) -> None:
+        """逐行导入（批量写入失败时用于定位出错的行）"""
+        try:
+            old_class_id = None
+            existing = MemberService.get_member_by_student_id(db, item.student_id)
+            if existing:
+                if skip_duplicates:
+                    result.skip_count += 1
+                    return
+                old_class_id = existing.class_id
+                # 覆盖模式：更新现有记录
+                existing.name = item.name
+                existing.gender = item.gender
+                existing.dormitory = item.dormitory
+                existing.qq_email = item.qq_email
+                existing.class_id = class_id
+            else:
+                db.add(Member(
                     student_id=item.student_id,
                     name=item.name,
                     gender=item.gender,
                     dormitory=item.dormitory,
                     qq_email=item.qq_email,
                     class_id=class_id
-                )
-                db.add(db_member)
-                db.commit()
-                success_count += 1
-            except Exception as e:
-                db.rollback()
-                error_count += 1
-                errors.append(f"学号 {item.student_id}: {str(e)}")
-        
-        return MemberImportResult(
-            success_count=success_count,
-            skip_count=skip_count,
-            error_count=error_count,
-            errors=errors
-        )
+                ))
+            OrganizationService.bump_version(db)
+            db.commit()
+            result.success_count += 1
+            if old_class_id is not None:
+                old_class_ids.add(old_class_id)
+        except Exception as e:
+            db.rollback()
+            result.error_count += 1
+            result.errors.append(f"学号 {item.student_id}: {str(e)}")
     
     @staticmethod
     def get_members_with_submission_status(
         db: Session, 
         class_id: int, 
-        task_id: int
-    ) -> List[Tuple[Member, bool, int]]:
-        """获取成员列表及其提交状态"""
-        members = db.query(Member).filter(Member.class_id == class_id).all()
-        result = []
+        task_id: int,
+        submitted: Optional[bool] = None
+    ) -> List[Tuple[Member, bool, int, int]]:
+        """
+        获取成员列表及其提交状态（一次 LEFT JOIN + GROUP BY 查询）
         
-        for member in members:
-            submission = db.query(Submission).filter(
-                Submission.member_id == member.id,
-                Submission.task_id == task_id
-            ).first()
-            
-            has_submitted = submission is not None
-            submission_count = submission.upload_count if submission else 0
-            result.append((member, has_submitted, submission_count))
+        Args:
+            submitted: 为 True/False 时只返回已提交/未提交的成员
         
-        return result
+        Returns:
+            [(成员, 是否已提交, 已提交项数, 总上传次数)]
+        """
+        submitted_items = func.count(Submission.id)
+        query = db.query(
+            Member,
+            submitted_items,
+            func.coalesce(func.sum(Submission.upload_count), 0)
+        ).outerjoin(
+            Submission,
+            and_(Submission.member_id == Member.id, Submission.task_id == task_id)
+        ).filter(
+            Member.class_id == class_id
+        ).group_by(Member.id)
+        
+        if submitted is True:
+            query = query.having(submitted_items > 0)
+        elif submitted is False:
+            query = query.having(submitted_items == 0)
+        
+        return [
+            (member, item_count > 0, item_count, int(upload_count))
+            for member, item_count, upload_count in query.order_by(Member.id).all()
+        ]
     
     @staticmethod
     def get_unsubmitted_members(db: Session, class_id: int, task_id: int) -> List[Member]:
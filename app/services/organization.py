@@ -1,15 +1,32 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
+import threading
+
+from sqlalchemy import func, cast, Integer, String
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy.exc import IntegrityError
 
-from app.models import College, Grade, Class
+from app.models import College, Grade, Class, Member, Setting
 from app.schemas.college import CollegeCreate, CollegeUpdate
 from app.schemas.grade import GradeCreate, GradeUpdate
 from app.schemas.class_ import ClassCreate, ClassUpdate
+from app.schemas.organization import OrganizationTree, CollegeNode, GradeNode, ClassNode
 
 
 class OrganizationService:
-    """组织结构管理服务"""
+    """
+    组织结构管理服务
+
+    完整组织树缓存在进程内，以组织版本号为键：学院/年级/班级增删改以及成员变动
+    （影响成员数）在同一事务中递增 settings 表中的版本号，所有进程读到新版本号后
+    各自的旧缓存随之失效。
+    """
+    
+    # 组织版本号在 settings 表中的键
+    VERSION_KEY = "organization_version"
+    
+    _tree_lock = threading.Lock()
+    # {是否含成员数: (版本号, 组织树)}
+    _tree_cache: Dict[bool, Tuple[int, OrganizationTree]] = {}
     
     # ============ 学院操作 ============
     
@@ -33,6 +50,7 @@ class OrganizationService:
         """创建学院"""
         db_college = College(name=college.name)
         db.add(db_college)
+        OrganizationService.bump_version(db)
         db.commit()
         db.refresh(db_college)
         return db_college
@@ -47,6 +65,7 @@ class OrganizationService:
         if college.name is not None:
             db_college.name = college.name
         
+        OrganizationService.bump_version(db)
         db.commit()
         db.refresh(db_college)
         return db_college
@@ -59,6 +78,7 @@ class OrganizationService:
             return False
         
         db.delete(db_college)
+        OrganizationService.bump_version(db)
         db.commit()
         return True
     
@@ -82,6 +102,7 @@ class OrganizationService:
         """创建年级"""
         db_grade = Grade(name=grade.name, college_id=grade.college_id)
         db.add(db_grade)
+        OrganizationService.bump_version(db)
         db.commit()
         db.refresh(db_grade)
         return db_grade
@@ -98,6 +119,7 @@ class OrganizationService:
         if grade.college_id is not None:
             db_grade.college_id = grade.college_id
         
+        OrganizationService.bump_version(db)
         db.commit()
         db.refresh(db_grade)
         return db_grade
@@ -110,6 +132,7 @@ class OrganizationService:
             return False
         
         db.delete(db_grade)
+        OrganizationService.bump_version(db)
         db.commit()
         return True
     
@@ -125,14 +148,15 @@ class OrganizationService:
     
     @staticmethod
     def get_class(db: Session, class_id: int) -> Optional[Class]:
-        """获取单个班级"""
-        return db.query(Class).filter(Class.id == class_id).first()
+        """获取单个班级（成员列表一并加载）"""
+        return db.query(Class).options(selectinload(Class.members)).filter(Class.id == class_id).first()
     
     @staticmethod
     def create_class(db: Session, class_: ClassCreate) -> Class:
         """创建班级"""
         db_class = Class(name=class_.name, grade_id=class_.grade_id)
         db.add(db_class)
+        OrganizationService.bump_version(db)
         db.commit()
         db.refresh(db_class)
         return db_class
@@ -149,6 +173,7 @@ class OrganizationService:
         if class_.grade_id is not None:
             db_class.grade_id = class_.grade_id
         
+        OrganizationService.bump_version(db)
         db.commit()
         db.refresh(db_class)
         return db_class
@@ -161,5 +186,83 @@ class OrganizationService:
             return False
         
         db.delete(db_class)
+        OrganizationService.bump_version(db)
         db.commit()
         return True
+    
+    # ============ 组织树 ============
+    
+    @classmethod
+    def get_version(cls, db: Session) -> int:
+        """获取当前组织版本号（一次主键级查询）"""
+        value = db.query(Setting.value).filter(Setting.key == cls.VERSION_KEY).scalar()
+        try:
+            return int(value) if value else 0
+        except ValueError:
+            return 0
+    
+    @classmethod
+    def bump_version(cls, db: Session) -> None:
+        """组织结构或成员变动时递增版本号（不提交事务，随变动一起提交）"""
+        if cls._increment_version(db):
+            return
+        try:
+            with db.begin_nested():
+                db.add(Setting(key=cls.VERSION_KEY, value="1"))
+        except IntegrityError:
+            # 其他进程同时创建了版本号
+            cls._increment_version(db)
+    
+    @classmethod
+    def _increment_version(cls, db: Session) -> int:
+        return db.query(Setting).filter(Setting.key == cls.VERSION_KEY).update(
+            {Setting.value: cast(cast(Setting.value, Integer) + 1, String)},
+            synchronize_session=False
+        )
+    
+    @staticmethod
+    def build_tree(db: Session, version: int, with_member_counts: bool = False) -> OrganizationTree:
+        """用几条平铺查询构建组织树"""
+        member_counts = {}
+        if with_member_counts:
+            member_counts = dict(
+                db.query(Member.class_id, func.count(Member.id)).group_by(Member.class_id).all()
+            )
+        
+        grades: Dict[int, GradeNode] = {}
+        for grade_id, name, college_id in db.query(Grade.id, Grade.name, Grade.college_id).order_by(Grade.id):
+            grades[grade_id] = GradeNode(id=grade_id, name=name, college_id=college_id)
+        for class_id, name, grade_id in db.query(Class.id, Class.name, Class.grade_id).order_by(Class.id):
+            if grade_id in grades:
+                grades[grade_id].classes.append(ClassNode(
+                    id=class_id,
+                    name=name,
+                    grade_id=grade_id,
+                    member_count=member_counts.get(class_id, 0) if with_member_counts else None
+                ))
+        
+        colleges: Dict[int, CollegeNode] = {}
+        for college_id, name in db.query(College.id, College.name).order_by(College.id):
+            colleges[college_id] = CollegeNode(id=college_id, name=name)
+        for grade in grades.values():
+            if grade.college_id in colleges:
+                colleges[grade.college_id].grades.append(grade)
+        
+        return OrganizationTree(version=version, colleges=list(colleges.values()))
+    
+    @classmethod
+    def get_tree(cls, db: Session, with_member_counts: bool = False) -> OrganizationTree:
+        """获取完整组织树（按数据库中的版本号缓存）"""
+        version = cls.get_version(db)
+        with cls._tree_lock:
+            cached = cls._tree_cache.get(with_member_counts)
+            if cached and cached[0] == version:
+                return cached[1]
+        
+        tree = cls.build_tree(db, version, with_member_counts)
+        with cls._tree_lock:
+            cached = cls._tree_cache.get(with_member_counts)
+            # 并发构建时保留版本更新的结果
+            if not cached or cached[0] <= version:
+                cls._tree_cache[with_member_counts] = (version, tree)
+        return tree
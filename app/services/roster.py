@@ -0,0 +1,162 @@
+"""任务名单快照服务（学生提交页使用）"""
+from typing import Dict, Optional, Tuple
+import hashlib
+import json
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from app.models import Task, Member
+from app.config import settings
+
+
+class RosterService:
+    """
+    任务名单快照服务
+
+    每个任务在进程内缓存一份名单快照（成员ID、姓名、学号、是否已提交），
+    由 SubmissionService / MemberService 的变更钩子增量更新，不再每次请求都查库。
+    ETag 取自名单内容的哈希，客户端可用 If-None-Match 复用本地副本，
+    多个进程对相同内容给出相同的 ETag。
+    多进程部署时各进程独立缓存，roster_cache_ttl_seconds 作为兜底过期时间。
+    """
+
+    _lock = threading.Lock()
+    _snapshots: Dict[int, dict] = {}
+    # 每次变更递增，用于丢弃构建期间已过时的快照
+    _generation = 0
+
+    @classmethod
+    def _touch(cls, snapshot: dict) -> None:
+        """快照内容变化后清除已序列化的内容和 ETag（需持有锁）"""
+        snapshot["etag"] = None
+        snapshot["body"] = None
+
+    @classmethod
+    def _build(cls, db: Session, task_id: int) -> Optional[dict]:
+        """从数据库构建快照"""
+        from app.services.member import MemberService
+
+        task = db.query(Task).filter(Task.id == task_id).first()
+        if not task:
+            return None
+
+        members = {}
+        for member, has_submitted, _, _ in MemberService.get_members_with_submission_status(db, task.class_id, task_id):
+            members[member.id] = {
+                "id": member.id,
+                "name": member.name,
+                "student_id": member.student_id,
+                "has_submitted": has_submitted,
+            }
+        snapshot = {
+            "task_id": task_id,
+            "class_id": task.class_id,
+            "members": members,
+            "expires_at": time.monotonic() + settings.roster_cache_ttl_seconds,
+        }
+        cls._touch(snapshot)
+        return snapshot
+
+    @classmethod
+    def get_roster(cls, db: Session, task_id: int) -> Optional[Tuple[str, bytes]]:
+        """
+        获取任务名单
+
+        Returns:
+            (ETag, JSON内容)，任务不存在时返回 None
+        """
+        with cls._lock:
+            snapshot = cls._snapshots.get(task_id)
+            if snapshot and snapshot["expires_at"] <= time.monotonic():
+                snapshot = None
+            generation = cls._generation
+
+        if snapshot is None:
+            snapshot = cls._build(db, task_id)
+            if snapshot is None:
+                return None
+            with cls._lock:
+                # 构建期间有变更时不缓存，下次请求重新构建
+                if cls._generation == generation:
+                    cls._snapshots[task_id] = snapshot
+
+        with cls._lock:
+            if snapshot["body"] is None:
+                # 按成员ID排序，增量更新和重新构建的结果序列化后完全一致
+                snapshot["body"] = json.dumps({
+                    "task_id": task_id,
+                    "members": [snapshot["members"][member_id] for member_id in sorted(snapshot["members"])],
+                }, ensure_ascii=False).encode("utf-8")
+                snapshot["etag"] = f'"{hashlib.sha256(snapshot["body"]).hexdigest()[:32]}"'
+            return snapshot["etag"], snapshot["body"]
+
+    @classmethod
+    def set_submitted(cls, task_id: int, member_id: int, has_submitted: bool) -> None:
+        """更新成员在任务中的提交状态"""
+        with cls._lock:
+            cls._generation += 1
+            snapshot = cls._snapshots.get(task_id)
+            if not snapshot:
+                return
+            entry = snapshot["members"].get(member_id)
+            if entry is None:
+                cls._snapshots.pop(task_id, None)
+            elif entry["has_submitted"] != has_submitted:
+                entry["has_submitted"] = has_submitted
+                cls._touch(snapshot)
+
+    @classmethod
+    def upsert_member(cls, member: Member) -> None:
+        """成员新增或信息修改（班级不变）"""
+        with cls._lock:
+            cls._generation += 1
+            for snapshot in cls._snapshots.values():
+                if snapshot["class_id"] != member.class_id:
+                    continue
+                entry = snapshot["members"].get(member.id)
+                if entry is None:
+                    snapshot["members"][member.id] = {
+                        "id": member.id,
+                        "name": member.name,
+                        "student_id": member.student_id,
+                        "has_submitted": False,
+                    }
+                elif entry["name"] == member.name and entry["student_id"] == member.student_id:
+                    continue
+                else:
+                    entry["name"] = member.name
+                    entry["student_id"] = member.student_id
+                cls._touch(snapshot)
+
+    @classmethod
+    def remove_member(cls, member_id: int) -> None:
+        """成员被删除"""
+        with cls._lock:
+            cls._generation += 1
+            for snapshot in cls._snapshots.values():
+                if snapshot["members"].pop(member_id, None) is not None:
+                    cls._touch(snapshot)
+
+    @classmethod
+    def invalidate_class(cls, class_id: int) -> None:
+        """丢弃班级下所有任务的快照（批量导入、成员换班等）"""
+        with cls._lock:
+            cls._generation += 1
+            for task_id in [t for t, s in cls._snapshots.items() if s["class_id"] == class_id]:
+                del cls._snapshots[task_id]
+
+    @classmethod
+    def invalidate_task(cls, task_id: int) -> None:
+        """丢弃任务快照（任务修改或删除）"""
+        with cls._lock:
+            cls._generation += 1
+            cls._snapshots.pop(task_id, None)
+
+    @classmethod
+    def clear(cls) -> None:
+        """清空全部快照"""
+        with cls._lock:
+            cls._generation += 1
+            cls._snapshots.clear()
@@ -1,22 +1,49 @@
 """定时任务服务"""
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Optional
 import logging
 
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.date import DateTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from sqlalchemy.orm import Session
 
-from app.database import SessionLocal
-from app.models import Task, Member, Submission
-from app.services.email import EmailService
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.models import Task, Member, Submission, ReminderLog
+from app.services.leader import LeaderService
+from app.services.mail_queue import MailQueueService
 from app.services.member import MemberService
+from app.services.upload import UploadService
+from app.services.storage import StorageService
+from app.services.export_job import ExportJobService
 
 logger = logging.getLogger(__name__)
 
 
+def send_task_reminder(task_id: int) -> None:
+    """自动提醒任务入口（模块级函数，便于持久化任务存储按引用保存）"""
+    SchedulerService.send_task_reminder(task_id)
+
+
 class SchedulerService:
-    """定时任务服务"""
+    """
+    定时任务服务
+
+    周期性维护任务使用内存任务存储，每次启动时重新注册；
+    每个开启自动提醒的任务在 deadline - remind_before_hours 有一个一次性任务，
+    保存在数据库（apscheduler_jobs 表）中，服务重启后仍然有效，
+    由 TaskService 在任务创建/修改/删除时重新安排，成为领导者时再与任务表核对一次。
+    
+    多进程部署时每个进程都启动调度器，但只有通过 LeaderService 取得领导权的进程
+    恢复（resume）调度器运行任务，其余进程保持暂停，只负责向共享的任务存储写入提醒安排。
+    """
+    
+    # 自动提醒任务所在的持久化任务存储
+    REMINDER_JOBSTORE = "reminders"
     
     _scheduler: Optional[BackgroundScheduler] = None
     _is_running: bool = False
@@ -25,7 +52,10 @@ class SchedulerService:
     def get_scheduler(cls) -> BackgroundScheduler:
         """获取调度器实例"""
         if cls._scheduler is None:
-            cls._scheduler = BackgroundScheduler()
+            cls._scheduler = BackgroundScheduler(jobstores={
+                "default": MemoryJobStore(),
+                cls.REMINDER_JOBSTORE: SQLAlchemyJobStore(engine=engine, tablename="apscheduler_jobs"),
+            })
         return cls._scheduler
     
     @classmethod
@@ -36,71 +66,210 @@ class SchedulerService:
         
         scheduler = cls.get_scheduler()
         
-        # 添加自动提醒检查任务（每10分钟检查一次）
+        # 处理提醒邮件队列中到期的重试（入队时会立即唤醒发送，这里兜底）
+        scheduler.add_job(
+            MailQueueService.drain,
+            IntervalTrigger(seconds=settings.mail_queue_poll_seconds),
+            id="mail_queue_drain",
+            replace_existing=True
+        )
+        
+        # 清理过期的断点续传会话（每小时一次）
         scheduler.add_job(
-            cls.check_and_send_reminders,
-            IntervalTrigger(minutes=10),
-            id="auto_reminder_check",
+            cls.cleanup_expired_uploads,
+            IntervalTrigger(hours=1),
+            id="upload_session_cleanup",
             replace_existing=True
         )
         
-        scheduler.start()
+        # 清理过期的后台导出文件（每小时一次）
+        scheduler.add_job(
+            cls.cleanup_expired_exports,
+            IntervalTrigger(hours=1),
+            id="export_job_cleanup",
+            replace_existing=True
+        )
+        
+        # 回收无引用的存储文件（每天一次）
+        scheduler.add_job(
+            cls.collect_storage_garbage,
+            IntervalTrigger(hours=24),
+            id="storage_garbage_collection",
+            replace_existing=True
+        )
+        
+        # 先以暂停状态启动，取得领导权后再恢复
+        scheduler.start(paused=True)
         cls._is_running = True
-        logger.info("定时任务调度器已启动")
+        logger.info("定时任务调度器已启动，等待领导权")
+        
+        LeaderService.start(on_acquire=cls.on_leadership_acquired, on_lose=cls.on_leadership_lost)
+    
+    @classmethod
+    def on_leadership_acquired(cls):
+        """成为领导者：恢复调度器，核对提醒安排并处理积压的邮件"""
+        cls.get_scheduler().resume()
+        cls.reconcile_reminders()
+        MailQueueService.wake()
+        logger.info("定时任务调度器开始运行")
+    
+    @classmethod
+    def on_leadership_lost(cls):
+        """失去领导权：暂停调度器"""
+        cls.get_scheduler().pause()
+        logger.info("定时任务调度器已暂停")
     
     @classmethod
     def stop(cls):
         """停止调度器"""
+        LeaderService.stop()
         if cls._scheduler and cls._is_running:
             cls._scheduler.shutdown()
             cls._is_running = False
             logger.info("定时任务调度器已停止")
     
+    @staticmethod
+    def _reminder_job_id(task_id: int) -> str:
+        return f"task_reminder_{task_id}"
+    
+    @staticmethod
+    def get_remind_time(task: Task) -> Optional[datetime]:
+        """任务的自动提醒时间，不需要提醒时返回 None"""
+        if not task.auto_remind_enabled or not task.deadline or task.deadline <= datetime.now():
+            return None
+        return task.deadline - timedelta(hours=task.remind_before_hours or 0)
+    
     @classmethod
-    def check_and_send_reminders(cls):
-        """检查并发送自动提醒"""
-        logger.info("开始检查自动提醒任务...")
+    def schedule_task_reminder(cls, task: Task) -> None:
+        """按任务当前设置安排（或取消）自动提醒，调度器未运行时由启动时的核对处理"""
+        if not cls._is_running:
+            return
         
-        db = SessionLocal()
+        remind_time = cls.get_remind_time(task)
+        if remind_time is None:
+            cls.unschedule_task_reminder(task.id)
+            return
+        
+        # 提醒时间已过但尚未截止（如刚开启自动提醒）时立即执行
+        cls.get_scheduler().add_job(
+            send_task_reminder,
+            DateTrigger(run_date=max(remind_time, datetime.now())),
+            args=[task.id],
+            id=cls._reminder_job_id(task.id),
+            jobstore=cls.REMINDER_JOBSTORE,
+            replace_existing=True,
+            misfire_grace_time=None,
+            coalesce=True
+        )
+        logger.info(f"任务 {task.id} 的自动提醒安排在 {remind_time}")
+    
+    @classmethod
+    def unschedule_task_reminder(cls, task_id: int) -> None:
+        """取消任务的自动提醒"""
+        if not cls._is_running:
+            return
+        try:
+            cls.get_scheduler().remove_job(cls._reminder_job_id(task_id), jobstore=cls.REMINDER_JOBSTORE)
+        except JobLookupError:
+            pass
+    
+    @classmethod
+    def reconcile_reminders(cls, session_factory: Callable[[], Session] = SessionLocal) -> int:
+        """
+        按任务表核对持久化的提醒任务（补上缺失的、删除多余的）
+        
+        Returns:
+            当前安排的提醒任务数量
+        """
+        db = session_factory()
         try:
-            now = datetime.now()
-            
-            # 获取启用了自动提醒且未过期的任务
             tasks = db.query(Task).filter(
                 Task.auto_remind_enabled == True,
                 Task.deadline != None,
-                Task.deadline > now
+                Task.deadline > datetime.now()
             ).all()
-            
             for task in tasks:
-                # 计算提醒时间
-                remind_time = task.deadline - timedelta(hours=task.remind_before_hours)
-                
-                # 检查是否到达提醒时间
-                if now >= remind_time:
-                    # 检查是否已经发送过提醒（避免重复发送）
-                    # 这里简单检查最近1小时内是否发送过
-                    from app.models import ReminderLog
-                    recent_reminder = db.query(ReminderLog).filter(
-                        ReminderLog.task_id == task.id,
-                        ReminderLog.sent_at > now - timedelta(hours=1)
-                    ).first()
-                    
-                    if recent_reminder:
-                        continue
-                    
-                    # 获取未提交成员
-                    unsubmitted = MemberService.get_unsubmitted_members(
-                        db, task.class_id, task.id
-                    )
-                    
-                    if unsubmitted:
-                        logger.info(f"任务 {task.title} 发送自动提醒给 {len(unsubmitted)} 人")
-                        EmailService.send_reminder_to_members(db, task, unsubmitted)
-        
+                cls.schedule_task_reminder(task)
+            
+            expected = {cls._reminder_job_id(task.id) for task in tasks}
+            for job in cls.get_scheduler().get_jobs(jobstore=cls.REMINDER_JOBSTORE):
+                if job.id not in expected:
+                    job.remove()
+            logger.info(f"自动提醒核对完成，共 {len(tasks)} 个任务")
+            return len(tasks)
         except Exception as e:
-            logger.error(f"自动提醒检查失败: {e}")
+            logger.error(f"自动提醒核对失败: {e}")
+            return 0
         finally:
             db.close()
+    
+    @classmethod
+    def send_task_reminder(cls, task_id: int, session_factory: Callable[[], Session] = SessionLocal) -> int:
+        """
+        到达提醒时间：向任务的未提交成员发送提醒
         
-        logger.info("自动提醒检查完成")
+        Returns:
+            入队的提醒数量
+        """
+        db = session_factory()
+        try:
+            task = db.query(Task).filter(Task.id == task_id).first()
+            remind_time = cls.get_remind_time(task) if task else None
+            if remind_time is None:
+                return 0
+            
+            # 本轮提醒时间之后已经自动提醒过（如任务重新安排后再次触发）则跳过，手动提醒不算
+            already_reminded = db.query(ReminderLog.id).filter(
+                ReminderLog.task_id == task_id,
+                ReminderLog.batch_id.like(f"{MailQueueService.AUTO_BATCH_PREFIX}%"),
+                ReminderLog.sent_at >= remind_time
+            ).first()
+            if already_reminded:
+                return 0
+            
+            unsubmitted = MemberService.get_unsubmitted_members(db, task.class_id, task_id)
+            if not unsubmitted:
+                return 0
+            
+            logger.info(f"任务 {task.title} 发送自动提醒给 {len(unsubmitted)} 人")
+            return MailQueueService.enqueue_and_wake(
+                db, task, unsubmitted, batch_prefix=MailQueueService.AUTO_BATCH_PREFIX
+            ).queued
+        except Exception as e:
+            logger.error(f"自动提醒发送失败: {e}")
+            return 0
+        finally:
+            db.close()
+    
+    @classmethod
+    def cleanup_expired_uploads(cls):
+        """清理过期的断点续传会话"""
+        db = SessionLocal()
+        try:
+            UploadService.cleanup_expired_sessions(db)
+        except Exception as e:
+            logger.error(f"清理过期上传会话失败: {e}")
+        finally:
+            db.close()
+    
+    @classmethod
+    def cleanup_expired_exports(cls):
+        """清理过期的后台导出任务"""
+        db = SessionLocal()
+        try:
+            ExportJobService.cleanup_expired_jobs(db)
+        except Exception as e:
+            logger.error(f"清理过期导出任务失败: {e}")
+        finally:
+            db.close()
+    
+    @classmethod
+    def collect_storage_garbage(cls):
+        """回收无引用的存储文件"""
+        db = SessionLocal()
+        try:
+            StorageService.collect_garbage(db)
+        except Exception as e:
+            logger.error(f"回收存储文件失败: {e}")
+        finally:
+            db.close()
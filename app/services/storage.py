@@ -0,0 +1,199 @@
+"""内容寻址文件存储服务"""
+from typing import Optional, Tuple
+from datetime import datetime, timedelta
+import hashlib
+import os
+import time
+import uuid
+import logging
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import FileBlob, Submission
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class StorageService:
+    """
+    内容寻址文件存储服务
+
+    文件按内容 SHA-256 存放在 upload_dir/blobs/<前两位>/<哈希> 下，
+    相同内容只保存一份，通过 file_blobs.ref_count 记录被多少个提交引用；
+    引用归零的内容由 collect_garbage 在宽限期后回收，不在请求中立即删除。
+    """
+
+    # blob 存储目录（位于 upload_dir 下）
+    BLOB_DIR = "blobs"
+
+    # 计算哈希时的读取块大小
+    HASH_CHUNK_SIZE = 1024 * 1024
+
+    # 回收时每次查询的文件名数量
+    GC_QUERY_CHUNK = 500
+
+    @staticmethod
+    def get_temp_path() -> str:
+        """获取写入中的临时文件路径（与 blob 同一文件系统，便于原子移动）"""
+        temp_dir = os.path.join(settings.upload_dir, StorageService.BLOB_DIR, "tmp")
+        os.makedirs(temp_dir, exist_ok=True)
+        return os.path.join(temp_dir, uuid.uuid4().hex)
+
+    @staticmethod
+    def get_blob_path(sha256: str) -> str:
+        """获取 blob 的存储路径"""
+        return os.path.join(settings.upload_dir, StorageService.BLOB_DIR, sha256[:2], sha256)
+
+    @staticmethod
+    def hash_file(file_path: str) -> Tuple[str, int]:
+        """
+        计算已落盘文件的 SHA-256
+
+        Returns:
+            (SHA-256, 文件大小)
+        """
+        hasher = hashlib.sha256()
+        size = 0
+        with open(file_path, "rb") as f:
+            while True:
+                chunk = f.read(StorageService.HASH_CHUNK_SIZE)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                size += len(chunk)
+        return hasher.hexdigest(), size
+
+    @staticmethod
+    def _increment_ref(db: Session, sha256: str) -> int:
+        """已有 blob 的引用计数加一，返回更新的行数"""
+        return db.query(FileBlob).filter(FileBlob.sha256 == sha256).update(
+            {FileBlob.ref_count: FileBlob.ref_count + 1},
+            synchronize_session=False
+        )
+
+    @staticmethod
+    def store_blob(db: Session, temp_path: str, sha256: str, file_size: int) -> str:
+        """
+        将临时文件存入 blob 存储并增加引用计数（不提交事务）
+
+        内容已存在时直接删除临时文件，否则移动到 blob 路径。
+        多个请求同时写入相同的新内容时，只有一个插入成功，其余改为增加引用计数。
+
+        Returns:
+            blob 文件路径
+        """
+        updated = StorageService._increment_ref(db, sha256)
+        blob_path = StorageService.get_blob_path(sha256)
+
+        if updated and os.path.exists(blob_path):
+            os.remove(temp_path)
+            logger.info(f"[存储] 复用已有文件 {sha256[:12]} ({file_size} 字节)")
+            return blob_path
+
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        os.replace(temp_path, blob_path)
+        if not updated:
+            try:
+                with db.begin_nested():
+                    db.add(FileBlob(sha256=sha256, file_path=blob_path, file_size=file_size, ref_count=1))
+            except IntegrityError:
+                # 其他请求同时插入了相同内容（内容相同，文件覆盖无影响）
+                StorageService._increment_ref(db, sha256)
+        return blob_path
+
+    @staticmethod
+    def release_blob(db: Session, sha256: str) -> None:
+        """
+        减少 blob 引用计数（不提交事务）
+
+        引用归零时不立即删除记录和文件：其他请求可能正要复用同一内容，
+        由 collect_garbage 在宽限期后回收。
+        """
+        db.query(FileBlob).filter(FileBlob.sha256 == sha256).update(
+            {FileBlob.ref_count: FileBlob.ref_count - 1},
+            synchronize_session=False
+        )
+
+    @staticmethod
+    def collect_garbage(db: Session) -> int:
+        """
+        按提交记录重新计算引用计数，并回收无引用的 blob
+
+        用于修复级联删除任务/成员时未释放的引用。引用为 0 且超过 blob_orphan_grace_seconds
+        未变化的记录用条件删除（期间被重新引用则不删除），随后 blob 目录中超过宽限期且
+        没有对应记录的文件（包括上传事务回滚后遗留的文件和中断的临时文件）一并删除。
+
+        Returns:
+            删除的文件数量
+        """
+        counts = dict(
+            db.query(Submission.content_hash, func.count(Submission.id))
+            .filter(Submission.content_hash != None)
+            .group_by(Submission.content_hash)
+            .all()
+        )
+
+        cutoff = datetime.now() - timedelta(seconds=settings.blob_orphan_grace_seconds)
+        for sha256, old_count in db.query(FileBlob.sha256, FileBlob.ref_count).all():
+            ref_count = counts.get(sha256, 0)
+            if old_count != ref_count:
+                # 条件更新：统计期间被其他请求修改过的计数保持不变
+                db.query(FileBlob).filter(
+                    FileBlob.sha256 == sha256,
+                    FileBlob.ref_count == old_count
+                ).update({FileBlob.ref_count: ref_count}, synchronize_session=False)
+        db.commit()
+
+        released = db.query(FileBlob).filter(
+            FileBlob.ref_count <= 0,
+            FileBlob.updated_at < cutoff
+        ).delete(synchronize_session=False)
+        db.commit()
+
+        removed = StorageService._remove_untracked_files(db)
+        if released or removed:
+            logger.info(f"[存储] 回收无引用记录 {released} 条，删除文件 {removed} 个")
+        return removed
+
+    @staticmethod
+    def _remove_untracked_files(db: Session) -> int:
+        """删除 blob 目录中超过宽限期且没有 file_blobs 记录的文件"""
+        blob_root = os.path.join(settings.upload_dir, StorageService.BLOB_DIR)
+        if not os.path.isdir(blob_root):
+            return 0
+
+        cutoff = time.time() - settings.blob_orphan_grace_seconds
+        candidates = []
+        for dir_path, _, file_names in os.walk(blob_root):
+            for name in file_names:
+                path = os.path.join(dir_path, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        candidates.append((name, path))
+                except OSError:
+                    continue
+        if not candidates:
+            return 0
+
+        temp_dir = os.path.join(blob_root, "tmp")
+        known = set()
+        names = [name for name, _ in candidates]
+        for start in range(0, len(names), StorageService.GC_QUERY_CHUNK):
+            chunk = names[start:start + StorageService.GC_QUERY_CHUNK]
+            known.update(sha256 for (sha256,) in db.query(FileBlob.sha256).filter(FileBlob.sha256.in_(chunk)).all())
+        removed = 0
+        for name, path in candidates:
+            if name in known and os.path.dirname(path) != temp_dir:
+                continue
+            try:
+                # 删除前再次确认没有被新的上传替换
+                if os.path.getmtime(path) >= cutoff:
+                    continue
+                os.remove(path)
+                removed += 1
+            except OSError:
+                continue
+        return removed
@@ -1,14 +1,19 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 import os
-import uuid
+import hashlib
 import logging
 
+import aiofiles
 from sqlalchemy.orm import Session
 from fastapi import UploadFile
 
-from app.models import Submission, Task, Member
+from app.models import Submission, Task, Member, SubmissionTombstone
 from app.config import settings
+from app.services.storage import StorageService
+from app.services.export_cache import ExportCacheService
+from app.services.roster import RosterService
+from app.services.task_stat import TaskStatService
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +41,9 @@ class SubmissionService:
         "text": [".txt", ".md", ".json", ".xml", ".csv"],
     }
     
+    # 上传文件分块写盘大小
+    UPLOAD_CHUNK_SIZE = 1024 * 1024
+    
     @staticmethod
     def get_submissions(
         db: Session, 
@@ -67,7 +75,9 @@ class SubmissionService:
         if task.admin_only_visible:
             return []
         
-        query = db.query(Submission).filter(
+        query = db.query(Submission, Member.name).join(
+            Member, Member.id == Submission.member_id
+        ).filter(
             Submission.task_id == task_id,
             Submission.is_private == False
         )
@@ -75,24 +85,22 @@ class SubmissionService:
         if exclude_member_id:
             query = query.filter(Submission.member_id != exclude_member_id)
         
-        submissions = query.all()
+        rows = query.order_by(Submission.id).all()
         
         result = []
-        for s in submissions:
-            member = db.query(Member).filter(Member.id == s.member_id).first()
-            if member:
-                result.append({
-                    "id": s.id,
-                    "member_id": s.member_id,
-                    "member_name": member.name,
-                    "submission_type": s.submission_type,
-                    "original_filename": s.original_filename,
-                    "text_content": s.text_content,
-                    "questionnaire_answers": s.questionnaire_answers,
-                    "file_size": s.file_size,
-                    "is_private": s.is_private,
-                    "created_at": s.created_at.isoformat() if s.created_at else None
-                })
+        for s, member_name in rows:
+            result.append({
+                "id": s.id,
+                "member_id": s.member_id,
+                "member_name": member_name,
+                "submission_type": s.submission_type,
+                "original_filename": s.original_filename,
+                "text_content": s.text_content,
+                "questionnaire_answers": s.questionnaire_answers,
+                "file_size": s.file_size,
+                "is_private": s.is_private,
+                "created_at": s.created_at.isoformat() if s.created_at else None
+            })
         
         return result
     
@@ -160,18 +168,62 @@ class SubmissionService:
                 )
     
     @staticmethod
-    async def create_file_submission(
+    async def save_upload_file(file: UploadFile, file_path: str) -> Tuple[int, str]:
+        """
+        分块写入上传文件，写入过程中校验大小并计算 SHA-256
+        
+        先写入临时文件，完成后再原子重命名到目标路径，
+        超过 max_file_size 时立即中止并清理临时文件。
+        
+        Returns:
+            (文件大小(字节), SHA-256)
+        """
+        max_size = settings.max_file_size
+        if file.size is not None and file.size > max_size:
+            raise SubmissionError("file_too_large", f"文件大小超过限制: {max_size // 1024 // 1024}MB")
+        
+        temp_path = f"{file_path}.part"
+        file_size = 0
+        hasher = hashlib.sha256()
+        try:
+            await file.seek(0)
+            async with aiofiles.open(temp_path, "wb") as f:
+                while True:
+                    chunk = await file.read(SubmissionService.UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    file_size += len(chunk)
+                    if file_size > max_size:
+                        raise SubmissionError("file_too_large", f"文件大小超过限制: {max_size // 1024 // 1024}MB")
+                    hasher.update(chunk)
+                    await f.write(chunk)
+            os.replace(temp_path, file_path)
+        except SubmissionError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        except Exception as e:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise SubmissionError("file_save_error", f"保存文件失败: {e}")
+        
+        return file_size, hasher.hexdigest()
+    
+    @staticmethod
+    def check_file_submission(
         db: Session,
         task_id: int,
         member_id: int,
-        file: UploadFile,
-        is_private: bool = False,
+        filename: Optional[str],
         item_index: int = 1,
         submission_type: str = "file"
-    ) -> Submission:
-        """创建文件/图片提交"""
-        logger.info(f"[创建提交] task_id={task_id}, member_id={member_id}, type={submission_type}")
+    ) -> Tuple[Task, Optional[Submission]]:
+        """
+        校验文件/图片提交（任务、成员、截止时间、文件类型、修改权限）
         
+        Returns:
+            (任务, 已存在的同项提交)
+        """
         task = db.query(Task).filter(Task.id == task_id).first()
         if not task:
             raise SubmissionError("task_not_found", "任务不存在")
@@ -185,7 +237,7 @@ class SubmissionService:
             raise SubmissionError("deadline_passed", f"已过截止时间")
         
         # 获取文件扩展名并验证
-        file_ext = os.path.splitext(file.filename)[1] if file.filename else ""
+        file_ext = os.path.splitext(filename)[1] if filename else ""
         SubmissionService.validate_file_type(task, file_ext, submission_type)
         
         # 检查是否已存在同类型提交
@@ -195,21 +247,32 @@ class SubmissionService:
             if not task.allow_modify:
                 raise SubmissionError("modify_not_allowed", "该任务不允许修改已上传内容")
         
-        # 生成存储文件名
-        stored_filename = f"{uuid.uuid4().hex}{file_ext}"
-        upload_dir = os.path.join(settings.upload_dir, str(task_id))
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        file_path = os.path.join(upload_dir, stored_filename)
-        try:
-            content = await file.read()
-            with open(file_path, "wb") as f:
-                f.write(content)
-        except Exception as e:
-            raise SubmissionError("file_save_error", f"保存文件失败: {e}")
-        
-        file_size = len(content)
+        return task, existing
+    
+    @staticmethod
+    def save_file_submission(
+        db: Session,
+        task: Task,
+        member_id: int,
+        existing: Optional[Submission],
+        original_filename: Optional[str],
+        file_type: Optional[str],
+        stored_filename: str,
+        file_path: str,
+        file_size: int,
+        is_private: bool = False,
+        item_index: int = 1,
+        submission_type: str = "file",
+        content_hash: Optional[str] = None,
+        upload_id: Optional[str] = None
+    ) -> Submission:
+        """
+        写入文件/图片提交记录（文件已保存到 file_path）
         
+        content_hash 不为空时 file_path 为内容寻址存储中的 blob，
+        调用方应已通过 StorageService.store_blob 增加引用计数（与本次提交同一事务）。
+        upload_id 为断点续传完成时的上传会话ID。
+        """
         # 处理可见性
         actual_private = is_private
         if task.admin_only_visible:
@@ -217,46 +280,109 @@ class SubmissionService:
         elif not task.allow_user_set_visibility:
             actual_private = False
         
+        old_hash = None
+        old_path = None
         try:
             if existing:
-                # 删除旧文件
-                if existing.file_path and os.path.exists(existing.file_path):
-                    os.remove(existing.file_path)
+                old_hash = existing.content_hash
+                old_path = existing.file_path
+                
+                # 文件名变化时记录旧文件已被移除（供增量导出生成删除清单）
+                if existing.original_filename != original_filename:
+                    SubmissionService.record_tombstone(db, existing, "replaced")
                 
-                existing.original_filename = file.filename
+                existing.original_filename = original_filename
                 existing.stored_filename = stored_filename
                 existing.file_path = file_path
-                existing.file_type = file.content_type
+                existing.file_type = file_type
                 existing.file_size = file_size
+                existing.content_hash = content_hash
+                existing.upload_id = upload_id
                 existing.submission_type = submission_type
                 existing.is_private = actual_private
                 existing.upload_count += 1
+                submission = existing
                 
-                db.commit()
-                db.refresh(existing)
-                return existing
+                # 释放旧文件的引用（无引用的内容由 StorageService.collect_garbage 回收）
+                if old_hash:
+                    StorageService.release_blob(db, old_hash)
             else:
+                TaskStatService.on_submission_added(db, task.id, member_id)
                 submission = Submission(
-                    task_id=task_id,
+                    task_id=task.id,
                     member_id=member_id,
                     submission_type=submission_type,
-                    original_filename=file.filename,
+                    original_filename=original_filename,
                     stored_filename=stored_filename,
                     file_path=file_path,
-                    file_type=file.content_type,
+                    file_type=file_type,
                     file_size=file_size,
+                    content_hash=content_hash,
+                    upload_id=upload_id,
                     is_private=actual_private,
                     item_index=item_index,
                     upload_count=1
                 )
                 db.add(submission)
-                db.commit()
-                db.refresh(submission)
-                return submission
+            
+            db.commit()
+            db.refresh(submission)
         except Exception as e:
-            if os.path.exists(file_path):
+            db.rollback()
+            # blob 文件可能被其他提交共享，不在此删除；没有记录的文件由 StorageService.collect_garbage 回收
+            if not content_hash and os.path.exists(file_path):
                 os.remove(file_path)
             raise SubmissionError("db_error", f"数据库操作失败: {e}")
+        
+        ExportCacheService.invalidate_task(task.id)
+        RosterService.set_submitted(task.id, member_id, True)
+        
+        # 提交成功后再删除旧文件（blob 由 StorageService.collect_garbage 回收）
+        if not old_hash and old_path and old_path != file_path and os.path.exists(old_path):
+            os.remove(old_path)
+        
+        return submission
+    
+    @staticmethod
+    async def create_file_submission(
+        db: Session,
+        task_id: int,
+        member_id: int,
+        file: UploadFile,
+        is_private: bool = False,
+        item_index: int = 1,
+        submission_type: str = "file"
+    ) -> Submission:
+        """创建文件/图片提交"""
+        logger.info(f"[创建提交] task_id={task_id}, member_id={member_id}, type={submission_type}")
+        
+        task, existing = SubmissionService.check_file_submission(
+            db, task_id, member_id, file.filename, item_index, submission_type
+        )
+        
+        # 边写边计算哈希，相同内容只保存一份
+        temp_path = StorageService.get_temp_path()
+        file_size, content_hash = await SubmissionService.save_upload_file(file, temp_path)
+        try:
+            file_path = StorageService.store_blob(db, temp_path, content_hash, file_size)
+        except Exception as e:
+            db.rollback()
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise SubmissionError("file_save_error", f"保存文件失败: {e}")
+        
+        return SubmissionService.save_file_submission(
+            db, task, member_id, existing,
+            original_filename=file.filename,
+            file_type=file.content_type,
+            stored_filename=content_hash,
+            file_path=file_path,
+            file_size=file_size,
+            is_private=is_private,
+            item_index=item_index,
+            submission_type=submission_type,
+            content_hash=content_hash
+        )
     
     @staticmethod
     def create_text_submission(
@@ -298,8 +424,11 @@ class SubmissionService:
             existing.upload_count += 1
             db.commit()
             db.refresh(existing)
+            ExportCacheService.invalidate_task(task_id)
+            RosterService.set_submitted(task_id, member_id, True)
             return existing
         else:
+            TaskStatService.on_submission_added(db, task_id, member_id)
             submission = Submission(
                 task_id=task_id,
                 member_id=member_id,
@@ -312,6 +441,8 @@ class SubmissionService:
             db.add(submission)
             db.commit()
             db.refresh(submission)
+            ExportCacheService.invalidate_task(task_id)
+            RosterService.set_submitted(task_id, member_id, True)
             return submission
     
     @staticmethod
@@ -365,8 +496,11 @@ class SubmissionService:
             existing.upload_count += 1
             db.commit()
             db.refresh(existing)
+            ExportCacheService.invalidate_task(task_id)
+            RosterService.set_submitted(task_id, member_id, True)
             return existing
         else:
+            TaskStatService.on_submission_added(db, task_id, member_id)
             submission = Submission(
                 task_id=task_id,
                 member_id=member_id,
@@ -379,8 +513,22 @@ class SubmissionService:
             db.add(submission)
             db.commit()
             db.refresh(submission)
+            ExportCacheService.invalidate_task(task_id)
+            RosterService.set_submitted(task_id, member_id, True)
             return submission
     
+    @staticmethod
+    def record_tombstone(db: Session, submission: Submission, reason: str) -> None:
+        """记录提交被删除或替换（不提交事务）"""
+        db.add(SubmissionTombstone(
+            task_id=submission.task_id,
+            member_id=submission.member_id,
+            submission_type=submission.submission_type,
+            item_index=submission.item_index,
+            original_filename=submission.original_filename,
+            reason=reason
+        ))
+    
     @staticmethod
     def delete_submission(db: Session, submission_id: int) -> bool:
         """删除提交"""
@@ -388,11 +536,28 @@ class SubmissionService:
         if not submission:
             return False
         
-        if submission.file_path and os.path.exists(submission.file_path):
-            os.remove(submission.file_path)
+        task_id = submission.task_id
+        member_id = submission.member_id
+        content_hash = submission.content_hash
+        file_path = submission.file_path
+        if content_hash:
+            StorageService.release_blob(db, content_hash)
+        
+        SubmissionService.record_tombstone(db, submission, "deleted")
         
         db.delete(submission)
+        TaskStatService.on_submission_removed(db, task_id, member_id)
         db.commit()
+        ExportCacheService.invalidate_task(task_id)
+        still_submitted = db.query(Submission.id).filter(
+            Submission.task_id == task_id,
+            Submission.member_id == member_id
+        ).first() is not None
+        RosterService.set_submitted(task_id, member_id, still_submitted)
+        
+        # 提交成功后再删除文件（blob 由 StorageService.collect_garbage 回收）
+        if not content_hash and file_path and os.path.exists(file_path):
+            os.remove(file_path)
         return True
     
     @staticmethod
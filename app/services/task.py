@@ -1,10 +1,13 @@
-from typing import List, Optional
+from typing import Any, Iterator, List, Optional, Tuple
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import and_, func
 
-from app.models import Task, Member, Submission
+from app.models import Task, Member, Submission, TaskStat
 from app.schemas.task import TaskCreate, TaskUpdate, TaskStats
+from app.services.roster import RosterService
+from app.services.scheduler import SchedulerService
+from app.services.task_stat import TaskStatService
 
 
 class TaskService:
@@ -49,8 +52,13 @@ class TaskService:
             auto_remind_enabled=task.auto_remind_enabled,
         )
         db.add(db_task)
+        db.flush()
+        
+        total_members = db.query(func.count(Member.id)).filter(Member.class_id == task.class_id).scalar() or 0
+        db.add(TaskStat(task_id=db_task.id, total_members=total_members, submitted_count=0))
         db.commit()
         db.refresh(db_task)
+        SchedulerService.schedule_task_reminder(db_task)
         return db_task
     
     @staticmethod
@@ -60,12 +68,17 @@ class TaskService:
         if not db_task:
             return None
         
+        old_class_id = db_task.class_id
         update_data = task.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_task, key, value)
         
         db.commit()
         db.refresh(db_task)
+        if db_task.class_id != old_class_id:
+            TaskStatService.rebuild(db, task_ids=[task_id])
+        RosterService.invalidate_task(task_id)
+        SchedulerService.schedule_task_reminder(db_task)
         return db_task
     
     @staticmethod
@@ -75,41 +88,77 @@ class TaskService:
         if not db_task:
             return False
         
+        db.query(TaskStat).filter(TaskStat.task_id == task_id).delete(synchronize_session=False)
         db.delete(db_task)
         db.commit()
+        RosterService.invalidate_task(task_id)
+        SchedulerService.unschedule_task_reminder(task_id)
         return True
     
+    # 提交情况表的列
+    STATUS_SHEET_HEADERS = ["学号", "姓名", "是否提交", "最后提交时间", "提交项数", "上传次数", "文件总大小(字节)"]
+    
+    # 流式导出时每次从服务端游标读取的行数
+    STATUS_FETCH_SIZE = 1000
+    
     @staticmethod
-    def get_task_stats(db: Session, task_id: int) -> Optional[TaskStats]:
-        """获取任务统计"""
-        task = db.query(Task).filter(Task.id == task_id).first()
-        if not task:
-            return None
-        
-        # 获取班级总人数
-        total_members = db.query(func.count(Member.id)).filter(
+    def iter_status_rows(db: Session, task: Task) -> Iterator[Tuple[Any, ...]]:
+        """逐行生成任务提交情况（一次分组查询，服务端游标读取）"""
+        query = db.query(
+            Member.student_id,
+            Member.name,
+            func.count(Submission.id),
+            func.max(Submission.updated_at),
+            func.coalesce(func.sum(Submission.upload_count), 0),
+            func.coalesce(func.sum(Submission.file_size), 0)
+        ).outerjoin(
+            Submission,
+            and_(Submission.member_id == Member.id, Submission.task_id == task.id)
+        ).filter(
             Member.class_id == task.class_id
-        ).scalar() or 0
+        ).group_by(Member.id).order_by(Member.id)
         
-        # 获取已提交人数（去重）
-        submitted_count = db.query(func.count(func.distinct(Submission.member_id))).filter(
-            Submission.task_id == task_id
-        ).scalar() or 0
-        
-        # 计算未提交人数
-        not_submitted_count = total_members - submitted_count
+        for student_id, name, item_count, last_time, upload_count, file_size in query.yield_per(TaskService.STATUS_FETCH_SIZE):
+            yield (
+                student_id,
+                name,
+                "是" if item_count else "否",
+                last_time.strftime("%Y-%m-%d %H:%M:%S") if last_time else "",
+                item_count,
+                int(upload_count),
+                int(file_size),
+            )
+    
+    @staticmethod
+    def _to_task_stats(stat: TaskStat) -> TaskStats:
+        total_members = stat.total_members
+        submitted_count = stat.submitted_count
         
         # 计算提交率
         submission_rate = (submitted_count / total_members * 100) if total_members > 0 else 0
         
         return TaskStats(
-            task_id=task_id,
+            task_id=stat.task_id,
             total_members=total_members,
             submitted_count=submitted_count,
-            not_submitted_count=not_submitted_count,
+            not_submitted_count=total_members - submitted_count,
             submission_rate=round(submission_rate, 2)
         )
     
+    @staticmethod
+    def get_task_stats(db: Session, task_id: int) -> Optional[TaskStats]:
+        """获取任务统计（读取 task_stats 计数表）"""
+        stat = TaskStatService.get_stats(db, [task_id]).get(task_id)
+        if not stat:
+            return None
+        return TaskService._to_task_stats(stat)
+    
+    @staticmethod
+    def get_tasks_stats(db: Session, task_ids: List[int]) -> List[TaskStats]:
+        """批量获取任务统计（不存在的任务忽略）"""
+        stats = TaskStatService.get_stats(db, task_ids)
+        return [TaskService._to_task_stats(stats[task_id]) for task_id in task_ids if task_id in stats]
+    
     @staticmethod
     def is_deadline_passed(task: Task) -> bool:
         """检查是否已过截止时间"""
@@ -0,0 +1,151 @@
+"""任务统计计数服务"""
+from typing import Dict, Iterable, Optional
+import logging
+
+from sqlalchemy import and_, exists, func, select
+from sqlalchemy.orm import Session
+
+from app.models import Task, Member, Submission, TaskStat
+
+logger = logging.getLogger(__name__)
+
+
+class TaskStatService:
+    """
+    任务统计计数服务
+
+    task_stats 表保存每个任务的班级人数和已提交人数，由提交/成员变更在同一事务中
+    增量更新（调用方负责提交事务），读取时不再做 COUNT。
+    没有计数行的任务（历史数据）在首次读取时补算；计数异常时可用 rebuild 全量修复：
+
+        python -m app.services.task_stat
+    """
+
+    @staticmethod
+    def _bump(db: Session, task_filter, **deltas: int) -> None:
+        """对符合条件的计数行做原子加减"""
+        values = {getattr(TaskStat, name): getattr(TaskStat, name) + delta for name, delta in deltas.items()}
+        db.query(TaskStat).filter(task_filter).update(values, synchronize_session=False)
+
+    @staticmethod
+    def _submission_exists(task_id: int, member_id: int):
+        return exists().where(
+            Submission.task_id == task_id,
+            Submission.member_id == member_id
+        )
+
+    @staticmethod
+    def on_submission_added(db: Session, task_id: int, member_id: int) -> None:
+        """
+        新增提交记录前调用：成员在该任务的第一条提交使已提交人数加一
+
+        是否已有提交在同一条 UPDATE 中判断，计数行的行锁使并发的首次提交依次判断，不会重复计数。
+        """
+        TaskStatService._bump(
+            db,
+            and_(TaskStat.task_id == task_id, ~TaskStatService._submission_exists(task_id, member_id)),
+            submitted_count=1
+        )
+
+    @staticmethod
+    def on_submission_removed(db: Session, task_id: int, member_id: int) -> None:
+        """删除提交记录后调用（已 flush）：成员在该任务已无提交时已提交人数减一"""
+        db.flush()
+        TaskStatService._bump(
+            db,
+            and_(TaskStat.task_id == task_id, ~TaskStatService._submission_exists(task_id, member_id)),
+            submitted_count=-1
+        )
+
+    @staticmethod
+    def on_member_added(db: Session, class_id: int) -> None:
+        """班级新增成员：该班级所有任务的总人数加一"""
+        class_tasks = select(Task.id).where(Task.class_id == class_id)
+        TaskStatService._bump(db, TaskStat.task_id.in_(class_tasks), total_members=1)
+
+    @staticmethod
+    def on_member_removed(db: Session, member: Member) -> None:
+        """删除成员前调用：总人数减一，有提交的任务已提交人数减一"""
+        class_tasks = select(Task.id).where(Task.class_id == member.class_id)
+        TaskStatService._bump(db, TaskStat.task_id.in_(class_tasks), total_members=-1)
+        submitted_tasks = select(Submission.task_id).where(Submission.member_id == member.id).distinct()
+        TaskStatService._bump(db, TaskStat.task_id.in_(submitted_tasks), submitted_count=-1)
+
+    @staticmethod
+    def rebuild(
+        db: Session,
+        class_id: Optional[int] = None,
+        task_ids: Optional[Iterable[int]] = None
+    ) -> int:
+        """
+        从提交和成员数据重新计算计数并提交事务
+
+        Args:
+            class_id: 只重算该班级的任务
+            task_ids: 只重算这些任务
+
+        Returns:
+            重算的任务数量
+        """
+        query = db.query(Task.id, Task.class_id)
+        if class_id is not None:
+            query = query.filter(Task.class_id == class_id)
+        if task_ids is not None:
+            query = query.filter(Task.id.in_(list(task_ids)))
+        tasks = query.all()
+        if not tasks:
+            return 0
+
+        ids = [task_id for task_id, _ in tasks]
+        member_counts = dict(
+            db.query(Member.class_id, func.count(Member.id))
+            .filter(Member.class_id.in_({c for _, c in tasks}))
+            .group_by(Member.class_id)
+            .all()
+        )
+        submitted_counts = dict(
+            db.query(Submission.task_id, func.count(func.distinct(Submission.member_id)))
+            .filter(Submission.task_id.in_(ids))
+            .group_by(Submission.task_id)
+            .all()
+        )
+        stats = {s.task_id: s for s in db.query(TaskStat).filter(TaskStat.task_id.in_(ids)).all()}
+
+        for task_id, task_class_id in tasks:
+            stat = stats.get(task_id)
+            if stat is None:
+                stat = TaskStat(task_id=task_id)
+                db.add(stat)
+            stat.total_members = member_counts.get(task_class_id, 0)
+            stat.submitted_count = submitted_counts.get(task_id, 0)
+        db.commit()
+        return len(tasks)
+
+    @staticmethod
+    def get_stats(db: Session, task_ids: Iterable[int]) -> Dict[int, TaskStat]:
+        """批量读取计数（缺少计数行的任务先补算）"""
+        ids = list(task_ids)
+        if not ids:
+            return {}
+        stats = {s.task_id: s for s in db.query(TaskStat).filter(TaskStat.task_id.in_(ids)).all()}
+        missing = [task_id for task_id in ids if task_id not in stats]
+        if missing and TaskStatService.rebuild(db, task_ids=missing):
+            stats.update({s.task_id: s for s in db.query(TaskStat).filter(TaskStat.task_id.in_(missing)).all()})
+        return stats
+
+
+def main() -> None:
+    """全量重算所有任务的统计计数"""
+    from app.database import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        count = TaskStatService.rebuild(db)
+        logger.info(f"[任务统计] 已重算 {count} 个任务")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""断点续传上传服务"""
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Optional
+import os
+import shutil
+import uuid
+import logging
+
+import aiofiles
+from sqlalchemy.orm import Session
+
+from app.models import UploadSession, Submission
+from app.config import settings
+from app.schemas.upload import UploadSessionCreate, UploadSessionResponse
+from app.services.submission import SubmissionService, SubmissionError
+from app.services.storage import StorageService
+
+logger = logging.getLogger(__name__)
+
+
+class UploadService:
+    """断点续传上传服务"""
+
+    # 未完成上传的分片临时目录（位于 upload_dir 下）
+    PARTIAL_DIR = ".partial"
+
+    @staticmethod
+    def get_partial_dir() -> str:
+        """获取分片临时目录"""
+        partial_dir = os.path.join(settings.upload_dir, UploadService.PARTIAL_DIR)
+        os.makedirs(partial_dir, exist_ok=True)
+        return partial_dir
+
+    @staticmethod
+    def get_partial_path(upload_id: str) -> str:
+        """获取上传会话的临时文件路径"""
+        return os.path.join(UploadService.get_partial_dir(), f"{upload_id}.part")
+
+    @staticmethod
+    def get_session(db: Session, upload_id: str) -> Optional[UploadSession]:
+        """获取未过期的上传会话"""
+        return db.query(UploadSession).filter(
+            UploadSession.id == upload_id,
+            UploadSession.expires_at > datetime.now()
+        ).first()
+
+    @staticmethod
+    def to_response(session: UploadSession) -> UploadSessionResponse:
+        """转换为会话状态响应"""
+        total_chunks = -(-session.total_size // session.chunk_size)
+        return UploadSessionResponse(
+            upload_id=session.id,
+            task_id=session.task_id,
+            member_id=session.member_id,
+            filename=session.original_filename,
+            total_size=session.total_size,
+            chunk_size=session.chunk_size,
+            received_size=session.received_size,
+            next_chunk=session.received_size // session.chunk_size,
+            total_chunks=total_chunks,
+            is_complete=session.received_size >= session.total_size,
+            expires_at=session.expires_at
+        )
+
+    @staticmethod
+    def create_session(db: Session, data: UploadSessionCreate) -> UploadSession:
+        """创建上传会话（提前执行与普通上传相同的校验）"""
+        if data.file_size <= 0:
+            raise SubmissionError("invalid_file_size", "文件大小无效")
+        if data.file_size > settings.max_file_size:
+            raise SubmissionError("file_too_large", f"文件大小超过限制: {settings.max_file_size // 1024 // 1024}MB")
+
+        SubmissionService.check_file_submission(
+            db, data.task_id, data.member_id, data.filename, data.item_index, data.submission_type
+        )
+
+        upload_id = uuid.uuid4().hex
+        session = UploadSession(
+            id=upload_id,
+            task_id=data.task_id,
+            member_id=data.member_id,
+            submission_type=data.submission_type,
+            item_index=data.item_index,
+            is_private=data.is_private,
+            original_filename=data.filename,
+            file_type=data.content_type,
+            total_size=data.file_size,
+            chunk_size=settings.upload_chunk_size,
+            received_size=0,
+            expires_at=datetime.now() + timedelta(hours=settings.upload_session_expire_hours)
+        )
+
+        # 预先创建空的临时文件，分片按偏移写入
+        with open(UploadService.get_partial_path(upload_id), "wb"):
+            pass
+
+        db.add(session)
+        db.commit()
+        db.refresh(session)
+        logger.info(f"[断点续传] 创建会话 {upload_id}: task_id={data.task_id}, member_id={data.member_id}, size={data.file_size}")
+        return session
+
+    @staticmethod
+    async def write_chunk(
+        db: Session,
+        upload_id: str,
+        chunk_index: int,
+        stream: AsyncIterator[bytes]
+    ) -> UploadSession:
+        """
+        写入一个分片
+
+        分片必须按顺序上传；重复上传已接收的分片会被忽略（便于客户端重试）。
+        写入中断时文件尾部的残留数据会在下次写入同一分片时被截断覆盖。
+        """
+        session = UploadService.get_session(db, upload_id)
+        if not session:
+            raise SubmissionError("upload_not_found", "上传会话不存在或已过期")
+
+        total_chunks = -(-session.total_size // session.chunk_size)
+        if chunk_index < 0 or chunk_index >= total_chunks:
+            raise SubmissionError("invalid_chunk_index", f"分片序号无效: {chunk_index}，共 {total_chunks} 块")
+
+        next_chunk = session.received_size // session.chunk_size
+        if chunk_index < next_chunk:
+            return session
+        if chunk_index > next_chunk:
+            raise SubmissionError("chunk_out_of_order", f"请先上传第 {next_chunk} 块")
+
+        offset = chunk_index * session.chunk_size
+        expected = min(session.chunk_size, session.total_size - offset)
+        written = 0
+        try:
+            async with aiofiles.open(UploadService.get_partial_path(upload_id), "r+b") as f:
+                await f.seek(offset)
+                async for data in stream:
+                    if not data:
+                        continue
+                    written += len(data)
+                    if written > expected:
+                        raise SubmissionError("chunk_too_large", f"分片大小超过预期: {expected} 字节")
+                    await f.write(data)
+                await f.truncate()
+        except FileNotFoundError:
+            raise SubmissionError("upload_not_found", "上传会话不存在或已过期")
+
+        if written != expected:
+            raise SubmissionError("chunk_incomplete", f"分片不完整: 收到 {written} 字节，预期 {expected} 字节")
+
+        session.received_size = offset + written
+        session.expires_at = datetime.now() + timedelta(hours=settings.upload_session_expire_hours)
+        db.commit()
+        db.refresh(session)
+        return session
+
+    @staticmethod
+    def complete_session(db: Session, upload_id: str) -> Submission:
+        """
+        完成上传，生成提交记录
+
+        可重复调用：会话已完成（如上次响应丢失后重试）时返回已生成的提交。
+        临时文件在提交记录写入成功后才删除，写入失败时会话和临时文件都保留，可直接重试。
+        """
+        completed = db.query(Submission).filter(Submission.upload_id == upload_id).first()
+        if completed:
+            return completed
+
+        session = UploadService.get_session(db, upload_id)
+        if not session:
+            raise SubmissionError("upload_not_found", "上传会话不存在或已过期")
+
+        if session.received_size < session.total_size:
+            raise SubmissionError(
+                "upload_incomplete",
+                f"文件尚未上传完成: {session.received_size}/{session.total_size}"
+            )
+
+        partial_path = UploadService.get_partial_path(upload_id)
+        if not os.path.exists(partial_path) or os.path.getsize(partial_path) != session.total_size:
+            raise SubmissionError("upload_corrupted", "临时文件缺失或大小不一致，请重新上传")
+
+        task, existing = SubmissionService.check_file_submission(
+            db, session.task_id, session.member_id, session.original_filename,
+            session.item_index, session.submission_type
+        )
+
+        content_hash, _ = StorageService.hash_file(partial_path)
+        # 以硬链接（不支持时复制）的方式存入 blob，临时文件保留到提交成功
+        temp_path = StorageService.get_temp_path()
+        try:
+            try:
+                os.link(partial_path, temp_path)
+            except OSError:
+                shutil.copyfile(partial_path, temp_path)
+            file_path = StorageService.store_blob(db, temp_path, content_hash, session.total_size)
+        except Exception as e:
+            db.rollback()
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise SubmissionError("file_save_error", f"保存文件失败: {e}")
+
+        member_id = session.member_id
+        original_filename = session.original_filename
+        file_type = session.file_type
+        file_size = session.total_size
+        is_private = session.is_private
+        item_index = session.item_index
+        submission_type = session.submission_type
+
+        # 会话删除与提交记录在同一事务中提交
+        db.delete(session)
+
+        submission = SubmissionService.save_file_submission(
+            db, task, member_id, existing,
+            original_filename=original_filename,
+            file_type=file_type,
+            stored_filename=content_hash,
+            file_path=file_path,
+            file_size=file_size,
+            is_private=is_private,
+            item_index=item_index,
+            submission_type=submission_type,
+            content_hash=content_hash,
+            upload_id=upload_id
+        )
+        os.remove(partial_path)
+        logger.info(f"[断点续传] 完成会话 {upload_id}: {original_filename} ({file_size} 字节)")
+        return submission
+
+    @staticmethod
+    def cancel_session(db: Session, upload_id: str) -> bool:
+        """取消上传会话并删除临时文件"""
+        session = db.query(UploadSession).filter(UploadSession.id == upload_id).first()
+        if not session:
+            return False
+
+        partial_path = UploadService.get_partial_path(upload_id)
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+        db.delete(session)
+        db.commit()
+        return True
+
+    @staticmethod
+    def cleanup_expired_sessions(db: Session) -> int:
+        """
+        清理过期的上传会话及其临时文件
+
+        同时清理没有对应会话、且超过过期时长未修改的孤立临时文件。
+
+        Returns:
+            清理的会话数量
+        """
+        now = datetime.now()
+        expired = db.query(UploadSession).filter(UploadSession.expires_at <= now).all()
+        for session in expired:
+            partial_path = UploadService.get_partial_path(session.id)
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            db.delete(session)
+        db.commit()
+
+        # 清理孤立的临时文件
+        partial_dir = UploadService.get_partial_dir()
+        active_ids = {row.id for row in db.query(UploadSession.id).all()}
+        stale_before = (now - timedelta(hours=settings.upload_session_expire_hours)).timestamp()
+        for name in os.listdir(partial_dir):
+            upload_id, ext = os.path.splitext(name)
+            path = os.path.join(partial_dir, name)
+            if ext != ".part" or upload_id in active_ids:
+                continue
+            if os.path.getmtime(path) < stale_before:
+                os.remove(path)
+
+        if expired:
+            logger.info(f"[断点续传] 清理过期会话 {len(expired)} 个")
+        return len(expired)
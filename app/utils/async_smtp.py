@@ -0,0 +1,192 @@
+"""异步SMTP批量发信"""
+import asyncio
+import ssl
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+import aiosmtplib
+
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# SMTP连接超时（秒）
+SMTP_TIMEOUT = 30
+
+# 表示服务器关闭了连接的响应码（如超过单连接发信数限制）
+SMTP_CLOSING_CODES = (421,)
+
+# 熔断期间未发送的邮件的说明
+DEFERRED_MESSAGE = "邮件服务暂不可用，已延后发送"
+
+
+def is_transport_error(error: Exception) -> bool:
+    """是否为邮件服务不可用类错误（认证失败、连接失败、连接中断、超时）"""
+    return isinstance(error, (
+        aiosmtplib.SMTPAuthenticationError,
+        aiosmtplib.SMTPConnectError,
+        aiosmtplib.SMTPServerDisconnected,
+        aiosmtplib.SMTPTimeoutError,
+        OSError,
+    ))
+
+
+def describe_smtp_error(error: Exception) -> str:
+    """把SMTP异常转为记录在提醒日志中的错误信息"""
+    if isinstance(error, aiosmtplib.SMTPAuthenticationError):
+        return f"SMTP认证失败: {error.code} - {error.message}"
+    if isinstance(error, aiosmtplib.SMTPConnectError):
+        return f"SMTP连接失败: {error}"
+    if isinstance(error, aiosmtplib.SMTPException):
+        return f"SMTP错误: {error}"
+    return f"发送异常: {type(error).__name__}: {error}"
+
+
+class _AsyncConnection:
+    """单个工作协程持有的SMTP连接（登录一次，按上限或断线重连）"""
+
+    def __init__(self, mailer: "AsyncMailer"):
+        self.mailer = mailer
+        self.client: Optional[aiosmtplib.SMTP] = None
+        self.sent_on_connection = 0
+
+    async def connect(self) -> None:
+        config = self.mailer.smtp_config
+        use_ssl = config["use_ssl"]
+        client = aiosmtplib.SMTP(
+            hostname=config["host"],
+            port=config["port"],
+            use_tls=use_ssl,
+            start_tls=not use_ssl,
+            tls_context=ssl.create_default_context(),
+            timeout=SMTP_TIMEOUT
+        )
+        await client.connect()
+        try:
+            await client.login(config["user"], config["password"])
+        except BaseException:
+            client.close()
+            raise
+        self.client = client
+        self.sent_on_connection = 0
+        self.mailer.connections += 1
+
+    async def close(self) -> None:
+        if self.client is None:
+            return
+        client, self.client = self.client, None
+        try:
+            await client.quit()
+        except Exception:
+            client.close()
+
+    @staticmethod
+    def _is_disconnect(error: Exception) -> bool:
+        if isinstance(error, (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPTimeoutError)):
+            return True
+        if isinstance(error, aiosmtplib.SMTPResponseException):
+            return error.code in SMTP_CLOSING_CODES
+        return isinstance(error, (ConnectionError, TimeoutError))
+
+    async def send(self, to_email: str, message: str) -> None:
+        max_messages = self.mailer.max_messages
+        if self.client is not None and max_messages and self.sent_on_connection >= max_messages:
+            await self.close()
+
+        for attempt in range(2):
+            if self.client is None:
+                await self.connect()
+            try:
+                await self.client.sendmail(self.mailer.smtp_config["user"], [to_email], message)
+                self.sent_on_connection += 1
+                return
+            except Exception as e:
+                if attempt or not self._is_disconnect(e):
+                    raise
+                logger.warning(f"[SMTP] 连接已断开（{e}），重新连接后重试 {to_email}")
+                await self.close()
+
+
+class AsyncMailer:
+    """
+    异步批量发信引擎
+
+    最多 concurrency 个工作协程并发发送，每个协程复用自己的SMTP连接；
+    所有发送先从服务商的令牌桶取令牌，保证整体速率不超过服务商限制。
+    认证失败或连续连接失败时熔断器打开，其余邮件不再尝试，直接标记为延后发送。
+    """
+
+    def __init__(
+        self,
+        smtp_config: dict,
+        concurrency: int = 1,
+        max_messages: int = 0,
+        limiter: Optional[TokenBucket] = None,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        """
+        Args:
+            smtp_config: EmailService.get_smtp_config 返回的配置
+            concurrency: 最大并发连接数
+            max_messages: 单个连接最多发送的邮件数，0 表示不限制
+            limiter: 限速令牌桶，不传则不限速
+            breaker: 熔断器，不传则只在本批次内生效
+        """
+        self.smtp_config = smtp_config
+        self.concurrency = max(concurrency, 1)
+        self.max_messages = max_messages
+        self.limiter = limiter
+        self.breaker = breaker or CircuitBreaker()
+        self.connections = 0
+
+    async def _worker(self, queue: asyncio.Queue, results: list) -> None:
+        connection = _AsyncConnection(self)
+        try:
+            while True:
+                try:
+                    index, to_email, message = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                if not self.breaker.allow():
+                    results[index] = (None, DEFERRED_MESSAGE)
+                    continue
+                try:
+                    if self.limiter is not None:
+                        await self.limiter.acquire()
+                    await connection.send(to_email, message)
+                    self.breaker.record_success()
+                    results[index] = (True, "")
+                    logger.info(f"[发送成功] {to_email}")
+                except Exception as e:
+                    error_msg = describe_smtp_error(e)
+                    if is_transport_error(e):
+                        trip = isinstance(e, aiosmtplib.SMTPAuthenticationError)
+                        self.breaker.record_failure(error_msg, trip=trip)
+                        await connection.close()
+                    else:
+                        # 服务器正常响应（如收件人被拒），说明服务可用
+                        self.breaker.record_success()
+                    results[index] = (False, error_msg)
+                    logger.error(f"[发送失败] {to_email}: {error_msg}")
+        finally:
+            await connection.close()
+
+    async def send_all(self, messages: Sequence[Tuple[str, str]]) -> List[Tuple[Optional[bool], str]]:
+        """
+        并发发送一批邮件
+
+        Args:
+            messages: [(收件人, 完整邮件内容)]
+
+        Returns:
+            与 messages 顺序一致的 [(是否成功, 错误信息)]，熔断期间未尝试的为 (None, 说明)
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        for index, (to_email, message) in enumerate(messages):
+            queue.put_nowait((index, to_email, message))
+        results: List[Tuple[Optional[bool], str]] = [(False, "")] * len(messages)
+
+        workers = min(self.concurrency, len(messages))
+        await asyncio.gather(*(self._worker(queue, results) for _ in range(workers)))
+        return results
@@ -0,0 +1,125 @@
+"""熔断器工具"""
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+# 熔断器状态
+STATE_CLOSED = "closed"  # 正常放行
+STATE_OPEN = "open"  # 熔断中，直接拒绝
+STATE_HALF_OPEN = "half_open"  # 恢复探测中，只放行一个请求
+
+
+class CircuitBreaker:
+    """
+    熔断器
+
+    连续失败达到 failure_threshold 次（或发生必定失败的错误，如认证失败）后进入 open 状态，
+    此后 recovery_seconds 秒内的请求直接拒绝；到期后进入 half_open，只放行一个探测请求，
+    探测成功恢复 closed，失败重新 open。状态由线程锁保护，可在多个线程/事件循环间共享。
+    """
+
+    def __init__(self, failure_threshold: int = 3, recovery_seconds: float = 300):
+        self.failure_threshold = max(failure_threshold, 1)
+        self.recovery_seconds = recovery_seconds
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._opened_at_wall: Optional[datetime] = None
+        self._probing = False
+        self._last_error: Optional[str] = None
+
+    def allow(self) -> bool:
+        """是否放行本次请求"""
+        with self._lock:
+            if self._state == STATE_CLOSED:
+                return True
+            if self._state == STATE_OPEN:
+                if time.monotonic() - self._opened_at < self.recovery_seconds:
+                    return False
+                self._state = STATE_HALF_OPEN
+                self._probing = False
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        """请求成功（服务可用）"""
+        with self._lock:
+            self._state = STATE_CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self, error: str, trip: bool = False) -> None:
+        """
+        请求因服务不可用而失败
+
+        Args:
+            error: 错误信息
+            trip: 是否立即熔断（不等待达到失败次数）
+        """
+        with self._lock:
+            self._failures += 1
+            self._last_error = error
+            self._probing = False
+            if trip or self._state == STATE_HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = STATE_OPEN
+                self._opened_at = time.monotonic()
+                self._opened_at_wall = datetime.now()
+
+    def reset(self) -> None:
+        """手动恢复为 closed"""
+        with self._lock:
+            self._state = STATE_CLOSED
+            self._failures = 0
+            self._probing = False
+            self._last_error = None
+            self._opened_at_wall = None
+
+    def retry_at(self) -> datetime:
+        """下一次允许探测的时间"""
+        with self._lock:
+            if self._state == STATE_OPEN and self._opened_at_wall:
+                return self._opened_at_wall + timedelta(seconds=self.recovery_seconds)
+            return datetime.now()
+
+    def snapshot(self) -> dict:
+        """当前状态"""
+        with self._lock:
+            state = self._state
+            if state == STATE_OPEN and time.monotonic() - self._opened_at >= self.recovery_seconds:
+                state = STATE_HALF_OPEN
+            retry_at = None
+            if self._state == STATE_OPEN and self._opened_at_wall:
+                retry_at = self._opened_at_wall + timedelta(seconds=self.recovery_seconds)
+            return {
+                "state": state,
+                "failures": self._failures,
+                "last_error": self._last_error,
+                "opened_at": self._opened_at_wall if self._state != STATE_CLOSED else None,
+                "retry_at": retry_at,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(key: str, failure_threshold: int, recovery_seconds: float) -> CircuitBreaker:
+    """按键获取进程内共享的熔断器（如每个SMTP服务器一个），配置变化时同步更新"""
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(failure_threshold, recovery_seconds)
+            _breakers[key] = breaker
+        breaker.failure_threshold = max(failure_threshold, 1)
+        breaker.recovery_seconds = recovery_seconds
+        return breaker
+
+
+def all_breakers() -> Dict[str, CircuitBreaker]:
+    """所有已创建的熔断器"""
+    with _breakers_lock:
+        return dict(_breakers)
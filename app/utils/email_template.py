@@ -1,7 +1,22 @@
 """邮件模板工具"""
+import base64
+import uuid
+from dataclasses import dataclass
 from datetime import datetime
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from functools import lru_cache
 from typing import Optional
 
+# 提醒邮件模板版本（编译缓存键的一部分），修改 generate_reminder_email 的内容时递增
+REMINDER_TEMPLATE_VERSION = 1
+
+# 编译模板时代替成员姓名的占位符
+MEMBER_NAME_SLOT = "\x00member_name\x00"
+
+# 编译模板的缓存数量（按任务、截止时间、发件人区分）
+REMINDER_TEMPLATE_CACHE_SIZE = 256
+
 
 def generate_reminder_email(
     task_title: str,
@@ -167,3 +182,88 @@ def generate_plain_text_reminder(
 ---
 此邮件由班级文件收集系统自动发送，请勿直接回复
 """
+
+
+def _b64_body(data: bytes) -> str:
+    """按MIME要求（每行不超过76个字符）做Base64编码"""
+    return base64.encodebytes(data).decode("ascii")
+
+
+def _pad3(text: str) -> bytes:
+    """UTF-8编码并在末尾补空格到3字节的整数倍，使分段Base64编码可以直接拼接"""
+    data = text.encode("utf-8")
+    return data + b" " * (-len(data) % 3)
+
+
+@dataclass(frozen=True)
+class ReminderMailTemplate:
+    """
+    编译后的提醒邮件
+
+    整封邮件（头部、HTML正文的Base64编码）按任务只生成一次，
+    只有收件人地址和姓名所在的一行需要逐人编码后拼接。
+    """
+    head: str  # To 之前的头部
+    head_rest: str  # To 之后的头部直到正文开始
+    body_prefix: str  # 姓名行之前的正文（已编码）
+    name_line_prefix: str
+    name_line_suffix: str
+    body_suffix: str  # 姓名行之后的正文（已编码）和结束边界
+
+    def render(self, to_email: str, member_name: str) -> str:
+        """生成发给某个成员的完整邮件内容（与 msg.as_string() 格式相同）"""
+        name_line = _b64_body(_pad3(self.name_line_prefix + member_name + self.name_line_suffix))
+        return "".join((self.head, to_email, self.head_rest, self.body_prefix, name_line, self.body_suffix))
+
+
+@lru_cache(maxsize=REMINDER_TEMPLATE_CACHE_SIZE)
+def compile_reminder_email(
+    sender: str,
+    task_title: str,
+    deadline: Optional[datetime],
+    submit_url: str,
+    version: int = REMINDER_TEMPLATE_VERSION
+) -> ReminderMailTemplate:
+    """
+    编译提醒邮件（结果按参数缓存）
+
+    Args:
+        sender: 发件人
+        task_title: 任务标题
+        deadline: 截止时间
+        submit_url: 提交链接
+        version: 模板版本
+    """
+    subject, html_content = generate_reminder_email(task_title, deadline, submit_url, MEMBER_NAME_SLOT)
+
+    # 正文按姓名所在的行切成三段，前两段补齐到3字节边界后分别编码
+    name_pos = html_content.index(MEMBER_NAME_SLOT)
+    line_start = html_content.rfind("\n", 0, name_pos) + 1
+    line_end = html_content.index("\n", name_pos)
+    before = html_content[:line_start]
+    name_line = html_content[line_start:line_end]
+    after = html_content[line_end:]
+    name_line_prefix, name_line_suffix = name_line.split(MEMBER_NAME_SLOT)
+
+    # 用占位符生成邮件骨架，保证头部格式与逐封构建时一致
+    to_slot = f"to-{uuid.uuid4().hex}@slot.invalid"
+    body_slot = f"body-{uuid.uuid4().hex}"
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = subject
+    msg["From"] = sender
+    msg["To"] = to_slot
+    part = MIMEText("", "html", "utf-8")
+    part.set_payload(body_slot)
+    msg.attach(part)
+    skeleton = msg.as_string()
+
+    head, rest = skeleton.split(to_slot)
+    head_rest, tail = rest.split(body_slot)
+    return ReminderMailTemplate(
+        head=head,
+        head_rest=head_rest,
+        body_prefix=_b64_body(_pad3(before)),
+        name_line_prefix=name_line_prefix,
+        name_line_suffix=name_line_suffix,
+        body_suffix=_b64_body(after.encode("utf-8")) + tail.lstrip("\n")
+    )
@@ -1,7 +1,13 @@
 """Excel文件处理工具"""
-from typing import List, Dict, Any
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Sequence
 from io import BytesIO
+import codecs
+import csv
+import io
+import tempfile
 from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.utils import get_column_letter
 from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
 
 from app.schemas.member import MemberImportItem
@@ -61,84 +67,152 @@ def create_member_template() -> BytesIO:
     return output
 
 
-def parse_member_excel(file_content: bytes) -> List[MemberImportItem]:
-    """解析成员Excel文件"""
-    wb = load_workbook(filename=BytesIO(file_content))
-    ws = wb.active
-    
-    members = []
-    
-    # 获取表头映射
+# CSV 文件编码探测：先按 UTF-8（含BOM）解码样本，失败则按 GBK（Excel 中文版默认）
+CSV_ENCODINGS = ("utf-8-sig", "gbk")
+CSV_SAMPLE_SIZE = 64 * 1024
+
+
+def _build_header_map(headers: Iterable[Any]) -> Dict[int, str]:
+    """表头映射：列序号（从0开始） -> 字段名"""
     header_map = {}
-    for col in range(1, ws.max_column + 1):
-        header = ws.cell(row=1, column=col).value
-        if header:
-            # 移除必填标记
-            header = header.replace("*", "").strip()
-            for cn_name, en_name, _ in MEMBER_TEMPLATE_COLUMNS:
-                if header == cn_name:
-                    header_map[col] = en_name
-                    break
-    
-    # 解析数据行
-    for row in range(2, ws.max_row + 1):
+    for index, header in enumerate(headers):
+        if header is None:
+            continue
+        # 移除必填标记
+        header = str(header).replace("*", "").strip()
+        for cn_name, en_name, _ in MEMBER_TEMPLATE_COLUMNS:
+            if header == cn_name:
+                header_map[index] = en_name
+                break
+    return header_map
+
+
+def _iter_items(rows: Iterator[Sequence[Any]]) -> Iterator[MemberImportItem]:
+    """将表头行之后的数据行逐行转换为导入项"""
+    header_map = _build_header_map(next(rows, ()))
+    for values in rows:
         row_data = {}
-        for col, field_name in header_map.items():
-            value = ws.cell(row=row, column=col).value
+        for index, field_name in header_map.items():
+            value = values[index] if index < len(values) else None
             if value is not None:
-                row_data[field_name] = str(value).strip()
+                value = str(value).strip()
+                if value:
+                    row_data[field_name] = value
         
         # 跳过空行
         if not row_data.get("student_id") or not row_data.get("name"):
             continue
         
-        members.append(MemberImportItem(
-            student_id=row_data.get("student_id", ""),
-            name=row_data.get("name", ""),
+        yield MemberImportItem(
+            student_id=row_data["student_id"],
+            name=row_data["name"],
             gender=row_data.get("gender"),
             dormitory=row_data.get("dormitory"),
             qq_email=row_data.get("qq_email"),
-        ))
-    
-    return members
+        )
 
 
-def export_members_to_excel(members: List[Dict[str, Any]]) -> BytesIO:
-    """导出成员列表到Excel"""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "成员列表"
+def iter_member_excel(file: BinaryIO) -> Iterator[MemberImportItem]:
+    """流式解析成员Excel文件（只读模式，逐行读取，不构建整个工作表）"""
+    wb = load_workbook(filename=file, read_only=True, data_only=True)
+    try:
+        yield from _iter_items(wb.active.iter_rows(values_only=True))
+    finally:
+        wb.close()
+
+
+def _detect_csv_encoding(file: BinaryIO) -> str:
+    """根据文件开头的样本判断CSV编码"""
+    sample = file.read(CSV_SAMPLE_SIZE)
+    file.seek(0)
+    for encoding in CSV_ENCODINGS:
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return CSV_ENCODINGS[0]
+
+
+def iter_member_csv(file: BinaryIO) -> Iterator[MemberImportItem]:
+    """流式解析成员CSV文件（表头与Excel模板相同）"""
+    text = io.TextIOWrapper(file, encoding=_detect_csv_encoding(file), newline="")
+    try:
+        yield from _iter_items(iter(csv.reader(text)))
+    finally:
+        # 不关闭底层文件，由调用方负责
+        text.detach()
+
+
+def iter_member_file(file: BinaryIO, filename: str) -> Iterator[MemberImportItem]:
+    """按扩展名选择解析器，逐行产出导入项"""
+    if filename.lower().endswith(".csv"):
+        return iter_member_csv(file)
+    return iter_member_excel(file)
+
+
+# 流式导出时读取/输出的块大小
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# CSV 每累积多少行输出一次
+CSV_FLUSH_ROWS = 500
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_MEDIA_TYPE = "text/csv; charset=utf-8"
+
+
+def stream_rows_xlsx(sheet_title: str, headers: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    """
+    以只写模式逐行生成Excel并按块输出
+
+    只写模式下行数据直接写入临时文件，内存占用与行数无关；
+    xlsx 是ZIP格式，需全部写完后才能输出。
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_title)
+    for index in range(len(headers)):
+        ws.column_dimensions[get_column_letter(index + 1)].width = 15
     
-    # 设置表头样式
     header_font = Font(bold=True, color="FFFFFF")
     header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_alignment = Alignment(horizontal="center", vertical="center")
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    # 写入表头
-    headers = ["学号", "姓名", "性别", "寝室号", "QQ邮箱"]
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
         cell.font = header_font
         cell.fill = header_fill
-        cell.alignment = header_alignment
-        cell.border = thin_border
-        ws.column_dimensions[cell.column_letter].width = 15
+        header_cells.append(cell)
+    ws.append(header_cells)
     
-    # 写入数据
-    for row, member in enumerate(members, 2):
-        ws.cell(row=row, column=1, value=member.get("student_id", "")).border = thin_border
-        ws.cell(row=row, column=2, value=member.get("name", "")).border = thin_border
-        ws.cell(row=row, column=3, value=member.get("gender", "")).border = thin_border
-        ws.cell(row=row, column=4, value=member.get("dormitory", "")).border = thin_border
-        ws.cell(row=row, column=5, value=member.get("qq_email", "")).border = thin_border
+    for row in rows:
+        ws.append(list(row))
     
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    return output
+    with tempfile.TemporaryFile() as output:
+        wb.save(output)
+        output.seek(0)
+        while True:
+            chunk = output.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def stream_rows_csv(headers: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    """逐行生成CSV（UTF-8 BOM，便于Excel直接打开中文）"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    yield codecs.BOM_UTF8 + buffer.getvalue().encode("utf-8")
+    
+    pending = 0
+    buffer.seek(0)
+    buffer.truncate()
+    for row in rows:
+        writer.writerow(["" if value is None else value for value in row])
+        pending += 1
+        if pending >= CSV_FLUSH_ROWS:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if pending:
+        yield buffer.getvalue().encode("utf-8")
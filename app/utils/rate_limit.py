@@ -0,0 +1,68 @@
+"""令牌桶限速工具"""
+import asyncio
+import threading
+import time
+from typing import Dict, Tuple
+
+
+class TokenBucket:
+    """
+    令牌桶
+
+    每秒补充 rate 个令牌，最多积累 burst 个。取令牌时预约下一个可用令牌的时间，
+    并发调用方按预约顺序依次放行；状态由线程锁保护，可在多个事件循环/线程间共享。
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate: 每秒令牌数，不大于 0 表示不限速
+            burst: 桶容量（允许的瞬时突发数）
+        """
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        预约一个令牌
+
+        Returns:
+            需要等待的秒数（0 表示可立即执行）
+        """
+        if self.rate <= 0:
+            return 0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0
+            return -self._tokens / self.rate
+
+    async def acquire(self) -> None:
+        """等待直到取得令牌"""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_buckets: Dict[str, Tuple[float, int, TokenBucket]] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(key: str, rate: float, burst: int) -> TokenBucket:
+    """
+    按键获取进程内共享的令牌桶（如每个SMTP服务商一个）
+
+    配置变化时重新创建。
+    """
+    with _buckets_lock:
+        entry = _buckets.get(key)
+        if entry is None or entry[0] != rate or entry[1] != burst:
+            entry = (rate, burst, TokenBucket(rate, burst))
+            _buckets[key] = entry
+        return entry[2]
@@ -0,0 +1,397 @@
+"""流式ZIP写入工具"""
+import os
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+
+# 压缩方式
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+
+# 超过以下限制需要使用 ZIP64 扩展
+ZIP64_LIMIT = (1 << 32) - 1
+ZIP_FILECOUNT_LIMIT = (1 << 16) - 1
+
+# 读取源文件的块大小
+READ_CHUNK_SIZE = 1024 * 1024
+
+# 向响应输出时合并小块的阈值
+OUTPUT_BUFFER_SIZE = 64 * 1024
+
+# 默认压缩级别
+DEFLATE_LEVEL = 6
+
+# 并行压缩时单个条目的最大大小（更大的条目在输出线程中流式压缩，避免整块驻留内存）
+PARALLEL_MAX_ENTRY_SIZE = 8 * 1024 * 1024
+
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+_VERSION_DEFAULT = 20
+_VERSION_ZIP64 = 45
+_CREATE_SYSTEM_UNIX = 3
+_EXTERNAL_ATTR_FILE = (0o100644 & 0xFFFF) << 16
+
+_STRUCT_LOCAL_HEADER = "<4s2B4HL2L2H"
+_STRUCT_CENTRAL_DIR = "<4s4B4HL2L5H2L"
+_STRUCT_END_ARCHIVE = "<4s4H2LH"
+_STRUCT_END_ARCHIVE64 = "<4sQ2H2L4Q"
+_STRUCT_END_ARCHIVE64_LOCATOR = "<4sLQL"
+
+
+@dataclass
+class ZipEntry:
+    """ZIP条目（file_path 和 data 二选一）"""
+    arcname: str
+    file_path: Optional[str] = None
+    data: Optional[bytes] = None
+    size: int = 0
+    compress_type: int = ZIP_DEFLATED
+    mtime: Optional[float] = None
+
+    def iter_chunks(self) -> Iterator[bytes]:
+        """按块读取条目内容"""
+        if self.data is not None:
+            yield self.data
+            return
+        with open(self.file_path, "rb") as f:
+            while True:
+                chunk = f.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+
+@dataclass
+class _CentralRecord:
+    """中央目录记录"""
+    name: bytes
+    compress_type: int
+    dostime: int
+    dosdate: int
+    crc: int
+    compress_size: int
+    file_size: int
+    offset: int
+    flags: int
+
+
+def _dos_datetime(mtime: Optional[float]) -> tuple:
+    """转换为DOS格式的时间和日期"""
+    t = time.localtime(mtime if mtime is not None else time.time())
+    year = max(t.tm_year, 1980)
+    dostime = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    dosdate = ((year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    return dostime, dosdate
+
+
+class ZipStreamWriter:
+    """
+    流式ZIP写入器
+
+    每个条目依次写出本地文件头、数据和数据描述符（大小和CRC在数据之后给出），
+    最后写出中央目录，全程不需要回写（seek），内存占用只与单个块大小有关。
+    条目或归档超过 4GB / 65535 个时自动使用 ZIP64 扩展。
+    所有写入方法均返回字节块迭代器，调用方按顺序输出即可。
+    """
+
+    def __init__(self):
+        self._offset = 0
+        self._records: List[_CentralRecord] = []
+
+    @property
+    def offset(self) -> int:
+        """已输出的字节数"""
+        return self._offset
+
+    def _emit(self, data: bytes) -> bytes:
+        self._offset += len(data)
+        return data
+
+    def write_entry(
+        self,
+        arcname: str,
+        chunks: Iterable[bytes],
+        compress_type: int = ZIP_DEFLATED,
+        size_hint: int = 0,
+        mtime: Optional[float] = None
+    ) -> Iterator[bytes]:
+        """
+        写入一个条目
+
+        Args:
+            arcname: 压缩包内路径
+            chunks: 条目内容的字节块
+            compress_type: ZIP_STORED 或 ZIP_DEFLATED
+            size_hint: 预估的原始大小，用于决定是否启用 ZIP64
+            mtime: 修改时间（时间戳）
+        """
+        name = arcname.encode("utf-8")
+        flags = _FLAG_DATA_DESCRIPTOR | _FLAG_UTF8
+        dostime, dosdate = _dos_datetime(mtime)
+        # 与 zipfile 一致：按 1.05 倍预估压缩后可能的膨胀
+        zip64 = size_hint * 1.05 > ZIP64_LIMIT
+        offset = self._offset
+
+        if zip64:
+            extra = struct.pack("<HHQQ", 0x0001, 16, 0, 0)
+            size_field = 0xFFFFFFFF
+            version = _VERSION_ZIP64
+        else:
+            extra = b""
+            size_field = 0
+            version = _VERSION_DEFAULT
+
+        yield self._emit(struct.pack(
+            _STRUCT_LOCAL_HEADER, b"PK\003\004", version, 0, flags, compress_type,
+            dostime, dosdate, 0, size_field, size_field, len(name), len(extra)
+        ) + name + extra)
+
+        crc = 0
+        file_size = 0
+        compress_size = 0
+        compressor = zlib.compressobj(DEFLATE_LEVEL, zlib.DEFLATED, -15) if compress_type == ZIP_DEFLATED else None
+
+        for chunk in chunks:
+            if not chunk:
+                continue
+            crc = zlib.crc32(chunk, crc)
+            file_size += len(chunk)
+            if compressor:
+                chunk = compressor.compress(chunk)
+                if not chunk:
+                    continue
+            compress_size += len(chunk)
+            yield self._emit(chunk)
+
+        if compressor:
+            tail = compressor.flush()
+            if tail:
+                compress_size += len(tail)
+                yield self._emit(tail)
+
+        if not zip64 and (file_size > ZIP64_LIMIT or compress_size > ZIP64_LIMIT):
+            raise RuntimeError(f"文件过大，需要ZIP64: {arcname}")
+
+        if zip64:
+            descriptor = struct.pack("<4sLQQ", b"PK\007\010", crc, compress_size, file_size)
+        else:
+            descriptor = struct.pack("<4sLLL", b"PK\007\010", crc, compress_size, file_size)
+        yield self._emit(descriptor)
+
+        self._records.append(_CentralRecord(
+            name=name, compress_type=compress_type, dostime=dostime, dosdate=dosdate,
+            crc=crc, compress_size=compress_size, file_size=file_size,
+            offset=offset, flags=flags
+        ))
+
+    def write_precompressed(
+        self,
+        arcname: str,
+        data: bytes,
+        crc: int,
+        file_size: int,
+        compress_type: int = ZIP_DEFLATED,
+        mtime: Optional[float] = None
+    ) -> Iterator[bytes]:
+        """
+        写入已压缩好的条目（大小和CRC已知，直接写在本地文件头中）
+
+        Args:
+            arcname: 压缩包内路径
+            data: 压缩后的数据（ZIP_DEFLATED 时为原始 deflate 流）
+            crc: 原始数据的CRC32
+            file_size: 原始数据大小
+            compress_type: ZIP_STORED 或 ZIP_DEFLATED
+            mtime: 修改时间（时间戳）
+        """
+        name = arcname.encode("utf-8")
+        flags = _FLAG_UTF8
+        dostime, dosdate = _dos_datetime(mtime)
+        compress_size = len(data)
+        offset = self._offset
+
+        if file_size > ZIP64_LIMIT or compress_size > ZIP64_LIMIT:
+            extra = struct.pack("<HHQQ", 0x0001, 16, file_size, compress_size)
+            header_sizes = (0xFFFFFFFF, 0xFFFFFFFF)
+            version = _VERSION_ZIP64
+        else:
+            extra = b""
+            header_sizes = (compress_size, file_size)
+            version = _VERSION_DEFAULT
+
+        yield self._emit(struct.pack(
+            _STRUCT_LOCAL_HEADER, b"PK\003\004", version, 0, flags, compress_type,
+            dostime, dosdate, crc, header_sizes[0], header_sizes[1], len(name), len(extra)
+        ) + name + extra)
+        if data:
+            yield self._emit(data)
+
+        self._records.append(_CentralRecord(
+            name=name, compress_type=compress_type, dostime=dostime, dosdate=dosdate,
+            crc=crc, compress_size=compress_size, file_size=file_size,
+            offset=offset, flags=flags
+        ))
+
+    def close(self) -> Iterator[bytes]:
+        """写出中央目录和结束记录"""
+        cd_offset = self._offset
+        for record in self._records:
+            extra_fields = []
+            file_size = record.file_size
+            compress_size = record.compress_size
+            offset = record.offset
+            if file_size > ZIP64_LIMIT:
+                extra_fields.append(file_size)
+                file_size = 0xFFFFFFFF
+            if compress_size > ZIP64_LIMIT:
+                extra_fields.append(compress_size)
+                compress_size = 0xFFFFFFFF
+            if offset > ZIP64_LIMIT:
+                extra_fields.append(offset)
+                offset = 0xFFFFFFFF
+
+            if extra_fields:
+                extra = struct.pack(f"<HH{len(extra_fields)}Q", 0x0001, 8 * len(extra_fields), *extra_fields)
+                version = _VERSION_ZIP64
+            else:
+                extra = b""
+                version = _VERSION_DEFAULT
+
+            yield self._emit(struct.pack(
+                _STRUCT_CENTRAL_DIR, b"PK\001\002", version, _CREATE_SYSTEM_UNIX, version, 0,
+                record.flags, record.compress_type, record.dostime, record.dosdate,
+                record.crc, compress_size, file_size, len(record.name), len(extra), 0,
+                0, 0, _EXTERNAL_ATTR_FILE, offset
+            ) + record.name + extra)
+
+        cd_size = self._offset - cd_offset
+        count = len(self._records)
+
+        if count > ZIP_FILECOUNT_LIMIT or cd_offset > ZIP64_LIMIT or cd_size > ZIP64_LIMIT:
+            end64_offset = self._offset
+            yield self._emit(struct.pack(
+                _STRUCT_END_ARCHIVE64, b"PK\006\006", 44, _VERSION_ZIP64, _VERSION_ZIP64,
+                0, 0, count, count, cd_size, cd_offset
+            ))
+            yield self._emit(struct.pack(
+                _STRUCT_END_ARCHIVE64_LOCATOR, b"PK\006\007", 0, end64_offset, 1
+            ))
+            count = min(count, 0xFFFF)
+            cd_size = min(cd_size, 0xFFFFFFFF)
+            cd_offset = min(cd_offset, 0xFFFFFFFF)
+
+        yield self._emit(struct.pack(
+            _STRUCT_END_ARCHIVE, b"PK\005\006", 0, 0, count, count, cd_size, cd_offset, 0
+        ))
+
+
+def _coalesce(chunks: Iterable[bytes], buffer_size: int = OUTPUT_BUFFER_SIZE) -> Iterator[bytes]:
+    """合并小块，减少输出次数"""
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        if len(buffer) >= buffer_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def compress_entry(entry: ZipEntry) -> Tuple[bytes, int, int]:
+    """
+    整块压缩一个条目（在线程池中执行，zlib 压缩期间会释放GIL）
+
+    Returns:
+        (原始 deflate 数据, CRC32, 原始大小)
+    """
+    compressor = zlib.compressobj(DEFLATE_LEVEL, zlib.DEFLATED, -15)
+    parts = []
+    crc = 0
+    file_size = 0
+    for chunk in entry.iter_chunks():
+        crc = zlib.crc32(chunk, crc)
+        file_size += len(chunk)
+        parts.append(compressor.compress(chunk))
+    parts.append(compressor.flush())
+    return b"".join(parts), crc, file_size
+
+
+def _prepare_parallel(
+    entries: Iterable[ZipEntry],
+    workers: int
+) -> Iterator[Tuple[ZipEntry, Optional[Future]]]:
+    """
+    在线程池中提前压缩后续条目，按原始顺序产出（条目, 压缩结果）
+
+    同时在途的条目数限制为 workers * 2，内存占用有上限；
+    仅存储或超过 PARALLEL_MAX_ENTRY_SIZE 的条目不进入线程池。
+    """
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="zip-compress") as pool:
+        pending = deque()
+        iterator = iter(entries)
+
+        def submit_next() -> bool:
+            entry = next(iterator, None)
+            if entry is None:
+                return False
+            future = None
+            if entry.compress_type == ZIP_DEFLATED and entry.size <= PARALLEL_MAX_ENTRY_SIZE:
+                future = pool.submit(compress_entry, entry)
+            pending.append((entry, future))
+            return True
+
+        while len(pending) < workers * 2 and submit_next():
+            pass
+
+        while pending:
+            entry, future = pending.popleft()
+            submit_next()
+            yield entry, future
+
+
+def stream_zip(
+    entries: Iterable[ZipEntry],
+    progress: Optional[Callable[[ZipEntry], None]] = None,
+    workers: int = 1
+) -> Iterator[bytes]:
+    """
+    将条目流式打包为ZIP
+
+    Args:
+        entries: ZIP条目
+        progress: 每写完一个条目后的回调
+        workers: 压缩线程数，大于1时在线程池中并行压缩条目，输出顺序不变
+
+    Returns:
+        ZIP字节块迭代器
+    """
+    def generate() -> Iterator[bytes]:
+        writer = ZipStreamWriter()
+        if workers > 1:
+            prepared = _prepare_parallel(entries, workers)
+        else:
+            prepared = ((entry, None) for entry in entries)
+
+        for entry, future in prepared:
+            mtime = entry.mtime
+            if mtime is None and entry.file_path:
+                mtime = os.path.getmtime(entry.file_path)
+            if future is not None:
+                data, crc, file_size = future.result()
+                yield from writer.write_precompressed(
+                    entry.arcname, data, crc, file_size, entry.compress_type, mtime
+                )
+            else:
+                yield from writer.write_entry(
+                    entry.arcname, entry.iter_chunks(), entry.compress_type, entry.size, mtime
+                )
+            if progress:
+                progress(entry)
+        yield from writer.close()
+
+    return _coalesce(generate())
@@ -42,5 +42,22 @@ ALTER TABLE submissions ADD COLUMN item_index INT DEFAULT 1 COMMENT '第几项
 -- 确保 updated_at 列存在
 ALTER TABLE submissions ADD COLUMN updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '最后更新时间';
 
+-- 4. 内容寻址存储：记录文件内容哈希（file_blobs 表由应用启动时自动创建）
+ALTER TABLE submissions ADD COLUMN content_hash VARCHAR(64) COMMENT '文件内容SHA-256';
+CREATE INDEX ix_submissions_content_hash ON submissions (content_hash);
+-- 断点续传：记录生成提交的上传会话，重复完成同一会话时返回已生成的提交
+ALTER TABLE submissions ADD COLUMN upload_id VARCHAR(32) COMMENT '生成该提交的断点续传会话ID';
+CREATE INDEX ix_submissions_upload_id ON submissions (upload_id);
+-- 已创建 file_blobs 表的部署：记录引用计数最后变化时间（无引用的内容超过宽限期后才回收）
+ALTER TABLE file_blobs ADD COLUMN updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '引用计数最后变化时间';
+
+-- 5. 提醒邮件发送队列：reminder_logs 作为持久化队列，支持失败重试
+ALTER TABLE reminder_logs ADD COLUMN batch_id VARCHAR(32) COMMENT '入队批次ID';
+ALTER TABLE reminder_logs ADD COLUMN attempts INT NOT NULL DEFAULT 0 COMMENT '已尝试发送次数';
+ALTER TABLE reminder_logs ADD COLUMN next_attempt_at DATETIME COMMENT '下次重试时间';
+CREATE INDEX ix_reminder_logs_status ON reminder_logs (status);
+CREATE INDEX ix_reminder_logs_batch_id ON reminder_logs (batch_id);
+ALTER TABLE reminder_logs ADD COLUMN claimed_at DATETIME COMMENT '取出发送的时间（数据库时钟）';
+
 -- 完成提示
 SELECT '数据库更新完成！如果某些 ALTER 语句报错说列已存在，可以忽略。' AS message;
@@ -170,25 +170,18 @@ async function api(url, options = {}) {
 // 加载仪表板
 async function loadDashboard() {
     try {
-        const colleges = await api('/colleges/');
-        const tasks = await api('/tasks/?limit=5');
-        
-        let totalMembers = 0;
-        for (const college of colleges) {
-            const grades = await api(`/grades/?college_id=${college.id}`);
-            for (const grade of grades) {
-                const classes = await api(`/classes/?grade_id=${grade.id}`);
-                for (const cls of classes) {
-                    const members = await api(`/members/?class_id=${cls.id}`);
-                    totalMembers += members.length;
-                }
-            }
-        }
+        const [summary, tasks] = await Promise.all([
+            api('/dashboard/summary'),
+            api('/tasks/?limit=5')
+        ]);
+        const totals = summary.totals;
         
         document.getElementById('dashboard-stats').innerHTML = `
-            <div class="stat-card"><div class="stat-value">${colleges.length}</div><div class="stat-label">学院数</div></div>
-            <div class="stat-card"><div class="stat-value">${totalMembers}</div><div class="stat-label">成员数</div></div>
-            <div class="stat-card"><div class="stat-value">${tasks.length}</div><div class="stat-label">任务数</div></div>
+            <div class="stat-card"><div class="stat-value">${totals.colleges}</div><div class="stat-label">学院数</div></div>
+            <div class="stat-card"><div class="stat-value">${totals.members}</div><div class="stat-label">成员数</div></div>
+            <div class="stat-card"><div class="stat-value">${totals.tasks}</div><div class="stat-label">任务数</div></div>
+            <div class="stat-card"><div class="stat-value">${totals.active_tasks}</div><div class="stat-label">进行中任务</div></div>
+            <div class="stat-card"><div class="stat-value">${summary.submissions.active_submission_rate}%</div><div class="stat-label">进行中提交率</div></div>
         `;
         
         document.getElementById('recent-tasks').innerHTML = tasks.length ? 
@@ -199,17 +192,21 @@ async function loadDashboard() {
     }
 }
 
+// 获取完整组织树（学院-年级-班级）
+async function loadOrgTree() {
+    const tree = await api('/organization/tree');
+    return tree.colleges;
+}
+
 // 加载班级选项
 async function loadClassOptions() {
     try {
-        const colleges = await api('/colleges/');
+        const colleges = await loadOrgTree();
         let classOptions = '';
         
         for (const college of colleges) {
-            const grades = await api(`/grades/?college_id=${college.id}`);
-            for (const grade of grades) {
-                const classes = await api(`/classes/?grade_id=${grade.id}`);
-                for (const cls of classes) {
+            for (const grade of college.grades) {
+                for (const cls of grade.classes) {
                     classOptions += `<option value="${cls.id}">${college.name} - ${grade.name} - ${cls.name}</option>`;
                 }
             }
@@ -225,14 +222,13 @@ async function loadClassOptions() {
 // 加载组织结构
 async function loadOrganization() {
     try {
-        const colleges = await api('/colleges/');
+        const colleges = await loadOrgTree();
         let html = '<table class="table"><thead><tr><th>学院名称</th><th>年级数</th><th>操作</th></tr></thead><tbody>';
         
         for (const college of colleges) {
-            const grades = await api(`/grades/?college_id=${college.id}`);
             html += `<tr>
                 <td>${college.name}</td>
-                <td>${grades.length}</td>
+                <td>${college.grades.length}</td>
                 <td>
                     <button class="btn btn-sm btn-secondary" onclick="showGrades(${college.id}, '${college.name}')">查看年级</button>
                     <button class="btn btn-sm btn-danger" onclick="deleteCollege(${college.id})">删除</button>
@@ -289,17 +285,17 @@ async function deleteCollege(id) {
 
 // 显示年级
 async function showGrades(collegeId, collegeName) {
-    const grades = await api(`/grades/?college_id=${collegeId}`);
+    const college = (await loadOrgTree()).find(c => c.id === collegeId);
+    const grades = college ? college.grades : [];
     document.getElementById('modal-title').textContent = `${collegeName} - 年级管理`;
     
     let html = `<button class="btn btn-primary btn-sm" onclick="showAddGradeModal(${collegeId})" style="margin-bottom:15px;">+ 添加年级</button>`;
     html += '<table class="table"><thead><tr><th>年级名称</th><th>班级数</th><th>操作</th></tr></thead><tbody>';
     
     for (const grade of grades) {
-        const classes = await api(`/classes/?grade_id=${grade.id}`);
         html += `<tr>
             <td>${grade.name}</td>
-            <td>${classes.length}</td>
+            <td>${grade.classes.length}</td>
             <td>
                 <button class="btn btn-sm btn-secondary" onclick="showClasses(${grade.id}, '${grade.name}')">查看班级</button>
                 <button class="btn btn-sm btn-danger" onclick="deleteGrade(${grade.id})">删除</button>
@@ -446,7 +442,7 @@ function showImportModal() {
             <div class="upload-icon">📁</div>
             <p>点击选择Excel文件</p>
         </div>
-        <input type="file" id="import-file" accept=".xlsx,.xls" style="display:none;" onchange="importMembers(${classId})">
+        <input type="file" id="import-file" accept=".xlsx,.xls,.csv" style="display:none;" onchange="importMembers(${classId})">
     `;
     openModal();
 }
@@ -528,9 +524,16 @@ async function loadTasks() {
         const url = classId ? `/tasks/?class_id=${classId}` : '/tasks/';
         const tasks = await api(url);
         
+        // 一次请求加载所有任务的统计
+        const statsMap = {};
+        if (tasks.length > 0) {
+            const statsList = await api(`/tasks/stats?ids=${tasks.map(t => t.id).join(',')}`);
+            statsList.forEach(s => { statsMap[s.task_id] = s; });
+        }
+        
         let html = '';
         for (const t of tasks) {
-            const stats = await api(`/tasks/${t.id}/stats`);
+            const stats = statsMap[t.id] || { total_members: 0, submitted_count: 0 };
             const progress = stats.total_members > 0 ? (stats.submitted_count / stats.total_members * 100).toFixed(1) : 0;
             
             // 收集类型标签
@@ -564,6 +567,7 @@ async function loadTasks() {
                     <button class="btn btn-primary btn-sm" onclick="showTaskDetail(${t.id})">📋 查看详情</button>
                     <button class="btn btn-secondary btn-sm" onclick="copySubmitLink(${t.id})">🔗 复制链接</button>
                     <button class="btn btn-secondary btn-sm" onclick="exportTask(${t.id})">📥 导出文件</button>
+                    <button class="btn btn-secondary btn-sm" onclick="exportStatusSheet(${t.id})">📊 提交情况表</button>
                     <button class="btn btn-success btn-sm" onclick="sendReminder(${t.id})">📧 发送提醒</button>
                     <button class="btn btn-warning btn-sm" onclick="copyUnsubmittedList(${t.id})">📋 复制未交名单</button>
                     <button class="btn btn-danger btn-sm" onclick="deleteTask(${t.id})">🗑️ 删除</button>
@@ -1195,17 +1199,45 @@ async function exportTask(taskId) {
     }
 }
 
+// 导出提交情况表（服务端流式生成，直接下载）
+function exportStatusSheet(taskId) {
+    window.location.href = `${API_BASE}/tasks/${taskId}/status-sheet`;
+}
+
 // 发送提醒
 async function sendReminder(taskId) {
     if (!confirm('确定向所有未提交成员发送提醒邮件？')) return;
     try {
         const data = await api(`/tasks/${taskId}/remind`, { method: 'POST', body: {} });
-        showToast(`发送完成：成功${data.success}人，失败${data.failed}人`, data.success > 0 ? 'success' : 'error');
+        if (!data.queued) {
+            showToast(`没有可发送的成员：${data.failed}人未设置邮箱`, 'error');
+            return;
+        }
+        showToast(`已加入发送队列：${data.queued}人${data.failed ? `，${data.failed}人未设置邮箱` : ''}`, 'success');
+        pollReminderProgress(taskId, data.batch_id);
     } catch (e) {
         showToast(e.message, 'error');
     }
 }
 
+// 轮询提醒发送进度，发送结束后提示结果
+async function pollReminderProgress(taskId, batchId) {
+    try {
+        const progress = await api(`/tasks/${taskId}/reminder-progress?batch_id=${batchId}`);
+        // 只剩等待重试的邮件时不再轮询，由后台继续重试
+        if (progress.sending || progress.pending > progress.retrying) {
+            setTimeout(() => pollReminderProgress(taskId, batchId), 2000);
+            return;
+        }
+        const failed = progress.failed + progress.dead;
+        const waiting = progress.retrying + progress.deferred;
+        const retrying = waiting ? `，${waiting}人稍后重试` : '';
+        showToast(`提醒发送完成：成功${progress.sent}人，失败${failed}人${retrying}`, progress.sent > 0 ? 'success' : 'error');
+    } catch (e) {
+        console.error(e);
+    }
+}
+
 // 格式化文件大小
 function formatFileSize(bytes) {
     if (bytes < 1024) return bytes + ' B';
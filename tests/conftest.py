@@ -1,5 +1,9 @@
+import asyncio
+from contextlib import contextmanager
+
+import aiosmtplib
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
@@ -56,3 +60,111 @@ def client(db_session):
         yield test_client
     
     app.dependency_overrides.clear()
+
+
+@pytest.fixture(scope="function")
+def task_and_member(db_session):
+    """创建一个班级及其中的一个任务和一名成员，返回 (task, member)"""
+    from app.models import College, Grade, Class, Member, Task
+
+    college = College(name="测试学院")
+    db_session.add(college)
+    db_session.commit()
+    grade = Grade(name="测试年级", college_id=college.id)
+    db_session.add(grade)
+    db_session.commit()
+    class_ = Class(name="测试班级", grade_id=grade.id)
+    db_session.add(class_)
+    db_session.commit()
+    member = Member(student_id="2024001", name="张三", class_id=class_.id)
+    task = Task(title="测试任务", class_id=class_.id)
+    db_session.add_all([member, task])
+    db_session.commit()
+    return task, member
+
+
+@pytest.fixture(scope="function")
+def count_queries(db_session):
+    """统计代码块内执行的SQL语句数：with count_queries() as statements"""
+    @contextmanager
+    def counter():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        bind = db_session.get_bind()
+        event.listen(bind, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(bind, "before_cursor_execute", before_cursor_execute)
+
+    return counter
+
+
+# ============ SMTP ============
+
+SMTP_CONFIG = {"host": "smtp.test", "port": 465, "user": "admin@test", "password": "secret", "use_ssl": True}
+
+
+class FakeAsyncSMTP:
+    """记录登录、并发数和发送结果的假异步SMTP客户端"""
+    logins = 0
+    in_flight = 0
+    max_in_flight = 0
+    sent = []
+    drop_once = set()
+
+    def __init__(self, **kwargs):
+        pass
+
+    async def connect(self):
+        pass
+
+    async def login(self, user, password):
+        FakeAsyncSMTP.logins += 1
+
+    async def sendmail(self, sender, recipients, message):
+        FakeAsyncSMTP.in_flight += 1
+        FakeAsyncSMTP.max_in_flight = max(FakeAsyncSMTP.max_in_flight, FakeAsyncSMTP.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if recipients[0] in FakeAsyncSMTP.drop_once:
+                FakeAsyncSMTP.drop_once.discard(recipients[0])
+                raise aiosmtplib.SMTPServerDisconnected("Connection lost")
+            FakeAsyncSMTP.sent.append(recipients[0])
+        finally:
+            FakeAsyncSMTP.in_flight -= 1
+
+    async def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(scope="function")
+def smtp_config(monkeypatch):
+    """测试用SMTP配置，同时作为 EmailService.get_smtp_config 的返回值"""
+    from app.services.email import EmailService
+
+    monkeypatch.setattr(EmailService, "get_smtp_config", staticmethod(lambda db: SMTP_CONFIG))
+    return SMTP_CONFIG
+
+
+@pytest.fixture(scope="function")
+def fake_async_smtp(monkeypatch):
+    """用 FakeAsyncSMTP 替换 aiosmtplib.SMTP，并重置计数和熔断器"""
+    from app.utils import async_smtp
+    from app.utils.circuit_breaker import all_breakers
+
+    FakeAsyncSMTP.logins = 0
+    FakeAsyncSMTP.in_flight = 0
+    FakeAsyncSMTP.max_in_flight = 0
+    FakeAsyncSMTP.sent = []
+    FakeAsyncSMTP.drop_once = set()
+    for breaker in all_breakers().values():
+        breaker.reset()
+    monkeypatch.setattr(async_smtp.aiosmtplib, "SMTP", FakeAsyncSMTP)
+    return FakeAsyncSMTP
@@ -0,0 +1,33 @@
+"""
+异步批量发信测试 - 并发上限、限速令牌桶
+"""
+import asyncio
+
+import pytest
+
+from app.utils.async_smtp import AsyncMailer
+from app.utils.rate_limit import TokenBucket
+
+
+def test_mailer_bounded_concurrency(fake_async_smtp, smtp_config):
+    """并发数不超过上限，每个工作协程只登录一次，断线后重连重发"""
+    fake_async_smtp.drop_once = {"user5@test"}
+    mailer = AsyncMailer(smtp_config, concurrency=3)
+    messages = [(f"user{i}@test", "message") for i in range(12)]
+
+    results = asyncio.run(mailer.send_all(messages))
+
+    assert results == [(True, "")] * 12
+    assert sorted(fake_async_smtp.sent) == sorted(to for to, _ in messages)
+    assert fake_async_smtp.max_in_flight == 3
+    assert fake_async_smtp.logins == 4
+
+
+def test_token_bucket_spaces_out_requests():
+    """突发额度用完后按速率排队"""
+    bucket = TokenBucket(rate=10, burst=2)
+    delays = [bucket.reserve() for _ in range(4)]
+    assert delays[:2] == [0, 0]
+    assert delays[2] == pytest.approx(0.1, abs=0.01)
+    assert delays[3] == pytest.approx(0.2, abs=0.01)
+    assert TokenBucket(rate=0).reserve() == 0
@@ -0,0 +1,83 @@
+"""
+SMTP熔断测试 - 状态切换、队列发送快速失败、延后记录重发
+"""
+import aiosmtplib
+
+from app.config import settings
+from app.models import ReminderLog
+from app.services.email import EmailService
+from app.services.mail_queue import MailQueueService
+from app.utils import async_smtp
+from app.utils.circuit_breaker import CircuitBreaker, STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN
+from tests.conftest import FakeAsyncSMTP
+
+
+class RejectingAsyncSMTP(FakeAsyncSMTP):
+    """登录总是失败（如授权码错误）"""
+
+    async def login(self, user, password):
+        FakeAsyncSMTP.logins += 1
+        raise aiosmtplib.SMTPAuthenticationError(535, "Login fail")
+
+
+def test_breaker_opens_and_probes_in_half_open():
+    """连续失败后熔断，恢复时间到后只放行一个探测请求"""
+    breaker = CircuitBreaker(failure_threshold=2, recovery_seconds=60)
+    breaker.record_failure("timeout")
+    assert breaker.allow()
+    breaker.record_failure("timeout")
+    assert breaker.snapshot()["state"] == STATE_OPEN
+    assert not breaker.allow()
+
+    breaker._opened_at -= 61
+    assert breaker.snapshot()["state"] == STATE_HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure("timeout")
+    assert not breaker.allow()
+
+    breaker._opened_at -= 61
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.snapshot()["state"] == STATE_CLOSED
+    assert breaker.allow()
+
+    breaker.record_failure("auth", trip=True)
+    assert breaker.snapshot()["state"] == STATE_OPEN
+
+
+def test_auth_failure_defers_rest_of_queue(db_session, task_and_member, fake_async_smtp, smtp_config, monkeypatch):
+    """认证失败后熔断，队列中其余邮件记为延后；熔断恢复后重发"""
+    monkeypatch.setattr(async_smtp.aiosmtplib, "SMTP", RejectingAsyncSMTP)
+    monkeypatch.setattr(MailQueueService, "wake", classmethod(lambda cls: None))
+    monkeypatch.setattr(settings, "smtp_concurrency", 1)
+    monkeypatch.setattr(settings, "smtp_rate_per_second", 0)
+    task, member = task_and_member
+    task_id = task.id
+    members = []
+    for i in range(5):
+        other = type(member)(student_id=f"20249{i}", name=f"成员{i}", class_id=member.class_id, qq_email=f"{i}@qq.com")
+        db_session.add(other)
+        members.append(other)
+    db_session.commit()
+    MailQueueService.enqueue(db_session, task, members)
+
+    assert MailQueueService.drain(lambda: db_session) == 5
+
+    assert fake_async_smtp.logins == 1
+    assert EmailService.get_breaker(smtp_config).snapshot()["state"] == STATE_OPEN
+    progress = MailQueueService.get_progress(db_session, task_id)
+    assert (progress.retrying, progress.deferred) == (1, 4)
+    deferred = db_session.query(ReminderLog).filter(ReminderLog.status == "deferred").all()
+    assert all(log.attempts == 0 and log.next_attempt_at is not None for log in deferred)
+
+    # 熔断期间队列不会取出延后的记录
+    assert MailQueueService.drain(lambda: db_session) == 0
+
+    # 修复配置后手动恢复，延后的记录立即重发
+    monkeypatch.setattr(async_smtp.aiosmtplib, "SMTP", FakeAsyncSMTP)
+    EmailService.get_breaker(smtp_config).reset()
+    assert MailQueueService.release_deferred(db_session) == 4
+    assert MailQueueService.drain(lambda: db_session) == 4
+    progress = MailQueueService.get_progress(db_session, task_id)
+    assert (progress.sent, progress.deferred, progress.retrying) == (4, 0, 1)
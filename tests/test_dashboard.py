@@ -0,0 +1,51 @@
+"""
+仪表板汇总测试 - 分组计数与短时缓存
+"""
+from datetime import datetime, timedelta
+
+from app.config import settings
+from app.schemas.member import MemberCreate
+from app.schemas.task import TaskCreate
+from app.services.dashboard import DashboardService
+from app.services.member import MemberService
+from app.services.submission import SubmissionService
+from app.services.task import TaskService
+
+
+def test_dashboard_summary_counts(db_session, task_and_member, count_queries, monkeypatch):
+    """按班级汇总人数、区分进行中任务并计算提交率，查询数量固定"""
+    monkeypatch.setattr(settings, "dashboard_cache_ttl_seconds", 0)
+    task, member = task_and_member
+    MemberService.create_member(db_session, MemberCreate(student_id="2024002", name="李四", class_id=member.class_id))
+    expired = TaskService.create_task(db_session, TaskCreate(title="已截止任务", class_id=member.class_id))
+    SubmissionService.create_text_submission(db_session, task.id, member.id, "张三")
+    SubmissionService.create_text_submission(db_session, expired.id, member.id, "张三")
+    expired.deadline = datetime.now() - timedelta(days=1)
+    db_session.commit()
+    DashboardService.get_summary(db_session)  # 补齐历史任务的计数行
+
+    with count_queries() as statements:
+        summary = DashboardService.get_summary(db_session)
+    assert len(statements) == 6
+
+    assert summary.totals.colleges == 1
+    assert summary.totals.members == 2
+    assert summary.totals.tasks == 2
+    assert summary.totals.active_tasks == 1
+    assert summary.colleges[0].member_count == 2
+    assert summary.colleges[0].grades[0].classes[0].member_count == 2
+    assert (summary.submissions.expected, summary.submissions.submitted) == (4, 2)
+    assert summary.submissions.submission_rate == 50
+    assert summary.submissions.active_submission_rate == 50
+
+
+def test_dashboard_summary_cached(db_session, task_and_member, count_queries, monkeypatch):
+    """缓存有效期内不再查询"""
+    monkeypatch.setattr(settings, "dashboard_cache_ttl_seconds", 60)
+    DashboardService.invalidate()
+    first = DashboardService.get_summary(db_session)
+
+    with count_queries() as statements:
+        assert DashboardService.get_summary(db_session) is first
+    assert statements == []
+    DashboardService.invalidate()
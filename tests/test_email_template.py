@@ -0,0 +1,31 @@
+"""
+提醒邮件模板测试 - 编译缓存与逐人拼接结果
+"""
+import email
+from datetime import datetime
+
+from app.utils.email_template import compile_reminder_email, generate_reminder_email
+
+
+def _decode(message: str):
+    msg = email.message_from_string(message)
+    html = msg.get_payload()[0].get_payload(decode=True).decode("utf-8")
+    subject = str(email.header.make_header(email.header.decode_header(msg["Subject"])))
+    return msg, subject, html
+
+
+def test_compiled_template_matches_direct_rendering():
+    """拼接出的邮件解码后与直接渲染的内容一致，且模板只编译一次"""
+    deadline = datetime(2026, 1, 1, 12, 0)
+    template = compile_reminder_email("admin@qq.com", "测试任务", deadline, "http://localhost/task/1")
+    assert compile_reminder_email("admin@qq.com", "测试任务", deadline, "http://localhost/task/1") is template
+
+    for name in ("张三", "欧阳娜娜", "A"):
+        msg, subject, html = _decode(template.render("student@qq.com", name))
+        expected_subject, expected_html = generate_reminder_email("测试任务", deadline, "http://localhost/task/1", name)
+        assert msg["To"] == "student@qq.com"
+        assert msg["From"] == "admin@qq.com"
+        assert subject == expected_subject
+        # 分段编码时补齐的空格不影响HTML内容
+        assert html.split() == expected_html.split()
+        assert f"<strong>{name}</strong>" in html
@@ -0,0 +1,249 @@
+"""
+批量导出测试 - 流式ZIP
+"""
+import io
+import os
+import zipfile
+
+from app.utils import zip_stream
+from app.utils.zip_stream import ZipEntry, ZIP_STORED, ZIP_DEFLATED, stream_zip
+
+
+def _read_zip(chunks) -> zipfile.ZipFile:
+    return zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+
+
+def test_stream_zip_roundtrip(tmp_path):
+    """流式写出的ZIP可被标准库完整读取，中文文件名与CRC正确"""
+    file_data = os.urandom(300_000)
+    file_path = tmp_path / "video.mp4"
+    file_path.write_bytes(file_data)
+    text_data = "你好，世界\n".encode("utf-8") * 1000
+
+    entries = [
+        ZipEntry("2024001_张三/video.mp4", file_path=str(file_path), size=len(file_data), compress_type=ZIP_STORED),
+        ZipEntry("2024001_张三/文本.txt", data=text_data, size=len(text_data), compress_type=ZIP_DEFLATED),
+        ZipEntry("2024002_李四/空文件.txt", data=b"", size=0),
+    ]
+
+    zf = _read_zip(stream_zip(entries))
+
+    assert zf.testzip() is None
+    assert zf.namelist() == [e.arcname for e in entries]
+    assert zf.read("2024001_张三/video.mp4") == file_data
+    assert zf.read("2024001_张三/文本.txt") == text_data
+    assert zf.read("2024002_李四/空文件.txt") == b""
+    assert zf.getinfo("2024001_张三/video.mp4").compress_type == zipfile.ZIP_STORED
+    assert zf.getinfo("2024001_张三/文本.txt").compress_type == zipfile.ZIP_DEFLATED
+
+
+def test_stream_zip_zip64_records(monkeypatch):
+    """超过限制时写出 ZIP64 扩展字段和结束记录"""
+    monkeypatch.setattr(zip_stream, "ZIP64_LIMIT", 100)
+    monkeypatch.setattr(zip_stream, "ZIP_FILECOUNT_LIMIT", 2)
+    payload = os.urandom(500)
+
+    entries = [ZipEntry(f"dir/file_{i}.bin", data=payload, size=len(payload), compress_type=ZIP_STORED) for i in range(4)]
+    data = b"".join(stream_zip(entries))
+
+    assert b"PK\x06\x06" in data
+    assert b"PK\x06\x07" in data
+    zf = zipfile.ZipFile(io.BytesIO(data))
+    assert zf.testzip() is None
+    assert [zf.read(e.arcname) for e in entries] == [payload] * 4
+
+
+def test_choose_compress_type_by_extension_and_probe(tmp_path):
+    """已压缩格式仅存储，文本类压缩，未知类型按采样压缩率判断"""
+    from app.services.export import ExportService
+
+    assert ExportService.choose_compress_type("photo.JPG") == ZIP_STORED
+    assert ExportService.choose_compress_type("lecture.mp4") == ZIP_STORED
+    assert ExportService.choose_compress_type("report.docx") == ZIP_STORED
+    assert ExportService.choose_compress_type("notes.txt") == ZIP_DEFLATED
+    assert ExportService.choose_compress_type("data.csv") == ZIP_DEFLATED
+    assert ExportService.choose_compress_type("song.bin", "audio/mpeg") == ZIP_STORED
+
+    random_file = tmp_path / "random.dat"
+    random_file.write_bytes(os.urandom(100_000))
+    plain_file = tmp_path / "plain.dat"
+    plain_file.write_bytes(b"abc" * 30_000)
+    assert ExportService.choose_compress_type("random.dat", None, str(random_file)) == ZIP_STORED
+    assert ExportService.choose_compress_type("plain.dat", None, str(plain_file)) == ZIP_DEFLATED
+
+    assert ExportService.choose_compress_type("photo.jpg", mode="deflated") == ZIP_DEFLATED
+    assert ExportService.choose_compress_type("notes.txt", mode="stored") == ZIP_STORED
+
+
+def test_stream_zip_parallel_matches_sequential(tmp_path, monkeypatch):
+    """多线程压缩的输出与单线程一致，条目顺序不变，大文件仍走流式压缩"""
+    monkeypatch.setattr(zip_stream, "PARALLEL_MAX_ENTRY_SIZE", 50_000)
+    big_data = b"large file line\n" * 10_000
+    big_path = tmp_path / "big.txt"
+    big_path.write_bytes(big_data)
+
+    entries = [
+        ZipEntry(f"member_{i}/notes.txt", data=(f"第{i}份作业\n" * (i * 500)).encode("utf-8"), mtime=0)
+        for i in range(12)
+    ]
+    entries.append(ZipEntry("member_x/big.txt", file_path=str(big_path), size=len(big_data), mtime=0))
+    entries.append(ZipEntry("member_x/photo.jpg", data=os.urandom(2000), size=2000, compress_type=ZIP_STORED, mtime=0))
+    for entry in entries:
+        if entry.data is not None:
+            entry.size = len(entry.data)
+
+    sequential = b"".join(stream_zip(entries))
+    parallel = b"".join(stream_zip(entries, workers=4))
+
+    zf = zipfile.ZipFile(io.BytesIO(parallel))
+    assert zf.testzip() is None
+    assert zf.namelist() == [e.arcname for e in entries]
+    assert [zf.read(e.arcname) for e in entries] == [_read_zip([sequential]).read(e.arcname) for e in entries]
+    assert zf.read("member_x/big.txt") == big_data
+
+
+# ============ 后台导出任务 ============
+
+def test_export_job_builds_archive_and_expires(db_session, task_and_member, tmp_path, monkeypatch):
+    """后台任务写出压缩包并记录进度，过期后清理文件"""
+    from datetime import datetime, timedelta
+    from app.config import settings
+    from app.models import Submission
+    from app.services.export_job import ExportJobService
+
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+    task, member = task_and_member
+    file_data = os.urandom(5000)
+    file_path = tmp_path / "stored.bin"
+    file_path.write_bytes(file_data)
+    db_session.add_all([
+        Submission(task_id=task.id, member_id=member.id, submission_type="file",
+                   original_filename="作业.pdf", file_path=str(file_path), file_size=len(file_data)),
+        Submission(task_id=task.id, member_id=member.id, submission_type="text",
+                   text_content="心得体会", item_index=2),
+    ])
+    db_session.commit()
+
+    job = ExportJobService.create_job(db_session, task.id)
+    job_id = job.id
+    assert job.status == "pending"
+    ExportJobService.run_job(job_id, lambda: db_session)
+
+    job = ExportJobService.get_job(db_session, job_id)
+    assert job.status == "done"
+    assert job.processed_files == job.total_files == 2
+    assert job.processed_bytes == job.total_bytes
+    download_path = ExportJobService.get_download_path(db_session, job_id)
+    zf = zipfile.ZipFile(download_path)
+    assert zf.read("2024001_张三/作业.pdf") == file_data
+
+    job.expires_at = datetime.now() - timedelta(seconds=1)
+    db_session.commit()
+    assert ExportJobService.get_download_path(db_session, job_id) is None
+    assert ExportJobService.cleanup_expired_jobs(db_session) == 1
+    assert not os.path.exists(download_path)
+
+
+def test_export_job_records_failure(db_session, task_and_member, tmp_path, monkeypatch):
+    """没有可导出内容时任务标记为失败并记录原因"""
+    from app.config import settings
+    from app.services.export_job import ExportJobService
+
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+    task, _ = task_and_member
+
+    job_id = ExportJobService.create_job(db_session, task.id).id
+    ExportJobService.run_job(job_id, lambda: db_session)
+
+    job = ExportJobService.get_job(db_session, job_id)
+    assert job.status == "failed"
+    assert job.error == "没有可导出的内容"
+
+
+# ============ 导出缓存 ============
+
+def test_export_cache_hit_invalidate_and_evict(db_session, task_and_member, tmp_path, monkeypatch):
+    """相同请求命中缓存，提交变化后失效，超过容量时淘汰最久未用的缓存"""
+    from app.config import settings
+    from app.services.export import ExportService
+    from app.services.export_cache import ExportCacheService
+    from app.services.submission import SubmissionService
+
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+    task, member = task_and_member
+    SubmissionService.create_text_submission(db_session, task.id, member.id, "第一版")
+
+    key = ExportCacheService.get_cache_key(db_session, task.id)
+    assert ExportCacheService.get(key) is None
+    stream, filename, file_count, total_size = ExportService.export_task_submissions(db_session, task.id)
+    archive = b"".join(ExportCacheService.store_stream(key, stream, filename, file_count, total_size))
+
+    assert ExportCacheService.get_cache_key(db_session, task.id) == key
+    cached = ExportCacheService.get(key)
+    assert cached["file_count"] == 1 and cached["filename"] == filename
+    with open(cached["path"], "rb") as f:
+        assert f.read() == archive
+    assert ExportCacheService.get_cache_key(db_session, task.id, naming_format="{name}") != key
+
+    SubmissionService.create_text_submission(db_session, task.id, member.id, "第二版")
+    assert ExportCacheService.get(key) is None
+    assert ExportCacheService.get_cache_key(db_session, task.id) != key
+
+    for name, mtime in (("1_old", 100), ("1_new", 200)):
+        list(ExportCacheService.store_stream(name, iter([b"x" * 1000]), "a.zip", 1, 1000))
+        os.utime(os.path.join(ExportCacheService.get_cache_dir(), f"{name}.zip"), (mtime, mtime))
+    assert ExportCacheService.evict(max_bytes=1500) == 1
+    assert ExportCacheService.get("1_old") is None
+    assert ExportCacheService.get("1_new") is not None
+
+
+# ============ 增量导出 ============
+
+def test_delta_export_includes_changes_and_removed_manifest(db_session, task_and_member, tmp_path, monkeypatch):
+    """增量导出只包含时间点之后的提交，删除清单列出被删除的文件，完整下载后才记录时间点"""
+    import json
+    from datetime import datetime
+    from app.config import settings
+    from app.models import Member, Submission, SubmissionTombstone
+    from app.services import export as export_service
+    from app.services.export import ExportService
+
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+    task, member = task_and_member
+    other = Member(student_id="2024002", name="李四", class_id=member.class_id)
+    db_session.add(other)
+    db_session.commit()
+    db_session.add_all([
+        Submission(task_id=task.id, member_id=member.id, submission_type="text",
+                   text_content="早交的", updated_at=datetime(2024, 1, 1)),
+        Submission(task_id=task.id, member_id=other.id, submission_type="text",
+                   text_content="迟交的", updated_at=datetime(2024, 6, 1)),
+        SubmissionTombstone(task_id=task.id, member_id=member.id, submission_type="file",
+                            original_filename="旧版.pdf", reason="replaced", removed_at=datetime(2024, 5, 1)),
+        SubmissionTombstone(task_id=task.id, member_id=member.id, submission_type="file",
+                            original_filename="更早.pdf", removed_at=datetime(2024, 2, 1)),
+    ])
+    db_session.commit()
+
+    stream, filename, file_count, _ = ExportService.export_task_delta(
+        db_session, task.id, since=datetime(2024, 3, 1)
+    )
+    zf = _read_zip(stream)
+    assert file_count == 1
+    assert zf.namelist() == ["2024002_李四/文本.txt", "_manifest.json"]
+    manifest = json.loads(zf.read("_manifest.json"))
+    assert manifest["mode"] == "delta"
+    assert [r["path"] for r in manifest["removed"]] == ["2024001_张三/旧版.pdf"]
+
+    # 首次增量导出为全量；未完整输出时不记录时间点（时间点在独立会话中写入）
+    monkeypatch.setattr(export_service, "SessionLocal", lambda: db_session)
+    task_id = task.id
+    stream, _, file_count, _ = ExportService.export_task_delta(db_session, task_id, use_watermark=True)
+    assert file_count == 2
+    next(stream)
+    stream.close()
+    assert ExportService.get_watermark(db_session, task_id) is None
+
+    stream, _, _, _ = ExportService.export_task_delta(db_session, task_id, use_watermark=True)
+    b"".join(stream)
+    assert ExportService.get_watermark(db_session, task_id) is not None
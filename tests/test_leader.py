@@ -0,0 +1,48 @@
+"""
+定时任务领导选举测试 - 租约互斥、过期接管、领导权变化回调
+"""
+from datetime import timedelta
+
+from app.database import db_now
+from app.models import SchedulerLease
+from app.services.leader import LeaderService
+
+
+def _expire(db_session):
+    db_session.query(SchedulerLease).update({SchedulerLease.expires_at: db_now(db_session) - timedelta(seconds=1)})
+    db_session.commit()
+
+
+def test_lease_is_exclusive_until_expired(db_session):
+    """同一时刻只有一个持有者，租约过期或释放后其他进程接管"""
+    assert LeaderService.try_acquire(db_session, "worker-a")
+    assert LeaderService.try_acquire(db_session, "worker-a")
+    assert not LeaderService.try_acquire(db_session, "worker-b")
+
+    _expire(db_session)
+    assert LeaderService.try_acquire(db_session, "worker-b")
+    assert not LeaderService.try_acquire(db_session, "worker-a")
+
+    LeaderService.release(db_session, "worker-b")
+    assert LeaderService.try_acquire(db_session, "worker-a")
+    assert db_session.query(SchedulerLease).one().holder == "worker-a"
+
+
+def test_heartbeat_triggers_callbacks(db_session, monkeypatch):
+    """取得和失去领导权时各回调一次"""
+    events = []
+    monkeypatch.setattr(LeaderService, "_on_acquire", lambda: events.append("acquire"))
+    monkeypatch.setattr(LeaderService, "_on_lose", lambda: events.append("lose"))
+    monkeypatch.setattr(LeaderService, "_is_leader", False)
+    # 未启动选举的进程（单进程运行）视为领导者
+    assert LeaderService.is_leader()
+
+    assert LeaderService.heartbeat(lambda: db_session)
+    assert LeaderService.heartbeat(lambda: db_session)
+    assert events == ["acquire"]
+
+    # 其他进程在租约过期后接管
+    _expire(db_session)
+    assert LeaderService.try_acquire(db_session, "other-worker")
+    assert not LeaderService.heartbeat(lambda: db_session)
+    assert events == ["acquire", "lose"]
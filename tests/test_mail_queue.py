@@ -0,0 +1,108 @@
+"""
+提醒邮件队列测试 - 入队立即返回、退避重试、死信、进度
+"""
+from datetime import datetime, timedelta
+
+from app.config import settings
+from app.models import ReminderLog
+from app.services.mail_queue import MailQueueService
+from tests.conftest import FakeAsyncSMTP
+
+
+class FlakyAsyncSMTP(FakeAsyncSMTP):
+    """对指定收件人始终返回临时错误"""
+    failing = set()
+
+    async def sendmail(self, sender, recipients, message):
+        if recipients[0] in FlakyAsyncSMTP.failing:
+            import aiosmtplib
+            raise aiosmtplib.SMTPDataError(451, "Temporary failure")
+        await super().sendmail(sender, recipients, message)
+
+
+def _members(db_session, member, count):
+    members = [member]
+    for i in range(count):
+        other = type(member)(student_id=f"20249{i}", name=f"成员{i}", class_id=member.class_id, qq_email=f"{i}@qq.com")
+        db_session.add(other)
+        members.append(other)
+    db_session.commit()
+    return members
+
+
+def test_queue_retries_with_backoff_then_dead_letters(db_session, task_and_member, fake_async_smtp, smtp_config, monkeypatch):
+    """入队后由后台处理：成功的记为 sent，失败的按指数退避重试，次数用尽进入 dead"""
+    from app.utils import async_smtp
+    monkeypatch.setattr(async_smtp.aiosmtplib, "SMTP", FlakyAsyncSMTP)
+    FlakyAsyncSMTP.failing = {"1@qq.com"}
+    monkeypatch.setattr(settings, "smtp_rate_per_second", 0)
+    monkeypatch.setattr(settings, "mail_queue_max_attempts", 2)
+    task, member = task_and_member
+    members = _members(db_session, member, 3)
+    task_id = task.id
+
+    queued = MailQueueService.enqueue(db_session, task, members)
+    assert (queued.total, queued.queued, queued.failed) == (4, 3, 1)
+    progress = MailQueueService.get_progress(db_session, task_id, queued.batch_id)
+    assert (progress.pending, progress.failed, progress.finished) == (3, 1, False)
+
+    assert MailQueueService.drain(lambda: db_session) == 3
+    progress = MailQueueService.get_progress(db_session, task_id, queued.batch_id)
+    assert (progress.sent, progress.pending, progress.retrying) == (2, 1, 1)
+
+    retry = db_session.query(ReminderLog).filter(ReminderLog.email == "1@qq.com").one()
+    retry_id = retry.id
+    assert retry.attempts == 1
+    assert retry.next_attempt_at > datetime.now() + timedelta(seconds=settings.mail_queue_retry_base_seconds - 5)
+    # 未到重试时间不处理
+    assert MailQueueService.drain(lambda: db_session) == 0
+
+    db_session.query(ReminderLog).filter(ReminderLog.id == retry_id).update(
+        {ReminderLog.next_attempt_at: datetime.now() - timedelta(seconds=1)}
+    )
+    db_session.commit()
+    assert MailQueueService.drain(lambda: db_session) == 1
+    progress = MailQueueService.get_progress(db_session, task_id, queued.batch_id)
+    assert (progress.sent, progress.dead, progress.failed, progress.finished) == (2, 1, 1, True)
+
+
+def test_retry_delay_doubles():
+    base = settings.mail_queue_retry_base_seconds
+    assert [MailQueueService.get_retry_delay(n).total_seconds() for n in (1, 2, 3)] == [base, base * 2, base * 4]
+
+
+def test_queue_sends_concurrently_and_writes_logs(db_session, task_and_member, fake_async_smtp, smtp_config, monkeypatch):
+    """队列并发发送一批提醒，逐人写回发送结果"""
+    monkeypatch.setattr(settings, "smtp_concurrency", 2)
+    monkeypatch.setattr(settings, "smtp_rate_per_second", 0)
+    task, member = task_and_member
+    members = _members(db_session, member, 4)
+
+    MailQueueService.enqueue(db_session, task, members)
+    assert MailQueueService.drain(lambda: db_session) == 4
+
+    assert fake_async_smtp.logins == 2
+    statuses = dict(db_session.query(ReminderLog.email, ReminderLog.status).all())
+    assert statuses == {"": "failed", **{f"{i}@qq.com": "sent" for i in range(4)}}
+
+
+def test_drain_requeues_only_stale_claims(db_session, task_and_member, fake_async_smtp, smtp_config, monkeypatch):
+    """其他进程刚取出的 sending 记录不重新排队，超时的（发送进程已退出）才重新发送"""
+    from app.database import db_now
+
+    monkeypatch.setattr(settings, "smtp_rate_per_second", 0)
+    task, member = task_and_member
+    members = _members(db_session, member, 2)
+    MailQueueService.enqueue(db_session, task, members)
+
+    now = db_now(db_session)
+    claims = {"0@qq.com": now, "1@qq.com": now - timedelta(seconds=settings.mail_queue_claim_timeout_seconds + 1)}
+    for log in db_session.query(ReminderLog).filter(ReminderLog.status == "pending").all():
+        log.status = "sending"
+        log.claimed_at = claims[log.email]
+    db_session.commit()
+
+    assert MailQueueService.drain(lambda: db_session) == 1
+    assert fake_async_smtp.sent == ["1@qq.com"]
+    statuses = dict(db_session.query(ReminderLog.email, ReminderLog.status).all())
+    assert statuses == {"": "failed", "0@qq.com": "sending", "1@qq.com": "sent"}
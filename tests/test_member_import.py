@@ -0,0 +1,111 @@
+"""
+成员批量导入测试 - 批量写入与逐行回退
+"""
+from app.models import Member
+from app.schemas.member import MemberImportItem
+from app.services.member import MemberService
+
+
+def _items(count: int, prefix: str = "S"):
+    return [MemberImportItem(student_id=f"{prefix}{i:05d}", name=f"学生{i}") for i in range(count)]
+
+
+def test_bulk_import_batches_queries(db_session, task_and_member, count_queries, monkeypatch):
+    """每批只需预取、插入、更新和提交，语句数只与批数有关"""
+    monkeypatch.setattr(MemberService, "IMPORT_BATCH_SIZE", 100)
+    _, member = task_and_member
+    class_id = member.class_id
+
+    with count_queries() as statements:
+        result = MemberService.import_members(db_session, class_id, _items(250))
+    assert (result.success_count, result.skip_count, result.error_count) == (250, 0, 0)
+    # 每批预取、插入、递增组织版本号、提交，另加一次任务统计重算
+    assert len(statements) <= 3 * 4 + 5
+    assert db_session.query(Member).count() == 251
+
+    # 覆盖模式：已存在的更新，文件内重复的以最后一行为准
+    rows = _items(3) + [MemberImportItem(student_id="S00001", name="改名"), MemberImportItem(student_id="N00001", name="新人")]
+    result = MemberService.import_members(db_session, class_id, rows, skip_duplicates=False)
+    assert (result.success_count, result.skip_count, result.error_count) == (5, 0, 0)
+    assert db_session.query(Member).filter(Member.student_id == "S00001").one().name == "改名"
+
+    result = MemberService.import_members(db_session, class_id, _items(3) + _items(1, "X"))
+    assert (result.success_count, result.skip_count, result.error_count) == (1, 3, 0)
+
+
+def test_bulk_import_reports_row_errors(db_session, task_and_member):
+    """批量写入失败时逐行重试，只有出错的行计入错误"""
+    _, member = task_and_member
+    # 姓名为空违反 NOT NULL 约束（绕过 pydantic 校验模拟数据库层面的错误）
+    rows = _items(3)
+    rows.insert(1, MemberImportItem.model_construct(student_id="BAD", name=None, gender=None, dormitory=None, qq_email=None))
+
+    result = MemberService.import_members(db_session, member.class_id, rows)
+    assert (result.success_count, result.error_count) == (3, 1)
+    assert result.errors[0].startswith("学号 BAD:")
+    assert db_session.query(Member).count() == 4
+
+
+def test_overwrite_import_rebuilds_only_affected_classes(db_session, task_and_member, monkeypatch):
+    """覆盖导入把成员从其他班级移入时，只重算本班和原班级的统计"""
+    from app.models import Class, Task
+    from app.services.roster import RosterService
+    from app.services.task import TaskService
+    from app.services.task_stat import TaskStatService
+
+    task, member = task_and_member
+    target = Class(name="二班", grade_id=member.class_.grade_id)
+    db_session.add(target)
+    db_session.commit()
+    target_task = Task(title="二班任务", class_id=target.id)
+    db_session.add(target_task)
+    db_session.commit()
+    source_id, target_id, task_id, target_task_id = member.class_id, target.id, task.id, target_task.id
+    TaskStatService.rebuild(db_session)
+
+    rebuilt = []
+    invalidated = []
+    real_rebuild = TaskStatService.rebuild
+    monkeypatch.setattr(TaskStatService, "rebuild", staticmethod(
+        lambda db, class_id=None, task_ids=None: rebuilt.append(class_id) or real_rebuild(db, class_id, task_ids)
+    ))
+    monkeypatch.setattr(RosterService, "invalidate_class", classmethod(lambda cls, class_id: invalidated.append(class_id)))
+    monkeypatch.setattr(RosterService, "clear", classmethod(lambda cls: invalidated.append("all")))
+
+    rows = [MemberImportItem(student_id="2024001", name="张三"), MemberImportItem(student_id="N00001", name="新人")]
+    result = MemberService.import_members(db_session, target_id, rows, skip_duplicates=False)
+
+    assert result.success_count == 2
+    assert sorted(rebuilt) == sorted(invalidated) == sorted([source_id, target_id])
+    assert TaskService.get_task_stats(db_session, task_id).total_members == 0
+    assert TaskService.get_task_stats(db_session, target_task_id).total_members == 2
+
+
+# ============ 文件解析 ============
+
+def test_streaming_parsers_yield_items_lazily():
+    """Excel（只读模式）和CSV（UTF-8/GBK）解析结果一致，按需逐行产出"""
+    import io
+    import types
+    from openpyxl import Workbook
+    from app.utils.excel_handler import iter_member_file
+
+    rows = [("学号*", "姓名*", "性别", "QQ邮箱"), ("2024001", "张三", "男", None), (None, None, None, None), (2024002, "李四", "", "x@qq.com")]
+    wb = Workbook()
+    for row in rows:
+        wb.active.append(row)
+    xlsx = io.BytesIO()
+    wb.save(xlsx)
+    xlsx.seek(0)
+
+    csv_text = "\n".join(",".join("" if v is None else str(v) for v in row) for row in rows)
+    sources = [
+        (xlsx, "名单.xlsx"),
+        (io.BytesIO(csv_text.encode("utf-8-sig")), "名单.csv"),
+        (io.BytesIO(csv_text.encode("gbk")), "名单.CSV"),
+    ]
+    for file, filename in sources:
+        items = iter_member_file(file, filename)
+        assert isinstance(items, types.GeneratorType)
+        parsed = [(i.student_id, i.name, i.gender, i.qq_email) for i in items]
+        assert parsed == [("2024001", "张三", "男", None), ("2024002", "李四", None, "x@qq.com")], filename
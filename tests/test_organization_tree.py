@@ -0,0 +1,54 @@
+"""
+组织树测试 - 平铺查询构建与按版本号缓存
+"""
+from app.schemas.class_ import ClassCreate
+from app.schemas.member import MemberCreate
+from app.services.member import MemberService
+from app.services.organization import OrganizationService
+
+
+def _classes(tree):
+    return {cls.name: cls for college in tree.colleges for grade in college.grades for cls in grade.classes}
+
+
+def test_organization_tree_cached_by_version(db_session, task_and_member, count_queries, monkeypatch):
+    """组织树按版本号缓存，组织或成员变动后重新构建"""
+    monkeypatch.setattr(OrganizationService, "_tree_cache", {})
+    _, member = task_and_member
+    grade_id = member.class_.grade_id
+
+    with count_queries() as statements:
+        tree = OrganizationService.get_tree(db_session, with_member_counts=True)
+    assert len(statements) == 5
+    assert len(tree.colleges) == 1
+    assert {name: cls.member_count for name, cls in _classes(tree).items()} == {"测试班级": 1}
+    assert _classes(OrganizationService.get_tree(db_session))["测试班级"].member_count is None
+
+    with count_queries() as statements:
+        assert OrganizationService.get_tree(db_session, with_member_counts=True) is tree
+    # 命中缓存时只读取版本号
+    assert len(statements) == 1
+
+    OrganizationService.create_class(db_session, ClassCreate(name="二班", grade_id=grade_id))
+    MemberService.create_member(db_session, MemberCreate(student_id="2024002", name="李四", class_id=member.class_id))
+    updated = OrganizationService.get_tree(db_session, with_member_counts=True)
+    assert updated.version > tree.version
+    assert {name: cls.member_count for name, cls in _classes(updated).items()} == {"测试班级": 2, "二班": 0}
+
+
+def test_version_bumped_by_other_worker_invalidates_cache(db_session, task_and_member, monkeypatch):
+    """版本号保存在数据库中，其他进程的变动也会使本进程的缓存失效"""
+    monkeypatch.setattr(OrganizationService, "_tree_cache", {})
+    _, member = task_and_member
+    tree = OrganizationService.get_tree(db_session)
+    assert OrganizationService.get_tree(db_session) is tree
+
+    # 模拟其他进程新增班级：直接写库并在同一事务中递增版本号，不经过本进程的缓存
+    from app.models import Class
+    db_session.add(Class(name="二班", grade_id=member.class_.grade_id))
+    OrganizationService.bump_version(db_session)
+    db_session.commit()
+
+    updated = OrganizationService.get_tree(db_session)
+    assert updated.version == tree.version + 1
+    assert set(_classes(updated)) == {"测试班级", "二班"}
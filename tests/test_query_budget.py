@@ -0,0 +1,89 @@
+"""
+查询次数回归测试 - 导出与公开列表不随成员数量增加查询次数
+"""
+import pytest
+
+from app.models import College, Grade, Class, Member, Task, Submission
+from app.services.export import ExportService
+from app.services.submission import SubmissionService
+
+
+def _create_class_with_submissions(db_session, tmp_path, size: int) -> Task:
+    college = College(name=f"学院{size}")
+    db_session.add(college)
+    db_session.commit()
+    grade = Grade(name="2024级", college_id=college.id)
+    db_session.add(grade)
+    db_session.commit()
+    class_ = Class(name=f"班级{size}", grade_id=grade.id)
+    db_session.add(class_)
+    db_session.commit()
+    task = Task(title=f"任务{size}", class_id=class_.id, questionnaire_config=[{"title": "问题"}])
+    db_session.add(task)
+    db_session.commit()
+
+    for i in range(size):
+        member = Member(student_id=f"{size}{i:04d}", name=f"成员{i}", class_id=class_.id)
+        db_session.add(member)
+        db_session.flush()
+        file_path = tmp_path / f"{size}_{i}.txt"
+        file_path.write_bytes(b"content")
+        db_session.add_all([
+            Submission(task_id=task.id, member_id=member.id, submission_type="file",
+                       original_filename="作业.txt", file_path=str(file_path), file_size=7),
+            Submission(task_id=task.id, member_id=member.id, submission_type="text",
+                       text_content="文本", item_index=2),
+            Submission(task_id=task.id, member_id=member.id, submission_type="questionnaire",
+                       questionnaire_answers={"0": "答案"}, item_index=3),
+        ])
+    db_session.commit()
+    return task
+
+
+QUERY_BUDGETS = [
+    ("build_export_entries", lambda db, task_id: ExportService.build_export_entries(db, task_id), 2),
+    ("get_export_preview", lambda db, task_id: ExportService.get_export_preview(db, task_id, "{student_id}_{name}"), 2),
+    ("export_text_submissions", ExportService.export_text_submissions, 2),
+    ("get_all_text_content", ExportService.get_all_text_content, 2),
+    ("get_all_questionnaire_content", ExportService.get_all_questionnaire_content, 2),
+    ("get_public_submissions", SubmissionService.get_public_submissions, 2),
+]
+
+
+@pytest.mark.parametrize("name,func,budget", QUERY_BUDGETS, ids=[b[0] for b in QUERY_BUDGETS])
+def test_query_count_independent_of_class_size(db_session, count_queries, tmp_path, name, func, budget):
+    """查询次数固定，不随班级人数增长"""
+    counts = []
+    for size in (3, 30):
+        task = _create_class_with_submissions(db_session, tmp_path, size)
+        task_id = task.id
+        db_session.expire_all()
+        with count_queries() as statements:
+            func(db_session, task_id)
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1], f"{name}: {counts}"
+    assert counts[1] <= budget, f"{name}: {counts[1]} 次查询，预算 {budget}"
+
+
+def test_roster_status_single_query(db_session, count_queries, tmp_path):
+    """成员提交状态一次查询返回，并在SQL中按是否已提交筛选"""
+    from app.services.member import MemberService
+
+    task = _create_class_with_submissions(db_session, tmp_path, 5)
+    late = Member(student_id="late", name="未交", class_id=task.class_id)
+    db_session.add(late)
+    db_session.commit()
+    class_id, task_id = task.class_id, task.id
+    db_session.expire_all()
+
+    with count_queries() as statements:
+        rows = MemberService.get_members_with_submission_status(db_session, class_id, task_id)
+    assert len(statements) == 1
+    assert len(rows) == 6
+    member, has_submitted, items, uploads = rows[0]
+    assert (has_submitted, items, uploads) == (True, 3, 3)
+
+    unsubmitted = MemberService.get_members_with_submission_status(db_session, class_id, task_id, submitted=False)
+    assert [(m.name, h, i, u) for m, h, i, u in unsubmitted] == [("未交", False, 0, 0)]
+    assert len(MemberService.get_members_with_submission_status(db_session, class_id, task_id, submitted=True)) == 5
@@ -0,0 +1,87 @@
+"""
+自动提醒调度测试 - 按任务安排一次性提醒、随任务变更重新安排
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from app.models import Member, ReminderLog, Task
+from app.schemas.task import TaskCreate, TaskUpdate
+from app.services.mail_queue import MailQueueService
+from app.services.scheduler import SchedulerService
+from app.services.task import TaskService
+
+
+@pytest.fixture
+def reminder_scheduler(monkeypatch):
+    """不启动线程的调度器，提醒任务存放在内存中"""
+    scheduler = BackgroundScheduler(jobstores={
+        "default": MemoryJobStore(),
+        SchedulerService.REMINDER_JOBSTORE: MemoryJobStore(),
+    })
+    scheduler.start(paused=True)
+    monkeypatch.setattr(SchedulerService, "_scheduler", scheduler)
+    monkeypatch.setattr(SchedulerService, "_is_running", True)
+    yield scheduler
+    scheduler.shutdown(wait=False)
+
+
+def _job(scheduler, task_id):
+    return scheduler.get_job(f"task_reminder_{task_id}", jobstore=SchedulerService.REMINDER_JOBSTORE)
+
+
+def test_reminder_job_follows_task_changes(db_session, task_and_member, reminder_scheduler):
+    """创建时按截止时间安排，修改截止时间重新安排，关闭提醒或删除任务时取消"""
+    _, member = task_and_member
+    deadline = (datetime.now() + timedelta(days=3)).replace(microsecond=0)
+    task = TaskService.create_task(db_session, TaskCreate(
+        title="自动提醒任务", class_id=member.class_id, deadline=deadline,
+        auto_remind_enabled=True, remind_before_hours=24
+    ))
+    job = _job(reminder_scheduler, task.id)
+    assert job.next_run_time.replace(tzinfo=None) == deadline - timedelta(hours=24)
+    assert job.args == (task.id,)
+
+    TaskService.update_task(db_session, task.id, TaskUpdate(deadline=deadline + timedelta(days=1)))
+    assert _job(reminder_scheduler, task.id).next_run_time.replace(tzinfo=None) == deadline
+
+    TaskService.update_task(db_session, task.id, TaskUpdate(auto_remind_enabled=False))
+    assert _job(reminder_scheduler, task.id) is None
+
+    TaskService.update_task(db_session, task.id, TaskUpdate(auto_remind_enabled=True))
+    assert _job(reminder_scheduler, task.id) is not None
+    TaskService.delete_task(db_session, task.id)
+    assert _job(reminder_scheduler, task.id) is None
+
+
+def test_reconcile_and_send_reminder(db_session, task_and_member, reminder_scheduler, monkeypatch):
+    """启动核对补上缺失的提醒并清理多余的；触发时入队一次，不重复提醒，手动提醒不影响自动提醒"""
+    monkeypatch.setattr(MailQueueService, "wake", classmethod(lambda cls: None))
+    task, member = task_and_member
+    member.qq_email = "2024001@qq.com"
+    task.deadline = datetime.now() + timedelta(hours=2)
+    task.auto_remind_enabled = True
+    task.remind_before_hours = 24
+    db_session.commit()
+    task_id = task.id
+    reminder_scheduler.add_job(print, "date", run_date=datetime.now() + timedelta(days=1),
+                               id="task_reminder_999", jobstore=SchedulerService.REMINDER_JOBSTORE)
+
+    assert SchedulerService.reconcile_reminders(lambda: db_session) == 1
+    assert _job(reminder_scheduler, task_id) is not None
+    assert _job(reminder_scheduler, 999) is None
+
+    # 提醒时间之后的手动提醒不影响自动提醒
+    member = db_session.query(Member).filter(Member.student_id == "2024001").one()
+    manual = MailQueueService.enqueue(db_session, db_session.get(Task, task_id), [member])
+    assert not manual.batch_id.startswith(MailQueueService.AUTO_BATCH_PREFIX)
+
+    assert SchedulerService.send_task_reminder(task_id, lambda: db_session) == 1
+    assert SchedulerService.send_task_reminder(task_id, lambda: db_session) == 0
+    auto_batches = db_session.query(ReminderLog.batch_id).filter(
+        ReminderLog.batch_id.like(f"{MailQueueService.AUTO_BATCH_PREFIX}%")
+    ).all()
+    assert len(auto_batches) == 1 and len(auto_batches[0][0]) == 32
+    assert db_session.query(ReminderLog).filter(ReminderLog.status == "pending").count() == 2
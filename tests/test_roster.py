@@ -0,0 +1,52 @@
+"""
+提交页名单快照测试 - 进程内缓存与增量更新
+"""
+import json
+
+from app.schemas.member import MemberCreate, MemberUpdate
+from app.services.member import MemberService
+from app.services.roster import RosterService
+from app.services.submission import SubmissionService
+
+
+def _members(roster):
+    return {m["name"]: m for m in json.loads(roster[1])["members"]}
+
+
+def test_roster_served_from_memory_and_updated_by_hooks(db_session, task_and_member, count_queries):
+    """名单只构建一次，提交/删除/成员变更时增量更新并更换ETag"""
+    RosterService.clear()
+    task, member = task_and_member
+    task_id = task.id
+
+    first = RosterService.get_roster(db_session, task_id)
+    assert _members(first)["张三"]["has_submitted"] is False
+    with count_queries() as statements:
+        assert RosterService.get_roster(db_session, task_id) == first
+    assert statements == []
+
+    submission = SubmissionService.create_text_submission(db_session, task_id, member.id, "内容")
+    submitted = RosterService.get_roster(db_session, task_id)
+    assert submitted[0] != first[0]
+    assert _members(submitted)["张三"]["has_submitted"] is True
+
+    other = MemberService.create_member(db_session, MemberCreate(
+        student_id="2024002", name="李四", class_id=member.class_id
+    ))
+    MemberService.update_member(db_session, member.id, MemberUpdate(name="张三丰"))
+    with count_queries() as statements:
+        roster = RosterService.get_roster(db_session, task_id)
+    assert statements == []
+    assert set(_members(roster)) == {"张三丰", "李四"}
+    assert _members(roster)["李四"]["has_submitted"] is False
+
+    SubmissionService.delete_submission(db_session, submission.id)
+    MemberService.delete_member(db_session, other.id)
+    roster = RosterService.get_roster(db_session, task_id)
+    assert list(_members(roster)) == ["张三丰"]
+    assert _members(roster)["张三丰"]["has_submitted"] is False
+
+    # 与数据库重新构建（如另一个进程）的结果一致，ETag 也相同
+    RosterService.clear()
+    assert RosterService.get_roster(db_session, task_id) == roster
+    assert RosterService.get_roster(db_session, 9999) is None
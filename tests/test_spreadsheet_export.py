@@ -0,0 +1,89 @@
+"""
+表格导出测试 - 只写模式Excel与CSV流式生成
+"""
+import csv
+import io
+
+from openpyxl import load_workbook
+
+from app.models import Member, Submission
+from app.services.member import MemberService
+from app.services.task import TaskService
+from app.utils.excel_handler import stream_rows_xlsx, stream_rows_csv, iter_member_file
+
+
+def test_member_export_roundtrips_through_import(db_session, task_and_member):
+    """导出的成员表（xlsx/csv）可按导入模板重新解析"""
+    task, member = task_and_member
+    db_session.add(Member(student_id="2024002", name="李四", gender="女", class_id=member.class_id))
+    db_session.commit()
+
+    for stream, filename in (
+        (stream_rows_xlsx("成员列表", MemberService.EXPORT_HEADERS, MemberService.iter_export_rows(db_session, class_id=member.class_id)), "m.xlsx"),
+        (stream_rows_csv(MemberService.EXPORT_HEADERS, MemberService.iter_export_rows(db_session, class_id=member.class_id)), "m.csv"),
+    ):
+        items = list(iter_member_file(io.BytesIO(b"".join(stream)), filename))
+        assert [(i.student_id, i.name, i.gender) for i in items] == [("2024001", "张三", None), ("2024002", "李四", "女")]
+
+
+def test_task_status_sheet_rows(db_session, task_and_member):
+    """提交情况表包含是否提交、提交项数、上传次数和文件大小"""
+    task, member = task_and_member
+    other = Member(student_id="2024002", name="李四", class_id=member.class_id)
+    db_session.add(other)
+    db_session.add_all([
+        Submission(task_id=task.id, member_id=member.id, file_size=1000, upload_count=2),
+        Submission(task_id=task.id, member_id=member.id, file_size=500, item_index=2),
+    ])
+    db_session.commit()
+
+    data = b"".join(stream_rows_xlsx("提交情况", TaskService.STATUS_SHEET_HEADERS, TaskService.iter_status_rows(db_session, task)))
+    rows = list(load_workbook(io.BytesIO(data), read_only=True).active.iter_rows(values_only=True))
+    assert rows[0] == tuple(TaskService.STATUS_SHEET_HEADERS)
+    assert rows[1][:3] == ("2024001", "张三", "是") and rows[1][4:] == (2, 3, 1500)
+    assert rows[2] == ("2024002", "李四", "否", None, 0, 0, 0)
+
+    text = b"".join(stream_rows_csv(TaskService.STATUS_SHEET_HEADERS, TaskService.iter_status_rows(db_session, task))).decode("utf-8-sig")
+    assert list(csv.reader(io.StringIO(text)))[2] == ["2024002", "李四", "否", "", "0", "0", "0"]
+
+
+def test_streaming_exports_survive_request_session_close(db_session, task_and_member, monkeypatch):
+    """响应体在请求会话关闭后发送，超过一批的导出仍完整输出"""
+    from fastapi.testclient import TestClient
+    from app import database
+    from app.database import get_db
+    from app.main import app
+    from tests.conftest import TestingSessionLocal
+
+    task, member = task_and_member
+    db_session.bulk_insert_mappings(Member, [
+        {"student_id": f"S{i:05d}", "name": f"学生{i}", "class_id": member.class_id} for i in range(1500)
+    ])
+    db_session.commit()
+    task_id, class_id = task.id, member.class_id
+
+    def closed_execute(*args, **kwargs):
+        raise AssertionError("请求会话已关闭")
+
+    def closing_get_db():
+        # 与生产环境一致：依赖清理时关闭请求会话；关闭后仍被使用时立即报错
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+            db.execute = closed_execute
+
+    monkeypatch.setattr(database, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setitem(app.dependency_overrides, get_db, closing_get_db)
+    client = TestClient(app)
+
+    response = client.get(f"/api/v1/members/export?class_id={class_id}&format=csv")
+    assert response.status_code == 200
+    rows = list(csv.reader(io.StringIO(response.content.decode("utf-8-sig"))))
+    assert len(rows) == 1 + 1501
+
+    response = client.get(f"/api/v1/tasks/{task_id}/status-sheet?format=xlsx")
+    assert response.status_code == 200
+    sheet = list(load_workbook(io.BytesIO(response.content), read_only=True).active.iter_rows(values_only=True))
+    assert len(sheet) == 1 + 1501
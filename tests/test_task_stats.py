@@ -0,0 +1,60 @@
+"""
+任务统计计数测试 - 增量维护与全量重算一致
+"""
+from app.models import TaskStat
+from app.schemas.member import MemberCreate
+from app.schemas.task import TaskCreate
+from app.services.member import MemberService
+from app.services.submission import SubmissionService
+from app.services.task import TaskService
+from app.services.task_stat import TaskStatService
+
+
+def _counts(db_session, task_id):
+    stats = TaskService.get_task_stats(db_session, task_id)
+    return stats.total_members, stats.submitted_count
+
+
+def test_task_stats_maintained_incrementally(db_session, task_and_member):
+    """提交/删除/成员增删时计数随之变化，与重算结果一致"""
+    legacy_task, member = task_and_member
+    class_id = member.class_id
+    task = TaskService.create_task(db_session, TaskCreate(title="新任务", class_id=class_id))
+    assert _counts(db_session, task.id) == (1, 0)
+
+    other = MemberService.create_member(db_session, MemberCreate(student_id="2024002", name="李四", class_id=class_id))
+    assert _counts(db_session, task.id) == (2, 0)
+
+    first = SubmissionService.create_text_submission(db_session, task.id, member.id, "第一项", item_index=1)
+    second = SubmissionService.create_text_submission(db_session, task.id, member.id, "第二项", item_index=2)
+    SubmissionService.create_text_submission(db_session, task.id, other.id, "李四")
+    assert _counts(db_session, task.id) == (2, 2)
+
+    SubmissionService.delete_submission(db_session, first.id)
+    assert _counts(db_session, task.id) == (2, 2)
+    SubmissionService.delete_submission(db_session, second.id)
+    assert _counts(db_session, task.id) == (2, 1)
+
+    MemberService.delete_member(db_session, other.id)
+    assert _counts(db_session, task.id) == (1, 0)
+
+    # 历史任务没有计数行，首次读取时补算
+    assert _counts(db_session, legacy_task.id) == (1, 0)
+
+    incremental = {s.task_id: (s.total_members, s.submitted_count) for s in db_session.query(TaskStat).all()}
+    assert TaskStatService.rebuild(db_session) == 2
+    db_session.expire_all()
+    assert {s.task_id: (s.total_members, s.submitted_count) for s in db_session.query(TaskStat).all()} == incremental
+
+
+def test_batch_stats_single_read(db_session, task_and_member, count_queries):
+    """批量统计一次查询读取，忽略不存在的任务"""
+    _, member = task_and_member
+    ids = [TaskService.create_task(db_session, TaskCreate(title=f"任务{i}", class_id=member.class_id)).id for i in range(5)]
+
+    with count_queries() as statements:
+        stats = TaskService.get_tasks_stats(db_session, ids)
+    assert len(statements) == 1
+    assert [s.task_id for s in stats] == ids
+    assert all(s.total_members == 1 for s in stats)
+    assert [s.task_id for s in TaskService.get_tasks_stats(db_session, ids + [9999])] == ids
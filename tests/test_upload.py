@@ -0,0 +1,243 @@
+"""
+文件上传测试 - 分块写盘与大小限制
+"""
+import asyncio
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import UploadFile
+
+from app.config import settings
+from app.models import Submission
+from app.services.submission import SubmissionService, SubmissionError
+
+
+def _make_upload(data: bytes, filename: str = "test.bin") -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename=filename)
+
+
+def test_save_upload_file_writes_in_chunks(tmp_path, monkeypatch):
+    """分块写入后的文件内容、大小和哈希应与原始数据一致"""
+    monkeypatch.setattr(SubmissionService, "UPLOAD_CHUNK_SIZE", 1000)
+    data = os.urandom(4500)
+    file_path = str(tmp_path / "out.bin")
+
+    size, content_hash = asyncio.run(SubmissionService.save_upload_file(_make_upload(data), file_path))
+
+    assert size == len(data)
+    assert content_hash == hashlib.sha256(data).hexdigest()
+    with open(file_path, "rb") as f:
+        assert f.read() == data
+    assert not os.path.exists(file_path + ".part")
+
+
+def test_save_upload_file_rejects_oversized(tmp_path, monkeypatch):
+    """超过 max_file_size 时应中止写入并清理临时文件"""
+    monkeypatch.setattr(SubmissionService, "UPLOAD_CHUNK_SIZE", 1000)
+    monkeypatch.setattr(settings, "max_file_size", 2500)
+    file_path = str(tmp_path / "out.bin")
+
+    with pytest.raises(SubmissionError) as exc_info:
+        asyncio.run(SubmissionService.save_upload_file(_make_upload(b"x" * 4000), file_path))
+
+    assert exc_info.value.code == "file_too_large"
+    assert not os.path.exists(file_path)
+    assert not os.path.exists(file_path + ".part")
+
+
+# ============ 断点续传 ============
+
+async def _iter_bytes(data: bytes, step: int = 300):
+    for i in range(0, len(data), step):
+        yield data[i:i + step]
+
+
+def test_resumable_upload_roundtrip(db_session, task_and_member, tmp_path, monkeypatch):
+    """分片乱序被拒绝、重复分片被忽略，完成后生成提交记录"""
+    from app.schemas.upload import UploadSessionCreate
+    from app.services.upload import UploadService
+
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "upload_chunk_size", 1000)
+    task, member = task_and_member
+    data = os.urandom(2500)
+
+    session = UploadService.create_session(db_session, UploadSessionCreate(
+        task_id=task.id, member_id=member.id, filename="video.mp4", file_size=len(data)
+    ))
+    upload_id = session.id
+    assert UploadService.to_response(session).total_chunks == 3
+
+    with pytest.raises(SubmissionError) as exc_info:
+        asyncio.run(UploadService.write_chunk(db_session, upload_id, 1, _iter_bytes(data[1000:2000])))
+    assert exc_info.value.code == "chunk_out_of_order"
+
+    for index in (0, 0, 1, 2):
+        chunk = data[index * 1000:(index + 1) * 1000]
+        session = asyncio.run(UploadService.write_chunk(db_session, upload_id, index, _iter_bytes(chunk)))
+    assert session.received_size == len(data)
+
+    submission = UploadService.complete_session(db_session, upload_id)
+    assert submission.file_size == len(data)
+    assert submission.original_filename == "video.mp4"
+    with open(submission.file_path, "rb") as f:
+        assert f.read() == data
+    assert UploadService.get_session(db_session, upload_id) is None
+
+
+def test_complete_keeps_partial_until_commit_and_is_idempotent(db_session, task_and_member, tmp_path, monkeypatch):
+    """写入提交记录失败时会话和临时文件保留；重复完成返回同一提交"""
+    from app.schemas.upload import UploadSessionCreate
+    from app.services.upload import UploadService
+
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+    task, member = task_and_member
+    data = os.urandom(1500)
+
+    session = UploadService.create_session(db_session, UploadSessionCreate(
+        task_id=task.id, member_id=member.id, filename="video.mp4", file_size=len(data)
+    ))
+    upload_id = session.id
+    asyncio.run(UploadService.write_chunk(db_session, upload_id, 0, _iter_bytes(data)))
+    partial_path = UploadService.get_partial_path(upload_id)
+
+    original_commit = db_session.commit
+
+    def failing_commit():
+        raise RuntimeError("commit failed")
+
+    monkeypatch.setattr(db_session, "commit", failing_commit)
+    with pytest.raises(SubmissionError):
+        UploadService.complete_session(db_session, upload_id)
+    monkeypatch.setattr(db_session, "commit", original_commit)
+
+    assert os.path.exists(partial_path)
+    assert UploadService.get_session(db_session, upload_id) is not None
+
+    submission = UploadService.complete_session(db_session, upload_id)
+    with open(submission.file_path, "rb") as f:
+        assert f.read() == data
+    assert not os.path.exists(partial_path)
+
+    retried = UploadService.complete_session(db_session, upload_id)
+    assert retried.id == submission.id
+    assert db_session.query(Submission).filter(Submission.task_id == task.id).count() == 1
+
+
+# ============ 内容寻址存储 ============
+
+def test_identical_uploads_share_one_blob(db_session, task_and_member, tmp_path, monkeypatch):
+    """相同内容只保存一份，引用归零后由垃圾回收在宽限期后删除"""
+    from app.models import FileBlob, Member
+    from app.services.storage import StorageService
+
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+    task, member = task_and_member
+    other = Member(student_id="2024002", name="李四", class_id=member.class_id)
+    db_session.add(other)
+    db_session.commit()
+    data = os.urandom(3000)
+
+    first = asyncio.run(SubmissionService.create_file_submission(
+        db_session, task.id, member.id, _make_upload(data, "模板.docx")
+    ))
+    second = asyncio.run(SubmissionService.create_file_submission(
+        db_session, task.id, other.id, _make_upload(data, "模板.docx")
+    ))
+
+    assert first.content_hash == second.content_hash == hashlib.sha256(data).hexdigest()
+    assert first.file_path == second.file_path
+    blob = db_session.query(FileBlob).filter(FileBlob.sha256 == first.content_hash).one()
+    assert blob.ref_count == 2
+
+    # 同一成员重新上传相同内容，引用计数不变
+    asyncio.run(SubmissionService.create_file_submission(
+        db_session, task.id, member.id, _make_upload(data, "模板.docx")
+    ))
+    db_session.refresh(blob)
+    assert blob.ref_count == 2
+
+    blob_path = first.file_path
+    sha256 = first.content_hash
+    SubmissionService.delete_submission(db_session, first.id)
+    SubmissionService.delete_submission(db_session, second.id)
+
+    # 引用归零后不立即删除，宽限期内重新上传相同内容直接复用
+    assert os.path.exists(blob_path)
+    assert StorageService.collect_garbage(db_session) == 0
+    reused = asyncio.run(SubmissionService.create_file_submission(
+        db_session, task.id, member.id, _make_upload(data, "模板.docx")
+    ))
+    assert reused.file_path == blob_path
+    assert db_session.query(FileBlob.ref_count).filter(FileBlob.sha256 == sha256).scalar() == 1
+
+    # 超过宽限期后由垃圾回收删除记录和文件
+    SubmissionService.delete_submission(db_session, reused.id)
+    monkeypatch.setattr(settings, "blob_orphan_grace_seconds", -1)
+    assert StorageService.collect_garbage(db_session) == 1
+    assert not os.path.exists(blob_path)
+    assert db_session.query(FileBlob).count() == 0
+
+
+def test_concurrent_new_blob_falls_back_to_increment(db_session, tmp_path, monkeypatch):
+    """两个请求同时写入相同的新内容时，后插入的一方改为增加引用计数"""
+    from app.models import FileBlob
+    from app.services.storage import StorageService
+
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+    data = os.urandom(1000)
+    sha256 = hashlib.sha256(data).hexdigest()
+    db_session.add(FileBlob(sha256=sha256, file_path=StorageService.get_blob_path(sha256), file_size=len(data), ref_count=1))
+    db_session.commit()
+
+    # 模拟另一请求在本请求检查之后才插入记录
+    real_increment = StorageService._increment_ref
+    calls = []
+
+    def racing_increment(db, key):
+        calls.append(key)
+        return 0 if len(calls) == 1 else real_increment(db, key)
+
+    monkeypatch.setattr(StorageService, "_increment_ref", staticmethod(racing_increment))
+    temp_path = StorageService.get_temp_path()
+    with open(temp_path, "wb") as f:
+        f.write(data)
+
+    blob_path = StorageService.store_blob(db_session, temp_path, sha256, len(data))
+    db_session.commit()
+
+    assert len(calls) == 2
+    assert os.path.exists(blob_path)
+    blob = db_session.query(FileBlob).filter(FileBlob.sha256 == sha256).one()
+    assert blob.ref_count == 2
+
+
+def test_garbage_collection_removes_untracked_blob_files(db_session, task_and_member, tmp_path, monkeypatch):
+    """回滚遗留的 blob 文件和临时文件超过宽限期后被回收"""
+    from app.services.storage import StorageService
+
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+    task, member = task_and_member
+    kept = asyncio.run(SubmissionService.create_file_submission(
+        db_session, task.id, member.id, _make_upload(b"kept", "a.txt")
+    ))
+
+    leaked = StorageService.get_blob_path("ab" * 32)
+    os.makedirs(os.path.dirname(leaked), exist_ok=True)
+    with open(leaked, "wb") as f:
+        f.write(b"leaked")
+    temp_path = StorageService.get_temp_path()
+    with open(temp_path, "wb") as f:
+        f.write(b"partial")
+
+    # 宽限期内不删除
+    assert StorageService.collect_garbage(db_session) == 0
+    assert os.path.exists(leaked)
+
+    monkeypatch.setattr(settings, "blob_orphan_grace_seconds", -1)
+    assert StorageService.collect_garbage(db_session) == 2
+    assert not os.path.exists(leaked)
+    assert not os.path.exists(temp_path)
+    assert os.path.exists(kept.file_path)